@@ -1,12 +1,14 @@
 # -*- coding: utf-8 -*-
 from .base import Agent, Action, BehaviourRule, Parametter
 from .geo import GeoAgent, AgentCreator
+from .columns import AgentColumns
 
 
 __all__ = [
     "Agent",
     "GeoAgent",
     "AgentCreator",
+    "AgentColumns",
     "Action",
     "BehaviourRule",
     "Parametter",
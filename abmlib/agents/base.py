@@ -2,22 +2,89 @@
 from __future__ import annotations
 from abc import abstractmethod
 from typing import TYPE_CHECKING
-from typing import Any, Generic, Optional, TypeVar
+from typing import Any, Callable, Dict, Generic, Optional, Sequence, TypeVar
 
 if TYPE_CHECKING:
     from model import Model
 
 from collections import OrderedDict
+import numpy as np
 from mesa import Agent as MesaAgent
 
-__all__ = ["Agent", "Parametter", "BehaviourRule", "Action"]
+__all__ = ["Agent", "AgentMeta", "Parametter", "BehaviourRule", "Action"]
+
+
+def _compact_parametters(agent: Agent) -> Dict[str, Any]:
+    """Snapshot of the parametters of a compact agent."""
+    return {
+        name: getattr(agent, slot) for name, slot in agent._PARAMETTER_SLOTS.items()
+    }
+
+
+def _compact_get(agent: Agent, param: str) -> Any:
+    return getattr(agent, agent._PARAMETTER_SLOTS[param])
+
+
+def _compact_store(agent: Agent, param: str, value: Any):
+    object.__setattr__(agent, agent._PARAMETTER_SLOTS[param], value)
+
+
+class AgentMeta(type):
+    """Metaclass of agents generating `__slots__` for compact classes.
+
+    When a class sets `COMPACT = True` (or inherits it), the attributes listed
+    in `COMPACT_SLOTS` and one slot per parametter (`_p_<name>`) are declared as
+    `__slots__`. Parametters are then read and written directly from their
+    slots (`get` and the storage of `set` are bound to the class) and
+    `parametters` becomes a read-only snapshot. The mesa base classes have no
+    `__slots__`, instances keep a `__dict__` for the other attributes.
+    """
+
+    def __new__(mcs, name, bases, namespace, **kwargs):
+        compact = namespace.get(
+            "COMPACT", any(getattr(b, "COMPACT", False) for b in bases)
+        )
+        if compact and "__slots__" not in namespace:
+            # attributes already stored in a slot by a parent class
+            inherited = {
+                slot
+                for base in bases
+                for klass in base.__mro__
+                for slot in klass.__dict__.get("__slots__", ())
+            }
+            parametters = namespace.get("PARAMETTERS")
+            if parametters is None:
+                parametters = next(
+                    b.PARAMETTERS for b in bases if hasattr(b, "PARAMETTERS")
+                )
+            compact_slots = list(namespace.get("COMPACT_SLOTS", ()))
+            for base in bases:
+                for klass in base.__mro__:
+                    compact_slots += klass.__dict__.get("COMPACT_SLOTS", ())
+            parametter_slots = {p: f"_p_{p}" for p in parametters}
+            namespace["__slots__"] = tuple(
+                slot
+                for slot in dict.fromkeys(
+                    compact_slots + list(parametter_slots.values())
+                )
+                if slot not in inherited
+            )
+            namespace["_PARAMETTER_SLOTS"] = parametter_slots
+            namespace.setdefault("get", _compact_get)
+            namespace["_store_parametter"] = _compact_store
+            namespace["parametters"] = property(_compact_parametters)
+        return super().__new__(mcs, name, bases, namespace, **kwargs)
 
 
-class Agent(MesaAgent):
+class Agent(MesaAgent, metaclass=AgentMeta):
     PARAMETTERS = OrderedDict()
     EXPORTED_PARAMETTERS = []
     RULES = {}
     ACTIONS = {}
+    # store agents in generated __slots__ (see AgentMeta)
+    COMPACT = False
+    COMPACT_SLOTS = ("unique_id", "model", "pos")
+    _PARAMETTER_SLOTS: Dict[str, str] = {}
 
     def __init__(self, unique_id: Any, model: Model, **kwargs):
         """Skeleton for all non geographic agents
@@ -34,6 +101,14 @@ class Agent(MesaAgent):
         self._init_parametters(**kwargs)
 
     def _init_parametters(self, **override_values):
+        if self.COMPACT:
+            for name, param in self.PARAMETTERS.items():
+                setattr(
+                    self,
+                    self._PARAMETTER_SLOTS[name],
+                    param.init(self, self.model, override_values.get(name)),
+                )
+            return
         self.parametters = {}
         for name, param in self.PARAMETTERS.items():
             self.parametters[name] = param.init(
@@ -53,14 +128,50 @@ class Agent(MesaAgent):
     def set(self, param: str, value: Any):
         new_value = self.PARAMETTERS[param].set(value)
         if new_value is not None:
-            self.parametters[param] = new_value
+            self._store_parametter(param, new_value)
+
+    def _store_parametter(self, param: str, value: Any):
+        self.parametters[param] = value
 
     def do(self, action: str, **kwargs) -> Any:
         self.model.log(f"{self.__class__.__name__} DO {action}")
         return self.ACTIONS[action].apply(self, self.model, **kwargs)
 
+    @classmethod
+    def update_parametters(cls, agents: Sequence[Agent], model: Model):
+        """Update at once the parametters implementing `update_many` for all
+        the given agents of this class (called by the model before their
+        step).
+
+        Args:
+            agents: agents of this class.
+            model: main model.
+        """
+        if not agents:
+            return
+        for name, param in cls.PARAMETTERS.items():
+            if not param.vectorized:
+                continue
+            values = np.empty(len(agents), dtype=object)
+            values[:] = [agent.get(name) for agent in agents]
+            updated = param.update_many(values, model, agents)
+            if updated is not None:
+                changed = [(a, v) for a, v in zip(agents, updated) if v]
+                for agent, value in changed:
+                    Agent.set(agent, name, value)
+                cls._parametter_updated(model, name, changed)
+
+    @classmethod
+    def _parametter_updated(cls, model: Model, name: str, changed: Sequence):
+        """Called after a bulk update with the (agent, value) pairs that
+        changed."""
+        pass
+
     def step(self):
         for p, v in self.parametters.items():
+            # Vectorized parametters are updated by the model
+            if self.PARAMETTERS[p].vectorized:
+                continue
             # Update dynamic parametters
             updated_param = self.PARAMETTERS[p].update(self, self.model, v)
             if updated_param:
@@ -91,6 +202,20 @@ class Parametter(Generic[T]):
     def update(self, agent: Agent, model: Model, old: T):
         pass
 
+    # Vectorized version of `update`: define
+    # `update_many(self, values, model, agents) -> Optional[np.ndarray]` to
+    # update the parametter of all the agents of a class at once, from the
+    # current values (one per agent, in the order of `agents`). It returns the
+    # new values or None if nothing changed.
+    update_many: Optional[
+        Callable[[np.ndarray, Model, Sequence[Agent]], Optional[np.ndarray]]
+    ] = None
+
+    @property
+    def vectorized(self) -> bool:
+        """True if the parametter implements `update_many`."""
+        return self.update_many is not None
+
 
 class BehaviourRule:
     def __init__(self, **kwargs):
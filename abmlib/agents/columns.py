@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Type
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+from geopandas.array import GeometryArray
+
+if TYPE_CHECKING:
+    from geopandas.sindex import SpatialIndex
+    from .geo import GeoAgent
+
+__all__ = ["AgentColumns"]
+
+
+class AgentColumns:
+    """Struct-of-arrays storage for all the agents of one class.
+
+    Agents, ids, geometries and exported parametters are kept in NumPy arrays
+    that are updated in place when agents are added, removed or changed. The
+    arrays returned by this class are zero-copy views: to keep them valid, the
+    buffers are copied on the first in-place write that follows a view
+    creation (appending never needs this copy).
+
+    Args:
+        agent_class: class of the stored agents.
+        crs: CRS of the stored geometries.
+        capacity: initial number of preallocated rows.
+    """
+
+    def __init__(
+        self,
+        agent_class: Type[GeoAgent],
+        crs: Optional[str] = None,
+        capacity: int = 64,
+    ):
+        self.agent_class = agent_class
+        self.crs = crs
+        self.version = 0
+        """Incremented when an agent is added, removed or moved."""
+        self.parametters_version = 0
+        """Incremented when an exported parametter changes."""
+        self._size = 0
+        self._rows: Dict[int, int] = {}
+        self._agents = np.empty(capacity, dtype=object)
+        self._ids = np.empty(capacity, dtype=object)
+        self._geometries = np.empty(capacity, dtype=object)
+        self._parametters = {
+            name: np.empty(capacity, dtype=object)
+            for name in agent_class.EXPORTED_PARAMETTERS
+        }
+        # True when a view on the current buffers has been handed out
+        self._shared = False
+        self._geoseries: Optional[gpd.GeoSeries] = None
+        self._gdf: Optional[gpd.GeoDataFrame] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, agent: GeoAgent) -> bool:
+        return id(agent) in self._rows
+
+    def _buffers(self):
+        yield "_agents", self._agents
+        yield "_ids", self._ids
+        yield "_geometries", self._geometries
+
+    def _grow(self):
+        capacity = max(2 * len(self._agents), 1)
+        for attr, buffer in self._buffers():
+            new = np.empty(capacity, dtype=object)
+            new[: self._size] = buffer[: self._size]
+            setattr(self, attr, new)
+        for name, buffer in self._parametters.items():
+            new = np.empty(capacity, dtype=object)
+            new[: self._size] = buffer[: self._size]
+            self._parametters[name] = new
+        # old buffers still back the previous views
+        self._shared = False
+
+    def _detach(self):
+        """Copy the buffers before an in-place write if they are shared."""
+        if self._shared:
+            for attr, buffer in self._buffers():
+                setattr(self, attr, buffer.copy())
+            for name, buffer in self._parametters.items():
+                self._parametters[name] = buffer.copy()
+            self._shared = False
+
+    def _changed(self, geometry: bool = True):
+        if geometry:
+            self.version += 1
+            self._geoseries = None
+        else:
+            self.parametters_version += 1
+        self._gdf = None
+
+    def _view(self, buffer: np.ndarray) -> np.ndarray:
+        self._shared = True
+        return buffer[: self._size]
+
+    def add(self, agent: GeoAgent):
+        """Append an agent at the end of the arrays."""
+        if id(agent) in self._rows:
+            return
+        if self._size == len(self._agents):
+            self._grow()
+        row = self._size
+        self._agents[row] = agent
+        self._ids[row] = agent.unique_id
+        self._geometries[row] = agent.geometry
+        for name, buffer in self._parametters.items():
+            buffer[row] = agent.get(name)
+        self._rows[id(agent)] = row
+        self._size += 1
+        self._changed()
+
+    def remove(self, agent: GeoAgent):
+        """Remove an agent, the last row is moved to fill the gap."""
+        row = self._rows.pop(id(agent), None)
+        if row is None:
+            return
+        self._detach()
+        last = self._size - 1
+        if row != last:
+            for _, buffer in self._buffers():
+                buffer[row] = buffer[last]
+            for buffer in self._parametters.values():
+                buffer[row] = buffer[last]
+            self._rows[id(self._agents[row])] = row
+        for _, buffer in self._buffers():
+            buffer[last] = None
+        for buffer in self._parametters.values():
+            buffer[last] = None
+        self._size = last
+        self._changed()
+
+    def update_geometry(self, agent: GeoAgent):
+        """Copy the current geometry of an agent into the geometry array."""
+        row = self._rows.get(id(agent))
+        if row is not None:
+            self._detach()
+            self._geometries[row] = agent.geometry
+            self._changed()
+
+    def update_parametter(self, agent: GeoAgent, name: str, value: Any):
+        """Copy the new value of an exported parametter into its column."""
+        row = self._rows.get(id(agent))
+        if row is not None and name in self._parametters:
+            self._detach()
+            self._parametters[name][row] = value
+            self._changed(geometry=False)
+
+    def update_parametters(self, name: str, changed: Sequence[Tuple[GeoAgent, Any]]):
+        """Bulk version of `update_parametter`.
+
+        Args:
+            name: exported parametter's name.
+            changed: (agent, new value) pairs.
+        """
+        rows = [(self._rows.get(id(a)), v) for a, v in changed]
+        rows = [(r, v) for r, v in rows if r is not None]
+        if rows and name in self._parametters:
+            self._detach()
+            buffer = self._parametters[name]
+            for row, value in rows:
+                buffer[row] = value
+            self._changed(geometry=False)
+
+    @property
+    def agents(self) -> np.ndarray:
+        """View on the agents array."""
+        return self._view(self._agents)
+
+    @property
+    def ids(self) -> np.ndarray:
+        """View on the agents' unique ids."""
+        return self._view(self._ids)
+
+    @property
+    def geometries(self) -> np.ndarray:
+        """View on the agents' geometries."""
+        return self._view(self._geometries)
+
+    def parametter(self, name: str) -> np.ndarray:
+        """View on the values of an exported parametter."""
+        return self._view(self._parametters[name])
+
+    def mask(self, function: Callable[[Dict[str, Any]], bool]) -> np.ndarray:
+        """Evaluate a filter on the parametters of each agent.
+
+        Args:
+            function: takes the agent's parametters and returns a boolean.
+        """
+        return np.fromiter(
+            (function(agent.parametters) for agent in self._agents[: self._size]),
+            dtype=bool,
+            count=self._size,
+        )
+
+    @property
+    def geoseries(self) -> gpd.GeoSeries:
+        """Zero-copy GeoSeries of the geometries indexed by unique ids."""
+        if self._geoseries is None:
+            self._geoseries = gpd.GeoSeries(
+                GeometryArray(self.geometries, crs=self.crs),
+                index=pd.Index(self.ids, name="unique_id", copy=False),
+                copy=False,
+            )
+        return self._geoseries
+
+    @property
+    def sindex(self) -> SpatialIndex:
+        """Spatial index of the geometries, rebuilt only after a change."""
+        return self.geoseries.sindex
+
+    def as_GeoDataFrame(self) -> gpd.GeoDataFrame:
+        """GeoDataFrame of the geometries and the exported parametters."""
+        if self._gdf is None:
+            self._gdf = gpd.GeoDataFrame(
+                {
+                    **{
+                        name: self.parametter(name)
+                        for name in self.agent_class.EXPORTED_PARAMETTERS
+                    },
+                    "geometry": self.geoseries.values,
+                },
+                index=self.geoseries.index,
+                crs=self.crs,
+                copy=False,
+            )
+        return self._gdf
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 from typing import cast, TYPE_CHECKING
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Sequence
 
 if TYPE_CHECKING:
     from model import Model
@@ -20,6 +20,8 @@ __all__ = ["GeoAgent", "AgentCreator"]
 
 
 class GeoAgent(MesaGeoAgent, Agent):
+    COMPACT_SLOTS = ("_crs", "_geometry")
+
     def __init__(
         self,
         unique_id: Any,
@@ -44,11 +46,33 @@ class GeoAgent(MesaGeoAgent, Agent):
         """DEPRECATED"""
         return Agent.__setattr__(self, name, value)
 
+    @property
+    def geometry(self) -> Geometry:
+        return self._geometry
+
+    @geometry.setter
+    def geometry(self, geometry: Geometry):
+        self._geometry = geometry
+        # Keep the model's geometry arrays in sync
+        columns = self.model.columns.get(type(self))
+        if columns is not None:
+            columns.update_geometry(self)
+
     def get(self, param: str) -> Any:
         return Agent.get(self, param)
 
     def set(self, param: str, value: Any):
         Agent.set(self, param, value)
+        if param in self.EXPORTED_PARAMETTERS:
+            columns = self.model.columns.get(type(self))
+            if columns is not None:
+                columns.update_parametter(self, param, self.get(param))
+
+    @classmethod
+    def _parametter_updated(cls, model: Model, name: str, changed: Sequence):
+        columns = model.columns.get(cls)
+        if columns is not None and name in cls.EXPORTED_PARAMETTERS:
+            columns.update_parametters(name, changed)
 
     def do(self, action: str, **args) -> Any:
         return Agent.do(self, action, **args)
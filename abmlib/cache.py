@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+from typing import Any, Callable, Dict, Optional
+
+import os
+import json
+import sqlite3
+import hashlib
+import tempfile
+import numpy as np
+
+__all__ = ["ArrayCache", "EvaluationStore"]
+
+
+class ArrayCache:
+    """Persistent cache of NumPy arrays stored as `.npy` files in a directory.
+
+    Arrays are read as read-only memory maps so that all the processes using the
+    same directory share them. Files are written atomically (temporary file then
+    rename), concurrent writers of the same key are harmless.
+
+    Args:
+        directory: cache directory, created if needed.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Build a key from hashable parts (bytes, arrays or anything with a
+        stable `repr`)."""
+        digest = hashlib.sha1()
+        for part in parts:
+            if isinstance(part, np.ndarray):
+                part = np.ascontiguousarray(part).tobytes()
+            if not isinstance(part, bytes):
+                part = repr(part).encode()
+            digest.update(hashlib.sha1(part).digest())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npy")
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Memory mapped array stored under `key` or None."""
+        try:
+            return np.load(self._path(key), mmap_mode="r")
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, array: np.ndarray) -> np.ndarray:
+        """Store an array and returns it memory mapped."""
+        fd, tmp = tempfile.mkstemp(suffix=".npy", dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as file:
+                np.save(file, array)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            os.remove(tmp)
+            raise
+        return np.load(self._path(key), mmap_mode="r")
+
+    def get_or_compute(self, key: str, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        """Returns the array stored under `key`, compute and store it if missing."""
+        array = self.get(key)
+        if array is None:
+            array = self.put(key, compute())
+        return array
+
+
+class EvaluationStore:
+    """Persistent store of evaluation results (dictionaries of arrays) in a
+    SQLite database.
+
+    The database is in WAL mode so that the processes of a pool read it while
+    another one writes. Each process opens its own connection, the store is
+    pickled as its path. The first result stored under a key is kept.
+
+    Args:
+        path: database file, created if needed.
+        timeout: seconds to wait for a lock held by another process.
+    """
+
+    def __init__(self, path: str, timeout: float = 60.0):
+        self.path = str(path)
+        self.timeout = timeout
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Connection of the current process."""
+        if self._connection is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS evaluations"
+                " (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            connection.commit()
+            self._connection, self._pid = connection, os.getpid()
+        return self._connection
+
+    def get(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        """Result stored under `key` or None."""
+        row = self.connection.execute(
+            "SELECT value FROM evaluations WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {name: np.array(value) for name, value in json.loads(row[0]).items()}
+
+    def put(self, key: str, values: Dict[str, Any]):
+        """Store a result, ignored if `key` is already stored."""
+        value = json.dumps(
+            {name: np.asarray(v, dtype=float).tolist() for name, v in values.items()}
+        )
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO evaluations (key, value) VALUES (?, ?)",
+                (key, value),
+            )
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0]
+
+    def __getstate__(self):
+        return {"path": self.path, "timeout": self.timeout}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
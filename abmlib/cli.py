@@ -13,10 +13,10 @@ from .server import Server
 from .logger import Logger, NoLogger
 from .influences import render as infl_render
 
-from .measures.chamfer_distance import ChamferDistance, ChamferDistanceMacro
-from .measures.hausdorff_distance import HausdorffDistance
-from .measures.kernel_density_difference import KernelDensityDifference
-from .measures.density import GridDensityDifference
+from .measures.context import MeasureContext
+from .measures.density import RegularGrid
+from .measures.pipeline import MeasurePipeline
+from .learning.racing import ReplicateRace
 
 __all__ = ["create_cli"]
 
@@ -148,7 +148,7 @@ def init_generate_command(cli, models):
             # Only save GeoAgents
             if issubclass(a_class, GeoAgent):
                 objects = (
-                    model_instance.grid.get_agents_as_GeoDataFrame(a_class)
+                    model_instance.get_agents_as_GeoDataFrame(a_class)
                     # TODO parse parametters
                     .geometry
                 )
@@ -317,6 +317,13 @@ def init_validate_command(cli, models):
     @click.option(
         "--evaluation-nb",
         default=100,
+        help="evaluations of each solution (maximum with --min-evaluations)",
+    )
+    @click.option(
+        "--min-evaluations",
+        type=int,
+        default=None,
+        help="replicate racing: evaluations of each solution, more (up to --evaluation-nb) only while its confidence interval overlaps another solution",
     )
     @click.option(
         "--measures",
@@ -333,18 +340,11 @@ def init_validate_command(cli, models):
         learningresults,
         model_steps,
         evaluation_nb,
+        min_evaluations,
         measures,
     ):
         model = models[ctx.obj["MODEL"]]
 
-        AVAILABLE_MEASURES = [
-            ChamferDistance,
-            ChamferDistanceMacro,
-            HausdorffDistance,
-            KernelDensityDifference,
-            GridDensityDifference,
-        ]
-
         def get_layer_data(model_instance, layer: str):
             match_gen = (
                 a_class
@@ -356,7 +356,7 @@ def init_validate_command(cli, models):
                 a_class = next(match_gen)
             except StopIteration:
                 raise Exception(f"Error: {layer} not found in {model.__name__}")
-            return model_instance.grid.get_agents_as_GeoDataFrame(a_class)
+            return model_instance.get_agents_as_GeoDataFrame(a_class)
 
         def run_model():
             # instanciate a model instance
@@ -369,46 +369,52 @@ def init_validate_command(cli, models):
             # extract generated objects
             return get_layer_data(model_instance, validation_layer)
 
-        def get_measure_classes(measures):
-            measures_names = measures.split(",")
-            return [
-                measure_class
-                for measure_class in AVAILABLE_MEASURES
-                if measure_class.__name__
-                in (
-                    # transform names in PascalCase to snake_case
-                    m.replace("_", " ").title().replace(" ", "")
-                    for m in measures_names
-                )
-            ]
-
-        def apply_measures(measures):
-            # evaluate using measures and compare with real data
-            res = []
-            for measure_class in measures:
-                res.append(
-                    measure_class()
-                    # compare with real data
-                    .apply_validation(generated_dataset, control_dataset)
-                )
-            return res
+        def create_pipeline(measures):
+            # validation side of the measures, computed once for all the runs
+            border = gpd.read_file(ctx.obj["CONFIG"]["border"]["file"])
+            context = MeasureContext(
+                control_dataset,
+                grid=RegularGrid.from_border(border, 100),
+            )
+            return MeasurePipeline(measures.split(","), context)
+
+        def save_results(i, results):
+            if not os.path.exists(output):
+                os.makedirs(output)
+            pd.DataFrame(results, columns=pipeline.names).to_csv(f"{output}/{i}.csv")
 
         param_sets, _ = read_params_from_result(learningresults)
-        enabled_measures = get_measure_classes(measures)
         control_dataset = gpd.read_file(validation_data, driver="GeoJSON")
+        pipeline = create_pipeline(measures)
+
+        if min_evaluations is not None:
+            # replicates go to the solutions that are not yet told apart
+            race = ReplicateRace(len(param_sets), min_evaluations, evaluation_nb)
+            results = [[] for _ in param_sets]
+            with tqdm(desc="racing") as progress:
+                pending = race.pending()
+                while len(pending):
+                    for i in pending:
+                        infl_param = param_sets[i]
+                        values = pipeline.evaluate(run_model())
+                        results[i].append(values)
+                        race.add(i, values.to_numpy())
+                        progress.update()
+                    pending = race.pending()
+            for i, solution_results in enumerate(results):
+                save_results(i, solution_results)
+            return
 
         # for each influence set found by the AG
         for i, infl_param in tqdm(enumerate(param_sets)):
-            results = np.empty((evaluation_nb, len(enabled_measures)))
+            results = []
             # run the model `evaluation_nb`th
             for j in tqdm(range(evaluation_nb), desc=f"solution {i}:"):
                 generated_dataset = run_model()
-                results[j] = apply_measures(enabled_measures)
+                # evaluate using measures and compare with real data
+                results.append(pipeline.evaluate(generated_dataset))
 
-            # save results
-            if not os.path.exists(output):
-                os.makedirs(output)
-            pd.DataFrame(results).to_csv(f"{output}/{i}.csv")
+            save_results(i, results)
 
 
 def create_cli(
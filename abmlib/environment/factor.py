@@ -1,9 +1,9 @@
 # -*- coding: utf-8 -*-
-from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 import re
-from collections import OrderedDict
 
 __all__ = ["Factor"]
 
@@ -35,88 +35,86 @@ class Factor:
             data = pd.read_csv(path, index_col=index, **csv_options)
             self._data[year] = data[probabilities]
 
-        # make extrapolations
-        self._lines = {}
+        # make extrapolations, each interval of years is described by the
+        # coefficients of one line per index value (value = a * year + b)
+        first_dataset = next(iter(self._data.values()))
+        self._index = first_dataset.index
+        self._name = first_dataset.name
+        self._dtype = first_dataset.dtype
+        self._intervals: List[Tuple[float, float, np.ndarray, np.ndarray]] = []
         years = list(self._data.keys())
         if len(years) == 1:
             # there is only one dataset
-            data_0 = self._data[years[0]]
-            time = (-float("inf"), float("inf"))
-            self._lines[time] = OrderedDict()
-            for i in data_0.index:
-                self._lines[time][i] = self._make_constant(data_0[i])
+            self._add_constant((-float("inf"), float("inf")), self._data[years[0]])
         else:
             # make constant before first year
-            data_0 = self._data[years[0]]
-            time = (-float("inf"), int(years[0]))
-            self._lines[time] = OrderedDict()
-            for i in data_0.index:
-                self._lines[time][i] = self._make_constant(data_0[i])
+            self._add_constant((-float("inf"), int(years[0])), self._data[years[0]])
             # make lines between intermediates years
             for d in range(len(years) - 1):
-                data_d = self._data[years[d]]
-                data_next = self._data[years[d + 1]]
-                time = (int(years[d]), int(years[d + 1]))
-                self._lines[time] = OrderedDict()
-                for i in data_d.index:
-                    self._lines[time][i] = self._make_line(
-                        (time[0], data_d[i]),
-                        (time[1], data_next[i]),
-                    )
+                self._add_line(
+                    (int(years[d]), int(years[d + 1])),
+                    self._data[years[d]],
+                    self._data[years[d + 1]],
+                )
             # make constant after last year
-            data_l = self._data[years[-1]]
-            time = (int(years[-1]), float("inf"))
-            self._lines[time] = OrderedDict()
-            for i in data_l.index:
-                self._lines[time][i] = self._make_constant(data_l[i])
+            self._add_constant((int(years[-1]), float("inf")), self._data[years[-1]])
+
+        # memoized distributions, alias tables and parsed index values
+        self._years_data: Dict[int, pd.Series] = {}
+        self._alias_tables: Dict[Tuple, Tuple[np.ndarray, np.ndarray]] = {}
+        self._parsed_index: Dict[str, List[Any]] = {}
 
-    def _make_constant(self, value) -> Callable[[float], float]:
-        """Create a constant function from a given value.
+    def _values(self, data: pd.Series) -> np.ndarray:
+        return data.loc[self._index].to_numpy(dtype=float)
+
+    def _add_constant(self, time: Tuple[float, float], data: pd.Series):
+        """Add a constant interval.
 
         Args:
-            value: the constant value.
+            time: interval of years.
+            data: the constant values.
         """
-        return lambda _: value
+        values = self._values(data)
+        self._intervals.append((*time, np.zeros_like(values), values))
 
-    def _make_line(
-        self, point_a: Tuple[float, float], point_b: Tuple[float, float]
-    ) -> Callable[[float], float]:
-        """Create a linear function between two given points.
+    def _add_line(self, time: Tuple[int, int], data_a: pd.Series, data_b: pd.Series):
+        """Add a linear interval between two datasets.
 
         Args:
-            point_a: starting point.
-            point_b: ending point.
+            time: interval of years.
+            data_a: values at the starting year.
+            data_b: values at the ending year.
         """
-        a = (point_b[1] - point_a[1]) / (point_b[0] - point_a[0])
-        b = -(a * point_b[0]) + point_b[1]
-        return lambda x: a * x + b
+        values_a, values_b = self._values(data_a), self._values(data_b)
+        a = (values_b - values_a) / (time[1] - time[0])
+        b = -(a * time[1]) + values_b
+        self._intervals.append((*time, a, b))
 
     def get_data(self, year: int) -> pd.Series:
         """Get data for a given year, this function uses the precomputed
-        extrapolations function.
+        extrapolations coefficients. Results are memoized, they must not be
+        modified.
 
         Args:
             year: year of the wanted dataset.
         """
-        interval = None
-        # Find interval
-        for years, lines in self._lines.items():
-            inf, sup = years
-            if inf <= year <= sup:
-                interval = lines
-                break
-        # Return values
-        if interval is not None:
-            first_dataset = next(iter(self._data.values()))
-            return pd.Series(
-                [interval[i](year) for i in first_dataset.index],
-                index=first_dataset.index,
-                name=first_dataset.name,
-                dtype=first_dataset.dtype,
+        if year not in self._years_data:
+            # Find interval
+            interval = next(
+                ((a, b) for inf, sup, a, b in self._intervals if inf <= year <= sup),
+                None,
             )
-        else:
-            # TODO refactor the code to get rid of it.
-            raise Exception("This exception should be unreachable.")
+            if interval is None:
+                # TODO refactor the code to get rid of it.
+                raise Exception("This exception should be unreachable.")
+            a, b = interval
+            self._years_data[year] = pd.Series(
+                a * year + b,
+                index=self._index,
+                name=self._name,
+                dtype=self._dtype,
+            )
+        return self._years_data[year]
 
     def get_prob(self, year: int, value: Any) -> float:
         """Get the probability for a value at a given date.
@@ -125,16 +123,7 @@ class Factor:
             year: year for the wanted probability.
             value: value of the index in the dataset.
         """
-        interval = None
-        for years, lines in self._lines.items():
-            inf, sup = years
-            if inf <= year <= sup:
-                interval = lines
-        if interval is not None:
-            return interval[value](year)
-        else:
-            # TODO refactor the code to get rid of it.
-            raise Exception("This exception should be unreachable.")
+        return self.get_data(year)[value]
 
     def roulette_wheel(
         self,
@@ -160,8 +149,81 @@ class Factor:
         if result_pattern == "NULL":
             return res
         else:
-            pattern = re.compile(result_pattern)
-            regex_res = pattern.findall(res)
-            if regex_res is not None:
+            regex_res = re.findall(result_pattern, res)
+            if regex_res:
                 return regex_res[0]
             raise Exception("`{}` doesnt match `{}`".format(result_pattern, res))
+
+    @staticmethod
+    def _make_alias_table(weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Build a Vose alias table from (non normalized) weights.
+
+        Returns: the probability to keep each drawn column and its alias.
+        """
+        weights = np.nan_to_num(np.asarray(weights, dtype=float))
+        if (weights < 0).any() or weights.sum() <= 0:
+            raise ValueError(f"Invalid weights: {weights}")
+        n = len(weights)
+        scaled = weights * n / weights.sum()
+        prob = np.ones(n)
+        alias = np.arange(n)
+        small = [i for i in range(n) if scaled[i] < 1]
+        large = [i for i in range(n) if scaled[i] >= 1]
+        while small and large:
+            s, g = small.pop(), large.pop()
+            prob[s] = scaled[s]
+            alias[s] = g
+            scaled[g] = scaled[g] + scaled[s] - 1
+            (small if scaled[g] < 1 else large).append(g)
+        return prob, alias
+
+    def _parse_index(self, result_pattern: str) -> List[Any]:
+        """Matches of the pattern for each index value (None if no match)."""
+        if result_pattern not in self._parsed_index:
+            pattern = re.compile(result_pattern)
+            self._parsed_index[result_pattern] = [
+                next(iter(pattern.findall(value)), None) for value in self._index
+            ]
+        return self._parsed_index[result_pattern]
+
+    def draw(
+        self,
+        year: int,
+        n: Optional[int] = None,
+        result_pattern: str = "NULL",
+        index_range: Optional[Tuple[int, int]] = None,
+    ) -> Any | Sequence[Any]:
+        """Same as `roulette_wheel` on the data of a year, but with an alias
+        table built once per year: each sample costs O(1).
+
+        Args:
+            year: year of the dataset.
+            n: number of samples, a single value is returned if None.
+            result_pattern: Regex pattern to parse the result column.
+            index_range: A range to limit the inputs.
+        """
+        if index_range:
+            assert index_range[0] <= index_range[1], f"{index_range} not valid"
+            start, stop = index_range
+        else:
+            start, stop = 0, len(self._index)
+        key = (year, start, stop)
+        if key not in self._alias_tables:
+            weights = self.get_data(year).to_numpy()[start:stop]
+            self._alias_tables[key] = self._make_alias_table(weights)
+        prob, alias = self._alias_tables[key]
+        # numpy's global random state, like `roulette_wheel`
+        columns = np.random.randint(0, len(prob), 1 if n is None else n)
+        keep = np.random.random_sample(len(columns)) < prob[columns]
+        drawn = np.where(keep, columns, alias[columns]) + start
+        if result_pattern == "NULL":
+            res = self._index.values[drawn]
+        else:
+            parsed = self._parse_index(result_pattern)
+            res = [parsed[i] for i in drawn]
+            for i, value in zip(drawn, res):
+                if value is None:
+                    raise Exception(
+                        "`{}` doesnt match `{}`".format(result_pattern, self._index[i])
+                    )
+        return res[0] if n is None else res
@@ -1,13 +1,19 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
+from typing import TYPE_CHECKING
 from typing import Optional
-from typing import Tuple, Generator
+from typing import Tuple
 
+import os
+import numpy as np
 import rasterio as rio
 import rioxarray as rxr
 
-from math import pi, atan
-from shapely import MultiPolygon, Polygon, Point
+from math import pi, atan, sqrt
+from shapely import MultiPolygon, Polygon, Point, get_coordinates
+
+if TYPE_CHECKING:
+    from ..cache import ArrayCache
 
 # from shapely import minimum_rotated_rectangle
 # from shapely.geometry import mapping
@@ -17,18 +23,64 @@ __all__ = ["Raster"]
 
 
 class Raster:
-    def __init__(self, file: str, undefined_value: float, crs: Optional[str] = None):
+    def __init__(
+        self,
+        file: str,
+        undefined_value: float,
+        crs: Optional[str] = None,
+        cache: Optional[ArrayCache] = None,
+    ):
+        """Elevation raster.
+
+        Args:
+            file: raster file.
+            undefined_value: value used for undefined cells.
+            crs: model's CRS, the raster is reprojected to it.
+            cache: if given, the reprojected raster is stored in it and read
+                from it by the next instances.
+        """
+        if cache is None:
+            data, meta = self._load(file, crs)
+        else:
+            stat = os.stat(file)
+            key = cache.make_key(
+                "raster", os.path.abspath(file), stat.st_mtime_ns, stat.st_size, crs
+            )
+            data, meta = cache.get(key), cache.get(f"{key}_meta")
+            if data is None or meta is None:
+                data, meta = self._load(file, crs)
+                meta = cache.put(f"{key}_meta", meta)
+                data = cache.put(key, data)
+
+        self.data = data
+        left, right, bottom, top, fill_value, is_area = meta.tolist()
+        self.bounds = {"left": left, "right": right, "bottom": bottom, "top": top}
+        self.transform = self.make_transform(self.bounds, self.matrix_size)
+        self._undefined_value = fill_value
+        self._area_or_point = "Area" if is_area else "Point"
+
+    @classmethod
+    def _load(cls, file: str, crs: Optional[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Read and reproject the raster, returns its data and metadata."""
         raster = rxr.open_rasterio(file).squeeze()
 
         # reproject to model's CRS
         if crs is not None:
             raster = raster.rio.reproject(crs)
 
-        self.data = raster.to_numpy()
-        self.bounds = self.make_bounds(raster)
-        self.transform = self.make_transform(self.bounds, self.matrix_size)
-        self._undefined_value = raster.attrs["_FillValue"]
-        self._area_or_point = raster.attrs["AREA_OR_POINT"]
+        bounds = cls.make_bounds(raster)
+        meta = np.array(
+            [
+                bounds["left"],
+                bounds["right"],
+                bounds["bottom"],
+                bounds["top"],
+                raster.attrs["_FillValue"],
+                raster.attrs["AREA_OR_POINT"] == "Area",
+            ],
+            dtype=float,
+        )
+        return raster.to_numpy(), meta
 
     @staticmethod
     def make_bounds(raster):
@@ -117,42 +169,50 @@ class Raster:
         else:
             return value
 
-    def _get_polygon_points(self, shape: Polygon) -> Generator[Point, None, None]:
-        for point in (Point(*coords) for coords in shape.exterior.coords[:-1]):
-            yield point
-        yield Point(*shape.centroid.coords[:])
-
-    def _get_min_elevation(self, shape: Polygon) -> Tuple[Point, float] | None:
-        min_point = None
-        min_value = float("inf")
-        for p in self._get_polygon_points(shape):
-            p_value = self.get_value(p)
-            if p_value is not None:
-                if p_value < min_value:
-                    min_point = p
-                    min_value = p_value
-            else:
-                return None
-        if min_point:
-            return min_point, min_value
-        else:
-            return None
+    def get_values(self, coords: np.ndarray) -> np.ndarray | None:
+        """Vectorized version of `get_value`, returns None if one of the points
+        is not defined.
 
-    def _get_max_elevation(self, shape: Polygon) -> Tuple[Point, float] | None:
-        max_point = None
-        max_value = float("-inf")
-        for p in self._get_polygon_points(shape):
-            p_value = self.get_value(p)
-            if p_value is not None:
-                if p_value > max_value:
-                    max_point = p
-                    max_value = p_value
-            else:
-                return None
-        if max_point:
-            return max_point, max_value
+        Args:
+            coords: array of GPS coordinates (one point per row).
+        """
+        x, y = coords[:, 0], coords[:, 1]
+        inside = (
+            (self.bounds["left"] <= x)
+            & (x <= self.bounds["right"])
+            & (self.bounds["bottom"] <= y)
+            & (y <= self.bounds["top"])
+        )
+        if self._area_or_point == "Area":
+            resolution_x, resolution_y = self.resolution
+            res = ~self.transform * (x - resolution_x / 2, y - resolution_y / 2)
         else:
+            res = ~self.transform * (x, y)
+        rows = np.rint(res[0]).astype(int)
+        cols = np.rint(res[1]).astype(int)
+        height, width = self.data.shape
+        indexable = (
+            (-height <= rows) & (rows < height) & (-width <= cols) & (cols < width)
+        )
+        values = np.full(len(coords), self._undefined_value, dtype=self.data.dtype)
+        values[indexable] = self.data[rows[indexable], cols[indexable]]
+        # points are checked in order like with `get_value`
+        invalid = ~inside | ~indexable | (values == self._undefined_value)
+        if invalid.any():
+            first = invalid.argmax()
+            if inside[first] and not indexable[first]:
+                raise Exception(
+                    f"{Point(coords[first])} | {rows[first], cols[first]} not in "
+                    f"{self.matrix_size}"
+                )
             return None
+        return values
+
+    def _get_polygon_coords(self, shape: Polygon) -> np.ndarray:
+        """Vertices and centroid of a polygon."""
+        return np.vstack(
+            [get_coordinates(shape.exterior)[:-1], get_coordinates(shape.centroid)]
+        )
 
     def _get_max_length(self, shape: Polygon) -> float:
         bbox = shape.bounds
@@ -168,18 +228,22 @@ class Raster:
             shape: a building's shape
         """
         if isinstance(shape, Polygon):
-            min_elevation = self._get_min_elevation(shape)
-            max_elevation = self._get_max_elevation(shape)
-            if min_elevation and max_elevation:
-                min_p, min_el = min_elevation
-                max_p, max_el = max_elevation
-                distance = min_p.distance(max_p)
-                if distance == 0:
-                    return 0
-                else:
-                    return atan((max_el - min_el) / distance)
-            else:
+            coords = self._get_polygon_coords(shape)
+            values = self.get_values(coords)
+            if values is None:
+                return None
+            # undefined comparisons (NaN) are ignored
+            defined = ~np.isnan(values)
+            if not defined.any():
                 return None
+            coords, values = coords[defined], values[defined]
+            i_min, i_max = values.argmin(), values.argmax()
+            dx, dy = (coords[i_max] - coords[i_min]).tolist()
+            distance = sqrt(dx * dx + dy * dy)
+            if distance == 0:
+                return 0
+            else:
+                return atan((values[i_max] - values[i_min]) / distance)
         elif isinstance(shape, MultiPolygon):
             max_slope = float("-inf")
             for sub_p in shape.geoms:
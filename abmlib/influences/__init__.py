@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from .gradient import Gradient
+from .distance_field import DistanceField
 from .base import (
     Influence,
     DistanceInfluence,
@@ -10,6 +11,7 @@ from .base import (
 
 __all__ = [
     "Gradient",
+    "DistanceField",
     "Influence",
     "DistanceInfluence",
     "DistanceInfluenceGPD",
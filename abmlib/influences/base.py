@@ -1,15 +1,17 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
-from typing import cast, TYPE_CHECKING
-from typing import Callable, Dict, List, Generator
+from typing import TYPE_CHECKING
+from typing import Any, Callable, Dict, List, Generator, Optional, Sequence, Tuple
 
 from abc import abstractmethod
-from geopandas import GeoDataFrame
+import numpy as np
 from mesa_geo import GeoAgent
+from shapely import get_coordinates
 from shapely import speedups
 from shapely.strtree import STRtree
 from shapely.affinity import translate
 from shapely.geometry import MultiLineString, MultiPoint, MultiPolygon
+from .distance_field import DistanceField
 
 if TYPE_CHECKING:
     from model import Model
@@ -34,16 +36,37 @@ class Influence:
         self._model = model
         self._function = function
         self._weight = weight
+        self._versions: Optional[Tuple[int, ...]] = None
 
     @property
     def weight(self) -> float:
         """Returns the influence weight used when all influences are summed."""
         return self._weight
 
+    @property
+    def dependencies(self) -> Optional[Sequence[Any]]:
+        """Agent classes and raster names this influence is computed from.
+        None if unknown, then the influence is reset every time."""
+        return None
+
+    def versions(self) -> Optional[Tuple[int, ...]]:
+        """Current versions of the dependencies (see `Model.get_version`)."""
+        if self.dependencies is None:
+            return None
+        return tuple(self._model.get_version(d) for d in self.dependencies)
+
     def reset(self):
         """Reset this influence, commonly called at the end of a timestep."""
         pass
 
+    def refresh(self):
+        """Reset this influence only if one of its dependencies changed since
+        the last reset."""
+        versions = self.versions()
+        if versions is None or versions != self._versions:
+            self.reset()
+            self._versions = versions
+
     @abstractmethod
     def get(self, obs: Dict, point: Point) -> float:
         pass
@@ -123,30 +146,108 @@ class DistanceInfluenceGPD(Influence):
         target: Dict,  # TODO Type
         function: Callable[[float], float],
         weight: float,
+        field_resolution: float = 2.0,
+        field_padding: float = 100.0,
     ):
+        """Distance influence based on geopandas spatial indexes.
+
+        When the model has a cache and the function is constant outside of
+        an interval (`saturation` attribute), a distance field of the targets
+        is used to skip the exact distance computation where the function is
+        constant. The field is shared between all models through the cache
+        and used as long as the targets are the ones of the influence creation:
+        it is not updated, so an influence whose targets change during the
+        simulation (e.g. towards dwellings) only uses it until the first change.
+
+        Args:
+            model: a reference to the model.
+            target: agent class ("agent_class") and optional "filter" on the
+                parametters of the targets.
+            function: a function that take a distance as input and return a float
+                between -1 and 1.
+            weight: this influence weight used when all influences are summed.
+            field_resolution: cell size of the distance field.
+            field_padding: margin added around the model's bounds by the
+                distance field.
+        """
         super().__init__(model, function, weight)
         self._target = target
         self._sindex = None
+        self._field = None
+        self._field_resolution = field_resolution
+        self._field_padding = field_padding
+        self._static_versions = self.versions()
+        self._shape = None
+        self._radius = 0.0
 
     def reset(self):
         self._sindex = None
+        self._field = None
+
+    @property
+    def dependencies(self) -> Optional[Sequence[Any]]:
+        return (self._target["agent_class"],)
+
+    def versions(self) -> Optional[Tuple[int, ...]]:
+        versions = super().versions()
+        if self._target.get("filter") is not None:
+            # the filter reads the agents' parametters
+            columns = self._model.get_columns(self._target["agent_class"])
+            versions += (columns.parametters_version,)
+        return versions
 
     @property
     def sindex(self):
         if self._sindex is None:
-            model_grid = self._model.grid
-            target_class = self._target["agent_class"]
-            target_gdf = model_grid.get_agents_as_GeoDataFrame(target_class)
+            columns = self._model.get_columns(self._target["agent_class"])
             target_filter = self._target.get("filter")
-            if target_filter is not None:
-                target_gdf = cast(
-                    GeoDataFrame,
-                    target_gdf[target_gdf.parametters.apply(target_filter)],
-                )
-            self._sindex = target_gdf.sindex
+            if target_filter is None:
+                self._sindex = columns.sindex
+            else:
+                self._sindex = columns.geoseries[columns.mask(target_filter)].sindex
         return self._sindex
 
+    @property
+    def field(self) -> DistanceField | None:
+        if self._field is None and self._static_versions is not None:
+            if self._model.cache is None or self.versions() != self._static_versions:
+                # targets changed, the field won't be valid anymore
+                self._static_versions = None
+                return None
+            columns = self._model.get_columns(self._target["agent_class"])
+            geometries = columns.geometries
+            target_filter = self._target.get("filter")
+            if target_filter is not None:
+                geometries = geometries[columns.mask(target_filter)]
+            xmin, ymin, xmax, ymax = self._model.border.bounds
+            padding = self._field_padding
+            self._field = DistanceField.cached(
+                self._model.cache,
+                geometries,
+                (xmin - padding, ymin - padding, xmax + padding, ymax + padding),
+                self._field_resolution,
+            )
+        return self._field
+
+    def _get_radius(self, shape: Geometry) -> float:
+        """Maximum distance between the origin and the shape."""
+        if shape is not self._shape:
+            coords = get_coordinates(shape)
+            self._shape = shape
+            self._radius = float(np.sqrt((coords**2).sum(axis=1)).max())
+        return self._radius
+
     def get(self, obs: Dict, point: Point) -> float:
+        saturation = getattr(self._function, "saturation", None)
+        if saturation is not None and self.field is not None:
+            bounds = self.field.bounds(
+                point.x, point.y, self._get_radius(obs["shape"])
+            )
+            # the function is constant on the whole interval
+            if bounds is not None and bounds[1] < saturation[0]:
+                return self._function(bounds[1])
+            if bounds is not None and bounds[0] >= saturation[1]:
+                return self._function(bounds[0])
         shape = translate(obs["shape"], *point.coords[0])
         nearest_obj = self.sindex.geometries[self.sindex.nearest(shape)[1][0]]
         return self._function(shape.distance(nearest_obj))
@@ -165,8 +266,16 @@ class SlopeInfluence(Influence):
         raster: str,
     ):
         super().__init__(model, function, weight)
+        self._raster_name = raster
         self._raster = model.rasters[raster]
 
+    @property
+    def dependencies(self) -> Optional[Sequence[Any]]:
+        return (self._raster_name,)
+
+    def reset(self):
+        self._raster = self._model.rasters[self._raster_name]
+
     def get(self, obs: Dict, point: Point) -> float:
         """Get the influence value for a given point in the space.
 
@@ -193,8 +302,16 @@ class SlopeInfluenceE(Influence):
         raster: str,
     ):
         super().__init__(model, function, weight)
+        self._raster_name = raster
         self._raster = model.rasters[raster]
 
+    @property
+    def dependencies(self) -> Optional[Sequence[Any]]:
+        return (self._raster_name,)
+
+    def reset(self):
+        self._raster = self._model.rasters[self._raster_name]
+
     def get(self, obs: Dict, point: Point) -> float:
         shape = translate(obs["shape"], *point.coords[0])
         slope = self._raster.get_slope_estimation(shape)
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from typing import Optional, Tuple
+
+from math import floor, sqrt
+import numpy as np
+import shapely
+from affine import Affine
+from rasterio import features
+from scipy import ndimage
+
+if TYPE_CHECKING:
+    from ..cache import ArrayCache
+
+__all__ = ["DistanceField"]
+
+
+class DistanceField:
+    """Distances from the centres of a regular grid to the nearest cell touched
+    by a layer.
+
+    The field bounds the distance between a footprint and the layer without
+    querying the layer. With `h` the half diagonal of a cell, the distance from
+    a cell centre to the layer lies in `[min(v - h, e), v + h]` where `v` is the
+    cell value and `e` the distance to the grid edges (the layer can be outside
+    of the grid). A footprint contained in a circle of radius `r` around a point
+    of the cell adds `h + r` on both sides.
+
+    Args:
+        values: distances, one row per y and one column per x.
+        origin: coordinates of the centre of the first cell.
+        resolution: size of the cells.
+    """
+
+    def __init__(
+        self,
+        values: np.ndarray,
+        origin: Tuple[float, float],
+        resolution: float,
+    ):
+        self.values = values
+        self.origin = origin
+        self.resolution = resolution
+        self._half_diagonal = resolution * sqrt(2) / 2
+
+    @staticmethod
+    def make_grid(
+        bounds: Tuple[float, float, float, float],
+        resolution: float,
+    ) -> Tuple[Tuple[float, float], Tuple[int, int]]:
+        """Origin and shape (rows, columns) of a grid covering the bounds."""
+        xmin, ymin, xmax, ymax = bounds
+        shape = (
+            int(np.ceil((ymax - ymin) / resolution)) + 1,
+            int(np.ceil((xmax - xmin) / resolution)) + 1,
+        )
+        return (xmin, ymin), shape
+
+    @classmethod
+    def compute(
+        cls,
+        geometries: np.ndarray,
+        bounds: Tuple[float, float, float, float],
+        resolution: float,
+    ) -> DistanceField:
+        """Compute the field of a layer over the given bounds.
+
+        Args:
+            geometries: geometries of the layer.
+            bounds: (xmin, ymin, xmax, ymax) covered by the field.
+            resolution: size of the cells.
+        """
+        origin, shape = cls.make_grid(bounds, resolution)
+        touched = np.zeros(shape, dtype="uint8")
+        if len(geometries):
+            transform = Affine(
+                resolution,
+                0,
+                origin[0] - resolution / 2,
+                0,
+                resolution,
+                origin[1] - resolution / 2,
+            )
+            touched = features.rasterize(
+                ((geometry, 1) for geometry in geometries),
+                out_shape=shape,
+                transform=transform,
+                all_touched=True,
+                fill=0,
+                dtype="uint8",
+            )
+        if touched.any():
+            values = ndimage.distance_transform_edt(touched == 0) * resolution
+        else:
+            values = np.full(shape, np.inf)
+        return cls(values, origin, resolution)
+
+    @classmethod
+    def cached(
+        cls,
+        cache: ArrayCache,
+        geometries: np.ndarray,
+        bounds: Tuple[float, float, float, float],
+        resolution: float,
+    ) -> DistanceField:
+        """Same as `compute` but the field is read from the cache when a layer
+        with the same geometries has already been computed."""
+        key = cache.make_key(
+            "distance_field",
+            b"".join(shapely.to_wkb(geometries)),
+            tuple(bounds),
+            resolution,
+        )
+        values = cache.get_or_compute(
+            key, lambda: cls.compute(geometries, bounds, resolution).values
+        )
+        return cls(values, cls.make_grid(bounds, resolution)[0], resolution)
+
+    def bounds(
+        self, x: float, y: float, radius: float
+    ) -> Optional[Tuple[float, float]]:
+        """Lower and upper bounds of the distance between the layer and a
+        footprint centred on (x, y), or None if outside of the field.
+
+        Args:
+            x: footprint's centre.
+            y: footprint's centre.
+            radius: maximum distance between the centre and the footprint.
+        """
+        rows, cols = self.values.shape
+        i = floor((y - self.origin[1]) / self.resolution + 0.5)
+        j = floor((x - self.origin[0]) / self.resolution + 0.5)
+        if not (0 <= i < rows and 0 <= j < cols):
+            return None
+        h = self._half_diagonal
+        distance = float(self.values[i, j])
+        # distance between the cell centre and the grid edges
+        edge = self.resolution * (min(i, j, rows - 1 - i, cols - 1 - j) + 0.5)
+        low = min(distance - h, edge) - h - radius
+        high = distance + 2 * h + radius
+        return max(low, 0.0), high
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 from typing import Callable
 
-from .utils import InvalidInfluenceFunction, tanh_y
+from .utils import InvalidInfluenceFunction, saturated, tanh_y
 
 
 def make_balance(
@@ -22,6 +22,7 @@ def make_balance(
     if not l_min <= l_zero <= l_max:
         raise InvalidInfluenceFunction("Parameters are not in ascending order.")
 
+    @saturated(l_min, l_max)
     def f(distance: float) -> float:
         if distance <= l_min:
             return -1.0
@@ -3,12 +3,25 @@ from typing import Callable
 
 from math import tanh, pi
 
-__all__ = ["InvalidInfluenceFunction", "tanh_y"]
+__all__ = ["InvalidInfluenceFunction", "saturated", "tanh_y"]
 
 
 class InvalidInfluenceFunction(Exception):
     pass
 
 
+def saturated(
+    l_min: float, l_max: float
+) -> Callable[[Callable[[float], float]], Callable[[float], float]]:
+    """Mark an influence function as constant below `l_min` and above `l_max`
+    (`saturation` attribute, see `DistanceInfluenceGPD`)."""
+
+    def mark(f: Callable[[float], float]) -> Callable[[float], float]:
+        f.saturation = (l_min, l_max)
+        return f
+
+    return mark
+
+
 def tanh_y(y: float) -> Callable[[float], float]:
     return lambda x: tanh(x * 2 * pi / y)
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 from typing import TYPE_CHECKING
-from typing import Dict, List, Generator
+from typing import Dict, List, Generator, Optional
 
 from math import pi, cos, sin
 from shapely.geometry import Point
@@ -18,14 +18,24 @@ class NoValidStartPoint(Exception):
 
 
 class Gradient:
+    # smallest step of the gradient ascent, a larger one gives a coarser and
+    # faster search
+    STEP_TOLERANCE = 0.1
+
     def __init__(self, model: Model, influences: List[Influence]):
         self.model = model
         self.influences = influences
+        self.step_tolerance = self.STEP_TOLERANCE
 
     def reset(self):
         for influence in self.influences:
             influence.reset()
 
+    def refresh(self):
+        """Reset the influences whose dependencies changed."""
+        for influence in self.influences:
+            influence.refresh()
+
     def compute_influences(self, obs: Dict, position: Point) -> float:
         weighted_sum = 0
         for value, weight in (
@@ -92,8 +102,10 @@ class Gradient:
         step: float,
         epsilon: float,
         stop_difference: float = 1e-3,
-        step_tolerance: float = 0.1,
+        step_tolerance: Optional[float] = None,
     ) -> Dict:  # TODO Type
+        if step_tolerance is None:
+            step_tolerance = self.step_tolerance
         highest_slope = -float("inf")
         best_neighbor = {"pos": current, "value": -float("inf")}
         # for each positons p around the starting position
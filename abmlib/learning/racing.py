@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+from typing import List, Optional, Tuple
+
+import numpy as np
+from scipy import stats
+
+__all__ = ["ReplicateRace"]
+
+
+class ReplicateRace:
+    """Racing of replicated stochastic evaluations (objectives to minimise).
+
+    Each candidate is evaluated `min_replicates` times, then replicates are
+    only added to the candidates that are undecided: the confidence box of
+    their mean objectives overlaps the one of a competitor (another candidate
+    or a fixed competitor, e.g. the current Pareto front) so that it is
+    neither surely dominated nor surely non-dominated.
+
+    Args:
+        n_candidates: number of candidates.
+        min_replicates: replicates of every candidate.
+        max_replicates: maximum replicates of a candidate.
+        confidence: level of the confidence intervals of the means.
+        competitors: lower and upper bounds (n, n_obj) of fixed competitors.
+    """
+
+    def __init__(
+        self,
+        n_candidates: int,
+        min_replicates: int = 2,
+        max_replicates: int = 10,
+        confidence: float = 0.95,
+        competitors: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+    ):
+        self.min_replicates = min_replicates
+        self.max_replicates = max(max_replicates, min_replicates)
+        self.confidence = confidence
+        self.competitors = competitors
+        self.values: List[List[np.ndarray]] = [[] for _ in range(n_candidates)]
+        # candidates out of the race (e.g. infeasible)
+        self.stopped = np.zeros(n_candidates, dtype=bool)
+
+    def add(self, candidate: int, value):
+        """Add a replicate of a candidate."""
+        self.values[candidate].append(np.asarray(value, dtype=float))
+
+    def stop(self, candidate: int):
+        """No more replicates for a candidate."""
+        self.stopped[candidate] = True
+
+    @property
+    def n_replicates(self) -> np.ndarray:
+        return np.array([len(v) for v in self.values])
+
+    def bounds(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Means of the replicates and their confidence intervals (infinite
+        with a single replicate) for each candidate."""
+        n = self.n_replicates
+        n_obj = max((len(v[0]) for v in self.values if v), default=0)
+        mean = np.full((len(n), n_obj), np.nan)
+        half_width = np.full((len(n), n_obj), np.inf)
+        for i, values in enumerate(self.values):
+            if not values:
+                continue
+            values = np.array(values)
+            mean[i] = values.mean(axis=0)
+            if len(values) > 1:
+                quantile = stats.t.ppf((1 + self.confidence) / 2, len(values) - 1)
+                half_width[i] = (
+                    quantile * values.std(axis=0, ddof=1) / np.sqrt(len(values))
+                )
+        return mean, mean - half_width, mean + half_width
+
+    def undecided(self) -> np.ndarray:
+        """Mask of the candidates whose confidence box overlaps the one of a
+        competitor."""
+        _, low, high = self.bounds()
+        n = len(low)
+        if self.competitors is not None:
+            all_low = np.vstack([low, self.competitors[0]])
+            all_high = np.vstack([high, self.competitors[1]])
+        else:
+            all_low, all_high = low, high
+        others = ~np.eye(n, len(all_low), dtype=bool)
+        with np.errstate(invalid="ignore"):
+            # j surely dominates i: its worst case is better than i's best case
+            surely_dominated = (
+                (all_high[None, :, :] <= low[:, None, :]).all(axis=2) & others
+            ).any(axis=1)
+            # j may dominate i: its best case is better than i's worst case
+            may_be_dominated = (
+                (all_low[None, :, :] <= high[:, None, :]).all(axis=2) & others
+            ).any(axis=1)
+        return ~surely_dominated & may_be_dominated
+
+    def pending(self) -> np.ndarray:
+        """Candidates to replicate once more: under the minimum replicates,
+        or undecided and under the maximum."""
+        n = self.n_replicates
+        pending = n < self.min_replicates
+        if (n > 0).all():
+            pending |= self.undecided() & (n < self.max_replicates)
+        return np.flatnonzero(pending & ~self.stopped)
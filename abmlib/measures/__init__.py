@@ -1,11 +1,27 @@
 from .kernel_density_difference import KernelDensityDifference
-from .density import GridDensity, GridDensityDifference
-from .chamfer_distance import ChamferDistance, ChamferDistanceMacro
+from .context import MeasureContext
+from .density import RegularGrid, GridDensity, GridDensityDifference
+from .chamfer_distance import (
+    ChamferDistance,
+    ChamferDistanceMacro,
+    chamfer_distance_points,
+)
+from .polis_distance import PolisDistance
+from .matching import CentroidMatching, greedy_matching, exact_matching
+from .pipeline import MeasurePipeline
 
 __all__ = [
+    "MeasureContext",
     "KernelDensityDifference",
+    "RegularGrid",
     "GridDensity",
     "GridDensityDifference",
     "ChamferDistance",
     "ChamferDistanceMacro",
+    "chamfer_distance_points",
+    "PolisDistance",
+    "CentroidMatching",
+    "greedy_matching",
+    "exact_matching",
+    "MeasurePipeline",
 ]
@@ -1,8 +1,93 @@
+from __future__ import annotations
+import weakref
 import numpy as np
-from typing import Any
+import shapely
+from scipy.spatial import cKDTree
+from typing import TYPE_CHECKING
+from typing import Any, Dict, Tuple
 from nptyping import NDArray
 
-__all__ = ["Measure", "MeasureDifference", "MeasureDifferenceWithNearest"]
+if TYPE_CHECKING:
+    from .context import MeasureContext
+    from .density import RegularGrid
+
+__all__ = [
+    "Intermediates",
+    "Measure",
+    "MeasureDifference",
+    "MeasureDifferenceWithNearest",
+]
+
+
+class Intermediates:
+    """Values derived from a dataset and shared by all the measures applied to
+    it: centroids and their KD-tree, spatial index, polygon parts and grid
+    bins.
+
+    One instance is kept per dataset while it exists (see `of`), the dataset
+    must not be modified in place.
+    """
+
+    _instances: Dict[int, Tuple[weakref.ref, Intermediates]] = {}
+
+    def __init__(self, dataset):
+        self._dataset = weakref.ref(dataset)
+        self._centroids = None
+        self._tree = None
+        self._parts = None
+        self._bins: Dict[int, Tuple[RegularGrid, NDArray]] = {}
+
+    @classmethod
+    def of(cls, dataset) -> Intermediates:
+        """Intermediates of a dataset (cached)."""
+        key = id(dataset)
+        entry = cls._instances.get(key)
+        if entry is None or entry[0]() is not dataset:
+            ref = weakref.ref(dataset, lambda _: cls._instances.pop(key, None))
+            entry = (ref, cls(dataset))
+            cls._instances[key] = entry
+        return entry[1]
+
+    @property
+    def dataset(self):
+        return self._dataset()
+
+    @property
+    def centroids(self) -> NDArray:
+        """Coordinates of the centroids (one per row)."""
+        if self._centroids is None:
+            self._centroids = shapely.get_coordinates(self.dataset.geometry.centroid)
+        return self._centroids
+
+    @property
+    def tree(self) -> cKDTree:
+        """KD-tree of the centroids."""
+        if self._tree is None:
+            self._tree = cKDTree(self.centroids)
+        return self._tree
+
+    @property
+    def sindex(self):
+        """Spatial index of the geometries."""
+        return self.dataset.sindex
+
+    @property
+    def parts(self) -> Tuple[NDArray, NDArray]:
+        """Polygons of the (multi-part) geometries and the index of the
+        geometry of each part."""
+        if self._parts is None:
+            self._parts = shapely.get_parts(
+                np.asarray(self.dataset.geometry.values), return_index=True
+            )
+        return self._parts
+
+    def bins(self, grid: RegularGrid) -> NDArray:
+        """Index of the cell of `grid` containing each centroid."""
+        entry = self._bins.get(id(grid))
+        if entry is None or entry[0] is not grid:
+            entry = (grid, grid.cell_index(self.centroids))
+            self._bins[id(grid)] = entry
+        return entry[1]
 
 
 class Measure:
@@ -17,20 +102,87 @@ class MeasureDifference(Measure):
     def apply_validation(self, simulation, validation, **options) -> Any:
         return self.apply(simulation, validation, **options)
 
+    def apply_context(self, simulation, context: MeasureContext, **options) -> Any:
+        """Same as `apply` with the validation side taken from a context."""
+        return self.apply(simulation, context.validation, **options)
+
 
 class MeasureDifferenceWithNearest(MeasureDifference):
     """
     Apply a difference function on simulated objects with the
     nearest object in the validation dataset.
+
+    Subclasses implement either `distance_function` (one pair of objects) or
+    `distance_many` (aligned arrays of objects).
     """
 
     def apply(self, simulation, validation, **options) -> NDArray:
-        distances = np.empty(len(validation))
+        references = np.asarray(validation.geometry.values)
+        distances = np.full(len(references), np.nan)
         sindex_sim = simulation.sindex
-        for i, ref_object in enumerate(validation.geometry):
-            nearest_object = sindex_sim.geometries[sindex_sim.nearest(ref_object)[1][0]]
-            distances[i] = self.distance_function(ref_object, nearest_object)
+        if len(references) == 0 or len(sindex_sim.geometries) == 0:
+            return distances
+        ref_index, sim_index = sindex_sim.nearest(references)
+        # keep the first nearest object of each validation object
+        ref_index, first = np.unique(ref_index, return_index=True)
+        nearest = sindex_sim.geometries[sim_index[first]]
+        if len(ref_index) == len(references):
+            distances[:] = self.distance_many(
+                references, nearest, Intermediates.of(validation).parts
+            )
+        else:
+            distances[ref_index] = self.distance_many(references[ref_index], nearest)
         return distances
 
+    def distance_many(self, ref_objects, nearest_objects, ref_parts=None) -> NDArray:
+        """Distances between aligned arrays of objects.
+
+        Args:
+            ref_objects: validation objects.
+            nearest_objects: nearest simulated object of each one.
+            ref_parts: polygons of `ref_objects` and their index if already
+                computed (see `Intermediates.parts`).
+        """
+        return np.array(
+            [
+                self.distance_function(ref_object, nearest_object)
+                for ref_object, nearest_object in zip(ref_objects, nearest_objects)
+            ],
+            dtype=float,
+        )
+
     def distance_function(self, ref_object, nearest_object) -> float:
         raise NotImplementedError
+
+    @staticmethod
+    def explode_pairs(
+        ref_objects, nearest_objects, ref_parts=None
+    ) -> Tuple[NDArray, NDArray, NDArray]:
+        """Split multi-part objects into polygons.
+
+        Each part of a reference object is paired with the closest part of its
+        nearest object (the first one on ties).
+
+        Returns:
+            The reference parts, their paired parts and the index of the
+            reference object of each part.
+        """
+        if ref_parts is None:
+            ref_parts = shapely.get_parts(
+                np.asarray(ref_objects, dtype=object), return_index=True
+            )
+        ref_parts, index = ref_parts
+        candidates, part = shapely.get_parts(
+            np.asarray(nearest_objects, dtype=object)[index], return_index=True
+        )
+        distances = shapely.distance(candidates, ref_parts[part])
+        order = np.lexsort((distances, part))
+        _, first = np.unique(part[order], return_index=True)
+        return ref_parts, candidates[order[first]], index
+
+    @staticmethod
+    def parts_mean(distances, index, n) -> NDArray:
+        """Average the distances of the parts of each reference object."""
+        return np.bincount(index, weights=distances, minlength=n) / np.bincount(
+            index, minlength=n
+        )
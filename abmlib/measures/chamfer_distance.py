@@ -1,37 +1,130 @@
 # -*- coding: utf-8 -*-
-from typing import cast
+from typing import Optional
+
 import numpy as np
-from .base import MeasureDifference, MeasureDifferenceWithNearest
-from shapely import Polygon
-from x2polygons.polygon_distance import chamfer_distance
+from .base import Intermediates, MeasureDifference, MeasureDifferenceWithNearest
+from scipy.spatial import cKDTree
+from x2polygons.polygon_distance import chamfer_distance_many
+
+
+__all__ = ["ChamferDistance", "ChamferDistanceMacro", "chamfer_distance_points"]
+
 
+def chamfer_distance_points(
+    points_a: np.ndarray,
+    points_b: np.ndarray,
+    symmetrise: Optional[str] = None,
+    upper_bound: float = np.inf,
+    tree_a: Optional[cKDTree] = None,
+    tree_b: Optional[cKDTree] = None,
+) -> float:
+    """Chamfer distance between two point sets using KD-trees, same options as
+    `x2polygons.polygon_distance.chamfer_distance`.
 
-__all__ = ["ChamferDistance", "ChamferDistanceMacro"]
+    Args:
+        points_a: first point set (one point per row).
+        points_b: second point set (one point per row).
+        symmetrise: None for the directed distance a->b, or "min", "max",
+            "average" to combine a->b and b->a.
+        upper_bound: distances to the nearest point are capped to this value.
+        tree_a: KD-tree of `points_a` if already built.
+        tree_b: KD-tree of `points_b` if already built.
+    """
+
+    def directed(points, tree) -> float:
+        distances, _ = tree.query(points, distance_upper_bound=upper_bound)
+        return float(np.minimum(distances, upper_bound).sum())
+
+    c_a_b = directed(points_a, tree_b if tree_b is not None else cKDTree(points_b))
+    if symmetrise is None:
+        return c_a_b
+    c_b_a = directed(points_b, tree_a if tree_a is not None else cKDTree(points_a))
+    if symmetrise == "average":
+        return c_a_b / (2 * len(points_a)) + c_b_a / (2 * len(points_b))
+    elif symmetrise == "min":
+        return min(c_a_b, c_b_a)
+    elif symmetrise == "max":
+        return max(c_a_b, c_b_a)
+    raise ValueError(f"Unknown symmetrise option: {symmetrise}")
 
 
 class ChamferDistance(MeasureDifferenceWithNearest):
-    def distance_function(self, ref_object, nearest_object) -> float:
-        if ref_object.geom_type == "MultiPolygon":
-            return np.array(
-                [
-                    self.distance_function(ref_subpart, nearest_object)
-                    for ref_subpart in ref_object.geoms
-                ]
-            ).mean()
-        elif nearest_object.geom_type == "MultiPolygon":
-            return self.distance_function(
-                ref_object,
-                min(
-                    nearest_object.geoms,
-                    key=lambda p: p.distance(ref_object),
-                ),
-            )
-        else:
-            return cast(float, chamfer_distance(ref_object, nearest_object))
+    def distance_many(self, ref_objects, nearest_objects, ref_parts=None) -> np.ndarray:
+        ref_parts, nearest_parts, index = self.explode_pairs(
+            ref_objects, nearest_objects, ref_parts
+        )
+        return self.parts_mean(
+            chamfer_distance_many(ref_parts, nearest_parts),
+            index,
+            len(ref_objects),
+        )
 
 
 class ChamferDistanceMacro(MeasureDifference):
-    def apply(self, simulation, validation, **options) -> float:
-        centroids_sim = Polygon([[p.x, p.y] for p in simulation.geometry.centroid])
-        centroids_real = Polygon([[p.x, p.y] for p in validation.geometry.centroid])
-        return cast(float, chamfer_distance(centroids_sim, centroids_real))
+    """Chamfer distance between the centroids of the simulated and validation
+    buildings (directed from the simulation by default).
+
+    The KD-tree of a validation dataset is kept in its `Intermediates`.
+    """
+
+    # nearest distances are capped like in x2polygons' chamfer distance
+    UPPER_BOUND = 1000.0
+
+    def apply(self, simulation, validation, symmetrise=None, **options) -> float:
+        real = Intermediates.of(validation)
+        return chamfer_distance_points(
+            Intermediates.of(simulation).centroids,
+            real.centroids,
+            symmetrise=symmetrise,
+            upper_bound=self.UPPER_BOUND,
+            tree_b=real.tree,
+        )
+
+    def nearest_distances(self, points, tree) -> np.ndarray:
+        """Capped distances from each point to the nearest point of a tree."""
+        distances, _ = tree.query(points, distance_upper_bound=self.UPPER_BOUND)
+        return np.minimum(distances, self.UPPER_BOUND)
+
+    def apply_context(self, simulation, context, symmetrise=None, **options) -> float:
+        delta = context.delta(simulation)
+        if delta is None or (delta.removed.any() and symmetrise is not None):
+            return chamfer_distance_points(
+                Intermediates.of(simulation).centroids,
+                context.centroids,
+                symmetrise=symmetrise,
+                upper_bound=self.UPPER_BOUND,
+                tree_b=context.tree,
+            )
+
+        # distances of the baseline objects
+        base_sim_real = context.baseline_value(
+            "chamfer sim->real",
+            lambda points: self.nearest_distances(points, context.tree),
+        )
+        c_a_b = float(
+            base_sim_real.sum()
+            - base_sim_real[delta.removed].sum()
+            + self.nearest_distances(delta.added, context.tree).sum()
+        )
+        if symmetrise is None:
+            return c_a_b
+
+        # nothing removed: the new objects can only get closer
+        base_real_sim = context.baseline_value(
+            "chamfer real->sim",
+            lambda points: self.nearest_distances(context.centroids, cKDTree(points)),
+        )
+        real_sim = base_real_sim
+        if len(delta.added):
+            real_sim = np.minimum(
+                base_real_sim,
+                self.nearest_distances(context.centroids, cKDTree(delta.added)),
+            )
+        c_b_a = float(real_sim.sum())
+        if symmetrise == "average":
+            return c_a_b / (2 * delta.size) + c_b_a / (2 * len(context.centroids))
+        elif symmetrise == "min":
+            return min(c_a_b, c_b_a)
+        elif symmetrise == "max":
+            return max(c_a_b, c_b_a)
+        raise ValueError(f"Unknown symmetrise option: {symmetrise}")
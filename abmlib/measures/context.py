@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+import uuid
+import weakref
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+from shapely import get_coordinates
+
+from .base import Intermediates
+from .density import RegularGrid
+from .kernel_density_difference import BoundsT, KernelDensityEstimation
+
+if TYPE_CHECKING:
+    import geopandas as gpd
+
+__all__ = ["Delta", "MeasureContext"]
+
+
+class Delta(NamedTuple):
+    """Difference between a simulation and the baseline."""
+
+    added: np.ndarray
+    """Centroids of the simulated objects that are not in the baseline."""
+    removed: np.ndarray
+    """Mask of the baseline objects that are not in the simulation."""
+    size: int
+    """Number of simulated objects."""
+
+
+class MeasureContext:
+    """Validation side of the difference measures, computed once.
+
+    Measures accepting a context (`apply_context`) only compute the simulation
+    side. Intermediates are computed on first use, or all at once with
+    `prepare`.
+
+    When all the simulations start from the same objects, set them as the
+    baseline (`set_baseline`): measures then compute the contribution of the
+    baseline once and at each evaluation only add the objects that were
+    created or moved and remove the ones that were deleted or moved (see
+    `delta`).
+
+    A shared context (see `share`) is pickled as a key: install it in each
+    worker process once (pool initializer) instead of sending it with every
+    task.
+
+    Args:
+        validation: validation dataset.
+        grid: grid of the density measures.
+        kde_bounds: fixed evaluation bounds of the kernel density difference,
+            by default the bounds of both datasets at each evaluation.
+        bandwidth: bandwidth of the kernel density estimations.
+    """
+
+    _registry: Dict[str, MeasureContext] = {}
+    # validation density estimations kept for the last evaluation bounds
+    KDE_CACHE_SIZE = 8
+
+    def __init__(
+        self,
+        validation: gpd.GeoDataFrame,
+        grid: Optional[RegularGrid] = None,
+        kde_bounds: Optional[BoundsT] = None,
+        bandwidth: float = 5.0,
+    ):
+        self.validation = validation
+        self.grid = grid
+        self.kde_bounds = kde_bounds
+        self.bandwidth = bandwidth
+        self.key: Optional[str] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._tree: Optional[cKDTree] = None
+        self._bounds: Optional[BoundsT] = None
+        self._density: Optional[np.ndarray] = None
+        self._kdes: Dict[BoundsT, np.ndarray] = {}
+        self._baseline: Optional[Tuple[pd.Index, np.ndarray]] = None
+        self._baseline_values: Dict[str, Any] = {}
+        self._delta: Optional[Tuple[weakref.ref, Delta]] = None
+
+    @property
+    def centroids(self) -> np.ndarray:
+        """Coordinates of the validation centroids."""
+        if self._centroids is None:
+            self._centroids = get_coordinates(self.validation.geometry.centroid)
+        return self._centroids
+
+    @property
+    def tree(self) -> cKDTree:
+        """KD-tree of the validation centroids."""
+        if self._tree is None:
+            self._tree = cKDTree(self.centroids)
+        return self._tree
+
+    @property
+    def bounds(self) -> BoundsT:
+        """Bounds of the validation centroids."""
+        if self._bounds is None:
+            low, high = self.centroids.min(axis=0), self.centroids.max(axis=0)
+            self._bounds = ((low[0], high[0]), (low[1], high[1]))
+        return self._bounds
+
+    @property
+    def density(self) -> np.ndarray:
+        """Validation density on `grid`."""
+        if self._density is None:
+            if self.grid is None:
+                raise Exception("MeasureContext has no grid for the density.")
+            self._density = self.grid.count(self.centroids)
+        return self._density
+
+    def kde(self, bounds: BoundsT) -> np.ndarray:
+        """Validation density estimation over the given bounds, kept for the
+        `KDE_CACHE_SIZE` last bounds (most simulations share their bounds)."""
+        bounds = tuple(tuple(float(v) for v in axis) for axis in bounds)
+        kde = self._kdes.pop(bounds, None)
+        if kde is None:
+            kde = KernelDensityEstimation.kde_matrix(
+                self.validation, bounds=bounds, bandwidth=self.bandwidth
+            )
+            if len(self._kdes) >= self.KDE_CACHE_SIZE:
+                del self._kdes[next(iter(self._kdes))]
+        # most recently used last
+        self._kdes[bounds] = kde
+        return kde
+
+    def set_baseline(self, dataset: gpd.GeoDataFrame):
+        """Objects (indexed by unique ids) at the start of every simulation,
+        ignored after the first call."""
+        if self._baseline is None and dataset.index.is_unique:
+            self._baseline = (
+                dataset.index.copy(),
+                get_coordinates(dataset.geometry.centroid),
+            )
+
+    @property
+    def baseline(self) -> Optional[np.ndarray]:
+        """Centroids of the baseline objects."""
+        return self._baseline[1] if self._baseline is not None else None
+
+    def baseline_value(self, name: str, compute: Callable[[np.ndarray], Any]) -> Any:
+        """Contribution of the baseline to a measure, computed once from the
+        baseline centroids."""
+        if name not in self._baseline_values:
+            self._baseline_values[name] = compute(self.baseline)
+        return self._baseline_values[name]
+
+    def delta(self, simulation: gpd.GeoDataFrame) -> Optional[Delta]:
+        """Difference between a simulation and the baseline, or None without
+        baseline. The last result is kept while the simulation exists."""
+        if self._baseline is None or not simulation.index.is_unique:
+            return None
+        if self._delta is not None and self._delta[0]() is simulation:
+            return self._delta[1]
+        ids, centroids = self._baseline
+        points = Intermediates.of(simulation).centroids
+        if len(points) != len(simulation):
+            # empty geometries
+            return None
+        rows = ids.get_indexer(simulation.index)
+        same = rows >= 0
+        same[same] = (centroids[rows[same]] == points[same]).all(axis=1)
+        kept = np.zeros(len(ids), dtype=bool)
+        kept[rows[same]] = True
+        delta = Delta(points[~same], ~kept, len(points))
+        self._delta = (weakref.ref(simulation), delta)
+        return delta
+
+    def prepare(self, tree=False, density=False, kde=False) -> MeasureContext:
+        """Compute intermediates now (e.g. before sharing the context)."""
+        if tree:
+            self.tree
+        if density:
+            self.density
+        if kde and self.kde_bounds is not None:
+            self.kde(self.kde_bounds)
+        return self
+
+    def share(self) -> MeasureContext:
+        """Register the context, from now on it is pickled as its key."""
+        if self.key is None:
+            self.key = uuid.uuid4().hex
+        MeasureContext._registry[self.key] = self
+        return self
+
+    @classmethod
+    def from_state(cls, state: dict) -> MeasureContext:
+        context = cls.__new__(cls)
+        context.__dict__.update(state)
+        return context
+
+    @classmethod
+    def install(cls, state: dict):
+        """Register a context in the current process (pool initializer), from
+        the state returned by `state`."""
+        context = cls.from_state(state)
+        cls._registry[context.key] = context
+
+    @classmethod
+    def lookup(cls, key: str) -> MeasureContext:
+        try:
+            return cls._registry[key]
+        except KeyError:
+            raise Exception(
+                f"MeasureContext {key} is not installed in this process."
+            ) from None
+
+    @property
+    def state(self) -> dict:
+        """Full state of the context, to install it in another process."""
+        return {**self.__dict__, "_delta": None}
+
+    def __reduce__(self):
+        if self.key is not None:
+            return (MeasureContext.lookup, (self.key,))
+        return (MeasureContext.from_state, (self.state,))
@@ -3,14 +3,109 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 import numpy as np
 import geopandas as gpd
-from shapely.geometry import Polygon
+import shapely
 
-from .base import Measure, MeasureDifference
+from .base import Intermediates, Measure, MeasureDifference
 
 if TYPE_CHECKING:
-    from typing import Optional
+    from typing import Dict, List, Optional, Sequence, Tuple, Union
 
-__all__ = ["GridDensity", "GridDensityDifference"]
+__all__ = ["RegularGrid", "GridDensity", "GridDensityDifference"]
+
+
+class RegularGrid:
+    """Square cells of a grid covering a bounding box.
+
+    Cells are ordered column by column (x then y) like the polygons of
+    `GridDensity.build_grid`. Points are binned by floor division; a point
+    lying on the boundary of a cell is not counted, as with a `within` join on
+    the polygon grid.
+
+    Args:
+        bounds: (xmin, ymin, xmax, ymax) to cover.
+        size: size of the cells.
+        crs: CRS of the grid.
+    """
+
+    _cache: Dict[Tuple, RegularGrid] = {}
+
+    def __init__(
+        self,
+        bounds: Tuple[float, float, float, float],
+        size: float,
+        crs=None,
+    ):
+        xmin, ymin, xmax, ymax = bounds
+        self.size = size
+        self.crs = crs
+        # lower edges of the cells, same values as in `build_grid`
+        self.xs = np.arange(xmin, xmax + size, size)[:-1]
+        self.ys = np.arange(ymin, ymax + size, size)[:-1]
+        self.origin = (xmin, ymin)
+        self.shape = (len(self.xs), len(self.ys))
+
+    @classmethod
+    def from_border(cls, border: gpd.GeoDataFrame, size: float) -> RegularGrid:
+        """Grid covering a border, the definitions are cached."""
+        key = (tuple(border.total_bounds), size, str(border.crs))
+        grid = cls._cache.get(key)
+        if grid is None:
+            grid = cls._cache[key] = cls(tuple(border.total_bounds), size, border.crs)
+        return grid
+
+    def __len__(self) -> int:
+        return self.shape[0] * self.shape[1]
+
+    @staticmethod
+    def _bin(values: np.ndarray, edges: np.ndarray, size: float) -> np.ndarray:
+        """Index of the cell containing each value, -1 when outside or on a
+        cell boundary."""
+        if len(edges) == 0:
+            return np.full(len(values), -1)
+        with np.errstate(invalid="ignore"):
+            index = np.floor((values - edges[0]) / size)
+        index = np.clip(np.nan_to_num(index, nan=-1), 0, len(edges) - 1).astype(int)
+        # floating point errors of the division
+        index -= values <= edges[index]
+        index += values >= edges[np.clip(index, 0, None)] + size
+        inside = (index >= 0) & (index < len(edges))
+        index = np.where(inside, index, 0)
+        inside &= (edges[index] < values) & (values < edges[index] + size)
+        return np.where(inside, index, -1)
+
+    def cell_index(self, points: np.ndarray) -> np.ndarray:
+        """Index of the cell containing each point (one point per row), -1
+        when outside of the grid."""
+        ix = self._bin(points[:, 0], self.xs, self.size)
+        iy = self._bin(points[:, 1], self.ys, self.size)
+        return np.where((ix >= 0) & (iy >= 0), ix * self.shape[1] + iy, -1)
+
+    def count(self, points: np.ndarray) -> np.ndarray:
+        """Number of points within each cell."""
+        return self.count_cells(self.cell_index(points))
+
+    def count_cells(self, index: np.ndarray) -> np.ndarray:
+        """Number of points within each cell from their cell index."""
+        return np.bincount(index[index >= 0], minlength=len(self))
+
+    def to_GeoDataFrame(self) -> gpd.GeoDataFrame:
+        """Polygons of the cells (for export)."""
+        x, y = np.meshgrid(self.xs, self.ys, indexing="ij")
+        x, y = x.ravel(), y.ravel()
+        rings = np.stack(
+            [
+                np.stack([x, y], axis=-1),
+                np.stack([x + self.size, y], axis=-1),
+                np.stack([x + self.size, y + self.size], axis=-1),
+                np.stack([x, y + self.size], axis=-1),
+                np.stack([x, y], axis=-1),
+            ],
+            axis=1,
+        )
+        return gpd.GeoDataFrame(
+            {"geometry": shapely.polygons(rings)},
+            crs=self.crs,
+        )  # pyright: ignore
 
 
 class GridDensity(Measure):
@@ -18,18 +113,26 @@ class GridDensity(Measure):
         self,
         dataset,
         border: Optional[gpd.GeoDataFrame] = None,
-        grid: Optional[gpd.GeoDataFrame] = None,
+        grid: Optional[Union[RegularGrid, gpd.GeoDataFrame]] = None,
         size: float = 100,
     ) -> np.ndarray:
-        if grid is not None:
+        if grid is None and border is not None:
+            grid = RegularGrid.from_border(border, size)
+        if isinstance(grid, RegularGrid):
+            return grid.count_cells(Intermediates.of(dataset).bins(grid))
+        elif grid is not None:
             return self.apply2(dataset, grid)
-        elif border is not None:
-            return self.apply2(dataset, self.build_grid(border, size))
         else:
             raise Exception(
                 "GridDensity have neither grid or a border to build the grid."
             )
 
+    def apply_many(self, dataset, grids: Sequence[RegularGrid]) -> List[np.ndarray]:
+        """Densities of a dataset on several grids, centroids are computed
+        once."""
+        intermediates = Intermediates.of(dataset)
+        return [grid.count_cells(intermediates.bins(grid)) for grid in grids]
+
     def apply2(self, dataset: gpd.GeoDataFrame, grid: gpd.GeoDataFrame) -> np.ndarray:
         centroids = gpd.GeoDataFrame({"geometry": dataset.centroid})
 
@@ -47,37 +150,28 @@ class GridDensity(Measure):
         border: gpd.GeoDataFrame,
         size: float,
     ) -> gpd.GeoDataFrame:
-        xmin, ymin, xmax, ymax = border.total_bounds
-
-        cols = list(np.arange(xmin, xmax + size, size))
-        rows = list(np.arange(ymin, ymax + size, size))
-
-        polygons = []
-        for x in cols[:-1]:
-            for y in rows[:-1]:
-                polygons.append(
-                    Polygon(
-                        [
-                            (x, y),
-                            (x + size, y),
-                            (x + size, y + size),
-                            (x, y + size),
-                        ]
-                    )
-                )
-
-        return gpd.GeoDataFrame(
-            {"geometry": polygons},
-            crs=border.crs,
-        )  # pyright: ignore
+        return RegularGrid.from_border(border, size).to_GeoDataFrame()
 
 
 class GridDensityDifference(MeasureDifference, GridDensity):
     def apply(self, simulation, validation, border, grid_size=100):
-        grid = self.build_grid(border, grid_size)
+        grid = RegularGrid.from_border(border, grid_size)
         return self.apply_grid(simulation, validation, grid)
 
     def apply_grid(self, simulation, validation, grid):
         density_sim = GridDensity().apply(simulation, grid=grid)
         density_real = GridDensity().apply(validation, grid=grid)
         return abs(density_real - density_sim)
+
+    def apply_context(self, simulation, context):
+        grid = context.grid
+        delta = context.delta(simulation)
+        if delta is None:
+            density_sim = GridDensity().apply(simulation, grid=grid)
+        else:
+            density_sim = (
+                context.baseline_value("density", grid.count)
+                + grid.count(delta.added)
+                - grid.count(context.baseline[delta.removed])
+            )
+        return abs(context.density - density_sim)
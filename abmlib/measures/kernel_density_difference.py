@@ -1,6 +1,7 @@
 import numpy as np
 from math import ceil
-from .base import Measure, MeasureDifference
+from .base import Intermediates, Measure, MeasureDifference
+from scipy import signal
 from sklearn.neighbors import KernelDensity
 
 __all__ = ["KernelDensityDifference"]
@@ -9,10 +10,9 @@ BoundsT = tuple[tuple[float, float], tuple[float, float]]
 
 
 def get_bounds(gdf) -> BoundsT:
-    return (
-        (min(gdf.geometry.centroid.x), max(gdf.geometry.centroid.x)),
-        (min(gdf.geometry.centroid.y), max(gdf.geometry.centroid.y)),
-    )
+    centroids = Intermediates.of(gdf).centroids
+    low, high = centroids.min(axis=0), centroids.max(axis=0)
+    return ((low[0], high[0]), (low[1], high[1]))
 
 
 def max_bounds(
@@ -31,20 +31,145 @@ def max_bounds(
     )
 
 
+# Kernel profiles as functions of distance / bandwidth (unnormalized), and
+# radius (in bandwidths) beyond which they are neglected. Discontinuous kernels
+# (tophat) are badly approximated by linear binning, they are always evaluated
+# exactly.
+KERNELS = {
+    "gaussian": (lambda u: np.exp(-0.5 * u * u), 8.0),
+    "epanechnikov": (lambda u: np.clip(1 - u * u, 0, None), 1.0),
+    "exponential": (lambda u: np.exp(-u), 32.0),
+    "linear": (lambda u: np.clip(1 - u, 0, None), 1.0),
+    "cosine": (lambda u: np.where(u < 1, np.cos(0.5 * np.pi * u), 0.0), 1.0),
+}
+
+
+def grid_size(bounds: BoundsT) -> tuple[int, int]:
+    """Number of 1 meter cells of the evaluation grid along x and y."""
+    bounds_x, bounds_y = bounds
+    return (
+        ceil(bounds_x[1] - bounds_x[0]),
+        ceil(bounds_y[1] - bounds_y[0]),
+    )
+
+
 class KernelDensityEstimation(Measure):
     @staticmethod
-    def kde_matrix(gdf, bounds=None, bandwidth=5.0) -> np.ndarray:
-        bounds_x, bounds_y = bounds if bounds is not None else get_bounds(gdf)
-        size = (
-            ceil(bounds_x[1] - bounds_x[0]),
-            ceil(bounds_y[1] - bounds_y[0]),
-        )
-        X = np.array(
-            [[c.x - bounds_x[0], c.y - bounds_y[0]] for c in gdf.geometry.centroid]
+    def kernel_weights(bandwidth=5.0, kernel="cosine") -> tuple[np.ndarray, int]:
+        """Kernel of a single point sampled on the grid, normalized like
+        sklearn's, and its radius in cells."""
+        profile, support = KERNELS[kernel]
+        radius = ceil(support * bandwidth)
+        offsets = np.arange(-radius, radius + 1)
+        distances = np.hypot(*np.meshgrid(offsets, offsets, indexing="ij"))
+        norm = np.exp(
+            KernelDensity(kernel=kernel, bandwidth=bandwidth)
+            .fit([[0.0, 0.0]])
+            .score_samples([[0.0, 0.0]])[0]
+        ) / profile(np.zeros(1))[0]
+        return norm * profile(distances / bandwidth), radius
+
+    @staticmethod
+    def linear_bins(X, size, radius) -> tuple[np.ndarray, np.ndarray]:
+        """Linear binning of points (grid coordinates) on the grid padded by
+        `radius` cells (the kernel is cut beyond it).
+
+        Returns:
+            The cells (padded coordinates) and weights of the 4 corners of
+            each point.
+        """
+        shape = np.array(size) + 2 * radius + 1
+        cells = np.floor(X).astype(int)
+        fractions = X - cells
+        cells += radius
+        inside = np.all((cells >= 0) & (cells < shape - 1), axis=1)
+        cells, fractions = cells[inside], fractions[inside]
+        corners = [(0, 0), (1, 0), (0, 1), (1, 1)]
+        return (
+            np.concatenate([cells + corner for corner in corners]),
+            np.concatenate(
+                [
+                    np.abs(1 - di - fractions[:, 0]) * np.abs(1 - dj - fractions[:, 1])
+                    for di, dj in corners
+                ]
+            ),
         )
-        Y = np.array([[i, j] for i in range(size[0]) for j in range(size[1])])
-        kde = KernelDensity(kernel="cosine", bandwidth=bandwidth).fit(X)
-        return np.exp(np.reshape(kde.score_samples(Y), size))
+
+    @classmethod
+    def kde_sum(
+        cls,
+        points,
+        bounds: BoundsT,
+        bandwidth=5.0,
+        kernel="cosine",
+        direct=False,
+    ) -> np.ndarray:
+        """Binned estimation of the density multiplied by the number of points
+        (so that the sums of several point sets add up).
+
+        Args:
+            points: coordinates of the points (one per row).
+            bounds: ((xmin, xmax), (ymin, ymax)) of the evaluation grid.
+            bandwidth: kernel's bandwidth.
+            kernel: one of sklearn's KernelDensity kernels.
+            direct: add the kernel of each point to the grid instead of the
+                FFT convolution, faster for a few points.
+        """
+        size = grid_size(bounds)
+        X = np.asarray(points).reshape(-1, 2) - (bounds[0][0], bounds[1][0])
+        weights, radius = cls.kernel_weights(bandwidth, kernel)
+        cells, cell_weights = cls.linear_bins(X, size, radius)
+
+        if direct:
+            density = np.zeros(size)
+            offsets = np.arange(2 * radius + 1)
+            # grid cells reached from each bin
+            i = (cells[:, 0] - 2 * radius)[:, None, None] + offsets[None, :, None]
+            j = (cells[:, 1] - 2 * radius)[:, None, None] + offsets[None, None, :]
+            i, j = np.broadcast_arrays(i, j)
+            values = cell_weights[:, None, None] * weights[None]
+            inside = (i >= 0) & (i < size[0]) & (j >= 0) & (j < size[1])
+            np.add.at(density, (i[inside], j[inside]), values[inside])
+            return density
+
+        histogram = np.zeros((size[0] + 2 * radius + 1, size[1] + 2 * radius + 1))
+        np.add.at(histogram, (cells[:, 0], cells[:, 1]), cell_weights)
+        density = signal.fftconvolve(histogram, weights, mode="same")
+        return density[radius : radius + size[0], radius : radius + size[1]]
+
+    @classmethod
+    def kde_matrix(
+        cls,
+        gdf,
+        bounds=None,
+        bandwidth=5.0,
+        kernel="cosine",
+        binned=True,
+    ) -> np.ndarray:
+        """Density of the centroids evaluated every meter.
+
+        Args:
+            gdf: dataset.
+            bounds: ((xmin, xmax), (ymin, ymax)) of the evaluation grid,
+                defaults to the bounds of the centroids.
+            bandwidth: kernel's bandwidth.
+            kernel: one of sklearn's KernelDensity kernels.
+            binned: when True the centroids are linearly binned on the grid
+                and convolved with the kernel by FFT, otherwise the density is
+                evaluated exactly by sklearn on every cell (much slower).
+                Ignored for the kernels without a binned version (`KERNELS`).
+        """
+        bounds = bounds if bounds is not None else get_bounds(gdf)
+        points = Intermediates.of(gdf).centroids
+        if not binned or kernel not in KERNELS:
+            Y = np.indices(grid_size(bounds)).reshape(2, -1).T
+            kde = KernelDensity(kernel=kernel, bandwidth=bandwidth).fit(
+                points - (bounds[0][0], bounds[1][0])
+            )
+            return np.exp(np.reshape(kde.score_samples(Y), grid_size(bounds)))
+        density = cls.kde_sum(points, bounds, bandwidth, kernel) / len(points)
+        # FFT round-off on empty areas
+        return np.clip(density, 0, None)
 
     def apply(self, dataset, **options) -> np.ndarray:
         return self.kde_matrix(dataset, **options)
@@ -63,5 +188,31 @@ class KernelDensityDifference(MeasureDifference):
         k_real = KernelDensityEstimation().apply(validation, **options)
         return k_sim - k_real
 
+    def apply_context(self, simulation, context, **options) -> np.ndarray:
+        bounds = context.kde_bounds
+        delta = context.delta(simulation) if bounds is not None else None
+        if bounds is None:
+            bounds = max_bounds(get_bounds(simulation), context.bounds)
+        options = {**options, "bounds": bounds, "bandwidth": context.bandwidth}
+        if (
+            delta is None
+            or options.get("binned", True) is False
+            or options.get("kernel", "cosine") not in KERNELS
+        ):
+            k_sim = KernelDensityEstimation().apply(simulation, **options)
+        else:
+            options.pop("binned", None)
+            kde_sum = KernelDensityEstimation.kde_sum
+            k_sim = (
+                context.baseline_value(
+                    f"kde_sum {options}", lambda points: kde_sum(points, **options)
+                )
+                + kde_sum(delta.added, direct=True, **options)
+                - kde_sum(context.baseline[delta.removed], direct=True, **options)
+            ) / delta.size
+            # FFT round-off on empty areas
+            k_sim = np.clip(k_sim, 0, None)
+        return k_sim - context.kde(bounds)
+
     def apply_validation(self, simulation, validation, **options) -> float:
         return abs(self.apply(simulation, validation).mean())
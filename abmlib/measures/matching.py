@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+from typing import Optional, Tuple
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+from scipy.spatial.distance import cdist
+
+from .base import Intermediates, MeasureDifference
+
+__all__ = ["CentroidMatching", "greedy_matching", "exact_matching"]
+
+
+def greedy_matching(
+    points_a: np.ndarray,
+    points_b: np.ndarray,
+    k: int = 8,
+    tree_b: Optional[cKDTree] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Match each point of `a`, in order, with its nearest unused point of `b`.
+
+    The `k` nearest candidates of all the points are queried at once. When all
+    the candidates of a point are already used, its query is expanded (2k, 4k,
+    ...).
+
+    Args:
+        points_a: points to match (one per row).
+        points_b: candidates (one per row), each one is used at most once.
+        k: initial number of candidates per point.
+        tree_b: KD-tree of `points_b` if already built.
+
+    Returns:
+        The index of the point of `b` matched with each point of `a` (-1 when
+        `b` is exhausted) and the distances (inf when unmatched).
+    """
+    n_a, n_b = len(points_a), len(points_b)
+    matches = np.full(n_a, -1)
+    distances = np.full(n_a, np.inf)
+    if n_a == 0 or n_b == 0:
+        return matches, distances
+
+    tree = tree_b if tree_b is not None else cKDTree(points_b)
+    k = min(k, n_b)
+    candidates_d, candidates_i = tree.query(points_a, k=[*range(1, k + 1)])
+    used = np.zeros(n_b, dtype=bool)
+
+    for i in range(min(n_a, n_b)):
+        d, j, size = candidates_d[i], candidates_i[i], k
+        free = ~used[j]
+        while not free.any():
+            # every candidate is used: expand the query
+            size = min(2 * size, n_b)
+            d, j = tree.query(points_a[i], k=[*range(1, size + 1)])
+            free = ~used[j]
+        first = np.argmax(free)
+        matches[i], distances[i] = j[first], d[first]
+        used[j[first]] = True
+
+    return matches, distances
+
+
+def exact_matching(
+    points_a: np.ndarray,
+    points_b: np.ndarray,
+    radius: float = np.inf,
+    tree_a: Optional[cKDTree] = None,
+    tree_b: Optional[cKDTree] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """One-to-one matching minimising the sum of `min(distance, radius)`.
+
+    Pairs further than `radius` cost the same as no pair, so the assignment is
+    solved separately on each connected component of the graph of the pairs
+    closer than `radius`.
+
+    Args:
+        points_a: points to match (one per row).
+        points_b: candidates (one per row), each one is used at most once.
+        radius: maximum distance of a pair.
+        tree_a: KD-tree of `points_a` if already built.
+        tree_b: KD-tree of `points_b` if already built.
+
+    Returns:
+        The index of the point of `b` matched with each point of `a` (-1 when
+        unmatched) and the costs (`radius` when unmatched).
+    """
+    n_a, n_b = len(points_a), len(points_b)
+    matches = np.full(n_a, -1)
+    costs = np.full(n_a, float(radius))
+    if n_a == 0 or n_b == 0:
+        return matches, costs
+
+    if not np.isfinite(radius):
+        rows, cols = linear_sum_assignment(cdist(points_a, points_b))
+        matches[rows] = cols
+        costs[rows] = np.hypot(*(points_a[rows] - points_b[cols]).T)
+        return matches, costs
+
+    tree_a = tree_a if tree_a is not None else cKDTree(points_a)
+    tree_b = tree_b if tree_b is not None else cKDTree(points_b)
+    pairs = tree_a.sparse_distance_matrix(tree_b, radius, output_type="ndarray")
+    pairs = pairs[pairs["v"] < radius]
+    if len(pairs) == 0:
+        return matches, costs
+
+    # bipartite graph: points of a then points of b
+    graph = coo_matrix(
+        (np.ones(len(pairs)), (pairs["i"], n_a + pairs["j"])),
+        shape=(n_a + n_b, n_a + n_b),
+    )
+    _, labels = connected_components(graph, directed=False)
+    component = labels[pairs["i"]]
+    order = np.argsort(component, kind="stable")
+    pairs, component = pairs[order], component[order]
+    starts = np.flatnonzero(np.diff(component, prepend=-1))
+
+    for edges in np.split(pairs, starts[1:]):
+        rows, i = np.unique(edges["i"], return_inverse=True)
+        cols, j = np.unique(edges["j"], return_inverse=True)
+        cost = np.full((len(rows), len(cols)), float(radius))
+        cost[i, j] = edges["v"]
+        r, c = linear_sum_assignment(cost)
+        paired = cost[r, c] < radius
+        matches[rows[r[paired]]] = cols[c[paired]]
+        costs[rows[r[paired]]] = cost[r[paired], c[paired]]
+
+    return matches, costs
+
+
+class CentroidMatching(MeasureDifference):
+    """Sum of the distances between the simulated centroids and the validation
+    centroids, each validation object being matched at most once.
+
+    Options:
+        method: "greedy" (each simulated object takes its nearest unused
+            validation object, in order) or "exact" (optimal assignment).
+        radius: distances are capped to this value, unmatched objects cost
+            `radius` (required to split the exact assignment into small
+            problems).
+    """
+
+    def apply(self, simulation, validation, **options) -> float:
+        return self.match(
+            Intermediates.of(simulation).centroids,
+            Intermediates.of(validation).centroids,
+            **options,
+        )
+
+    def apply_context(self, simulation, context, **options) -> float:
+        return self.match(
+            Intermediates.of(simulation).centroids,
+            context.centroids,
+            tree_b=context.tree,
+            **options,
+        )
+
+    @staticmethod
+    def match(
+        points_a,
+        points_b,
+        method: str = "greedy",
+        radius: float = np.inf,
+        tree_b: Optional[cKDTree] = None,
+    ) -> float:
+        if method == "greedy":
+            _, distances = greedy_matching(points_a, points_b, tree_b=tree_b)
+            distances = np.minimum(distances, radius)
+        elif method == "exact":
+            _, distances = exact_matching(points_a, points_b, radius, tree_b=tree_b)
+        else:
+            raise ValueError(f"Unknown matching method: {method}")
+        return float(distances.sum())
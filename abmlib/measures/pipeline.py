@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from typing import Any, Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .base import Intermediates
+from .chamfer_distance import ChamferDistance, ChamferDistanceMacro
+from .density import GridDensityDifference
+from .hausdorff_distance import HausdorffDistance
+from .kernel_density_difference import KernelDensityDifference
+from .matching import CentroidMatching
+from .polis_distance import PolisDistance
+
+if TYPE_CHECKING:
+    from .context import MeasureContext
+
+__all__ = ["MeasurePipeline"]
+
+
+class MeasurePipeline:
+    """Evaluate several measures on the same simulation output.
+
+    The intermediates of the simulation (centroids, spatial index, polygon
+    parts, grid bins, see `Intermediates`) are derived once and shared by all
+    the measures, the validation side comes from a `MeasureContext`.
+
+    Args:
+        names: names of the measures (in `MEASURES` or keys of `ALIASES`).
+        context: validation side of the measures.
+        matching_radius: maximum distance between two matched objects, the
+            cost of an unmatched object (both matching measures).
+    """
+
+    # names of the measures, each one computed by the method of the same name
+    MEASURES = frozenset(
+        {
+            "kdd",
+            "chamfer_macro",
+            "chamfer_micro",
+            "hausdorff",
+            "polis",
+            "density_mean",
+            "density_max",
+            "matching",
+            "matching_exact",
+        }
+    )
+    # names of the measure classes (validate command)
+    ALIASES = {
+        "kernel_density_difference": "kdd",
+        "chamfer_distance_macro": "chamfer_macro",
+        "chamfer_distance": "chamfer_micro",
+        "hausdorff_distance": "hausdorff",
+        "polis_distance": "polis",
+        "grid_density_difference": "density_mean",
+        "centroid_matching": "matching",
+    }
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        context: MeasureContext,
+        matching_radius: float = 100.0,
+    ):
+        unknown = [n for n in names if self.ALIASES.get(n, n) not in self.MEASURES]
+        if unknown:
+            raise Exception(f"Unknown measures: {', '.join(unknown)}")
+        self.names = list(names)
+        self.context = context
+        self.matching_radius = matching_radius
+        # values shared by several measures of the current evaluation
+        self._shared: Dict[str, Any] = {}
+
+    def prepare(self, simulation) -> Intermediates:
+        """Derive the intermediates needed by the measures."""
+        intermediates = Intermediates.of(simulation)
+        intermediates.centroids
+        if self.context.grid is not None and any("density" in n for n in self.names):
+            intermediates.bins(self.context.grid)
+        return intermediates
+
+    def evaluate(self, simulation) -> pd.Series:
+        """Value of each measure, in the order of `names`."""
+        self.prepare(simulation)
+        self._shared = {}
+        try:
+            return pd.Series(
+                {
+                    name: getattr(self, self.ALIASES.get(name, name))(simulation)
+                    for name in self.names
+                },
+                dtype=float,
+            )
+        finally:
+            self._shared = {}
+
+    def kdd(self, simulation) -> float:
+        kdd = KernelDensityDifference().apply_context(simulation, self.context)
+        return abs(kdd.mean())
+
+    def chamfer_macro(self, simulation) -> float:
+        return ChamferDistanceMacro().apply_context(simulation, self.context)
+
+    def chamfer_micro(self, simulation) -> float:
+        return np.nanmean(ChamferDistance().apply_context(simulation, self.context))
+
+    def hausdorff(self, simulation) -> float:
+        return np.nanmean(HausdorffDistance().apply_context(simulation, self.context))
+
+    def polis(self, simulation) -> float:
+        return np.nanmean(PolisDistance().apply_context(simulation, self.context))
+
+    def density(self, simulation) -> np.ndarray:
+        """Absolute density differences per cell (shared by the density
+        measures)."""
+        if "density" not in self._shared:
+            self._shared["density"] = GridDensityDifference().apply_context(
+                simulation, self.context
+            )
+        return self._shared["density"]
+
+    def density_mean(self, simulation) -> float:
+        return self.density(simulation).mean()
+
+    def density_max(self, simulation) -> float:
+        return self.density(simulation).max()
+
+    def matching(self, simulation) -> float:
+        return CentroidMatching().apply_context(
+            simulation,
+            self.context,
+            radius=self.matching_radius,
+        )
+
+    def matching_exact(self, simulation) -> float:
+        return CentroidMatching().apply_context(
+            simulation,
+            self.context,
+            method="exact",
+            radius=self.matching_radius,
+        )
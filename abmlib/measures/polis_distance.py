@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+from .base import MeasureDifferenceWithNearest
+from x2polygons.polygon_distance import polis_distance_many
+
+
+__all__ = ["PolisDistance"]
+
+
+class PolisDistance(MeasureDifferenceWithNearest):
+    """PoLiS distance (average distance between the vertices of a polygon and
+    the boundary of the other one, in both directions) between each validation
+    building and its nearest simulated building."""
+
+    def distance_many(self, ref_objects, nearest_objects, ref_parts=None) -> np.ndarray:
+        ref_parts, nearest_parts, index = self.explode_pairs(
+            ref_objects, nearest_objects, ref_parts
+        )
+        return self.parts_mean(
+            polis_distance_many(ref_parts, nearest_parts, symmetrise="average"),
+            index,
+            len(ref_objects),
+        )
@@ -7,12 +7,14 @@ import pendulum
 from mesa_geo import GeoSpace
 
 if TYPE_CHECKING:
+    from geopandas import GeoDataFrame
     from shapely.geometry import Point
 
+from .cache import ArrayCache
 from .environment import Border, Factor, Raster
 from .influences import Gradient, Influence
 from .model_time import ModelTime
-from .agents import Agent, GeoAgent, AgentCreator
+from .agents import Agent, GeoAgent, AgentCreator, AgentColumns
 from .logger import Logger
 from .utils import random_point_in_bounds
 
@@ -49,10 +51,18 @@ class Model(mesa.Model):
         self.schedule.step()  # TODO: Why this first state?!?
         self.grid = GeoSpace(crs=config["crs"])
         self.border = Border(config["border"]["file"], crs=config["crs"])
+        # Columnar storage of GeoAgents (one per class)
+        self.columns: Dict[Type[GeoAgent], AgentColumns] = {}
+        # Versions of non geographic agent classes and rasters
+        self._versions: Dict[Type[Agent] | str, int] = {}
         # check mesa data collections!!
         # https://mesa.readthedocs.io/en/stable/apis/datacollection.html
         # Influences (init with add influence)
         self.influences: Dict[str, Gradient] = {}
+        # Persistent cache shared by all the models using the same directory
+        self.cache: Optional[ArrayCache] = None
+        if "cache" in config:
+            self.cache = ArrayCache(config["cache"]["directory"])
         # Rasters
         self.rasters = self._init_rasters()
         # External factors
@@ -152,7 +162,12 @@ class Model(mesa.Model):
         """Init all rasters from the model configuration."""
         rasters = {}
         for raster in self.config["rasters"]:
-            r = Raster(raster["file"], raster["undefined_value"], self.grid.crs)
+            r = Raster(
+                raster["file"],
+                raster["undefined_value"],
+                self.grid.crs,
+                cache=self.cache,
+            )
             rasters[raster["name"]] = r
         return rasters
 
@@ -195,6 +210,9 @@ class Model(mesa.Model):
         # If agent is a GeoAgent add it to space
         if issubclass(type(agent), GeoAgent):
             self.grid.add_agents([agent])
+            self.get_columns(type(agent)).add(agent)
+        else:
+            self._bump_version(type(agent))
         # Add agent to model schedule if they need to take actions during model
         # execution
         if schedule:
@@ -211,9 +229,57 @@ class Model(mesa.Model):
         self.agents[type(agent)].remove(agent)
         if issubclass(type(agent), GeoAgent):
             self.grid.remove_agent(agent)
+            self.get_columns(type(agent)).remove(agent)
+        else:
+            self._bump_version(type(agent))
         if agent in self.schedule._agents:
             self.schedule.remove(agent)
 
+    def _bump_version(self, key: Type[Agent] | str):
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+    def get_version(self, dependency: Type[Agent] | str) -> int:
+        """Version counter of an agent class (incremented when its agents are
+        added, removed or moved) or of a raster (given by name).
+
+        Args:
+            dependency: an agent class or a raster name.
+        """
+        if not isinstance(dependency, str) and dependency in self.columns:
+            return self.columns[dependency].version
+        return self._versions.get(dependency, 0)
+
+    def set_raster(self, name: str, raster: Raster):
+        """Add or replace a raster, influences using it will be reset.
+
+        Args:
+            name: raster's name.
+            raster: the raster.
+        """
+        self.rasters[name] = raster
+        self._bump_version(name)
+
+    def get_columns(self, agent_class: Type[GeoAgent]) -> AgentColumns:
+        """Columnar storage (geometries, exported parametters) of a GeoAgent
+        class.
+
+        Args:
+            agent_class: a GeoAgent class.
+        """
+        if agent_class not in self.columns:
+            self.columns[agent_class] = AgentColumns(agent_class, self.config["crs"])
+        return self.columns[agent_class]
+
+    def get_agents_as_GeoDataFrame(self, agent_class: Type[GeoAgent]) -> GeoDataFrame:
+        """Agents of a class as a GeoDataFrame indexed by their unique id.
+
+        The result is cached until the agents change, it must not be modified.
+
+        Args:
+            agent_class: a GeoAgent class.
+        """
+        return self.get_columns(agent_class).as_GeoDataFrame()
+
     @property
     def bounds(self) -> Dict[str, float]:
         """A dictionary containing the model bounds."""
@@ -236,8 +302,9 @@ class Model(mesa.Model):
         self.logger.model_log(message, self, error)
 
     def reset_influences(self):
+        """Reset the influences whose dependencies changed."""
         for infl in self.influences.values():
-            infl.reset()
+            infl.refresh()
 
     def step(self):
         """Run the model for one step."""
@@ -245,10 +312,13 @@ class Model(mesa.Model):
         # Call step methods of all scheduled agents
         for agent_class in self.AGENT_CLASSES:
             if agent_class in self.scheduled_classes:
+                agent_class.update_parametters(
+                    list(self.schedule.agents_by_type[agent_class].values()), self
+                )
                 self.schedule.step_type(agent_class, True)
                 self.log(f"{agent_class.__name__.upper()} DONE")
         self.log("AGENTS DONE")
-        # Reset all influences
+        # Reset outdated influences
         self.reset_influences()
         self.log("INFLUENCE RESET DONE")
         # Step forward model's time
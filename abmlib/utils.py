@@ -1,11 +1,27 @@
-from typing import cast
+from typing import Iterator, cast
+from contextlib import contextmanager
+import random
 from random import uniform
 import numpy as np
 import pandas as pd
 import geopandas as gpd
 from shapely import Point, Polygon
 
-__all__ = ["random_point_in_bounds", "random_points_in_bounds"]
+__all__ = ["random_point_in_bounds", "random_points_in_bounds", "seeded"]
+
+
+@contextmanager
+def seeded(seed: int) -> Iterator[None]:
+    """Seed the global random generators (`random` and `numpy.random`) used by
+    the simulations, and restore their previous states on exit."""
+    state, numpy_state = random.getstate(), np.random.get_state()
+    random.seed(seed)
+    np.random.seed(seed % 2**32)
+    try:
+        yield
+    finally:
+        random.setstate(state)
+        np.random.set_state(numpy_state)
 
 
 def random_point_in_bounds(bounding_polygon: Polygon) -> Point:
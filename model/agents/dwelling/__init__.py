@@ -36,3 +36,4 @@ class Dwelling(GeoAgent):
     ACTIONS = {
         "make_extension": MakeExtension(),
     }
+    COMPACT = True
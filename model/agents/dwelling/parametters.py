@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 from typing import TYPE_CHECKING, Optional
-from typing import Any, List, Dict
+from typing import Any, List, Dict, Sequence
 
 from enum import Enum
 from random import randint
+import numpy as np
 from shapely.geometry import Polygon, MultiPolygon
 from abmlib import Parametter
 from shapely import unary_union
@@ -126,9 +127,8 @@ class WeeklyIncome(Parametter):
             # Make a roulette wheel on weekly income factor
             income_factor = model.factors["weekly_income"]
             year = model.time.current.year
-            income_data = income_factor.get_data(year)
-            income_range = income_factor.roulette_wheel(
-                income_data, r"\$(\d+) \- \$(\d+)"
+            income_range = income_factor.draw(
+                year, result_pattern=r"\$(\d+) \- \$(\d+)"
             )
             # Define weekly income from the randomly drawn income range
             value = randint(int(income_range[0]), int(income_range[1]))
@@ -142,6 +142,14 @@ class ConstructionSavings(Parametter):
         income = agent.get("weekly_income") * 4 * self.options["savings_rate"]
         return old + income
 
+    def update_many(
+        self, values: np.ndarray, model: Model, agents: Sequence[Agent]
+    ) -> np.ndarray:
+        incomes = np.fromiter(
+            (a.get("weekly_income") for a in agents), dtype=float, count=len(agents)
+        )
+        return values.astype(float) + incomes * 4 * self.options["savings_rate"]
+
 
 class StatusType(Enum):
     """Dwelling status enumerator. Describe the relation between the
@@ -2,6 +2,7 @@
 from typing import cast
 from typing import Tuple
 import random
+import numpy as np
 from enum import Enum
 from collections import namedtuple
 from abmlib import Parametter
@@ -46,12 +47,11 @@ class Age(Parametter):
         age_factor = model.factors[
             "age_male" if agent.get("gender") == Gender.Type.MALE else "age_female"
         ]
-        # Get gemographic data for current date (year)
-        age_data = age_factor.get_data(model.time.current.year)
-
-        # Random pick an age group
+        # Random pick an age group in the demographic data of the current date
         group = int(
-            age_factor.roulette_wheel(age_data, index_range=(1, len(Age.GROUPS)))
+            age_factor.draw(
+                model.time.current.year, index_range=(1, len(Age.GROUPS))
+            )
         )
         # And then randomize the agent's age within this group
         age = ages.random(group, Age.GROUPS)
@@ -64,6 +64,15 @@ class Age(Parametter):
         group = ages.to_age_group(value, Age.GROUPS)  # update age group
         return Age.Type(value, group)
 
+    def update_many(self, values, model, agents):
+        """Apply aging and update age group values of all the agents."""
+        value = np.fromiter((v[0] for v in values), dtype=float, count=len(values))
+        value += 1 / 12
+        group = ages.to_age_groups(value, Age.GROUPS)  # update age groups
+        updated = np.empty(len(values), dtype=object)
+        updated[:] = [Age.Type(v, g) for v, g in zip(value.tolist(), group.tolist())]
+        return updated
+
 
 class Dead(Parametter):
     pass
@@ -99,6 +108,22 @@ class Pregnancy(Parametter):
         else:
             return old
 
+    def update_many(self, values, model, agents):
+        resting_months = cast(int, self.options["resting_months"])
+        ongoing = np.fromiter((v[0] for v in values), dtype=bool, count=len(values))
+        if not ongoing.any():
+            return None
+        length = np.fromiter((v[1] for v in values), dtype=int, count=len(values))
+        # TODO: create child (new agent) when length == 9 for women
+        freed = ongoing & (length == 9 + resting_months)
+        updated = values.copy()
+        for i in np.flatnonzero(ongoing & ~freed):
+            updated[i] = PregnancyType(True, int(length[i]) + 1)
+        for i in np.flatnonzero(freed):
+            # Free mother and father
+            updated[i] = self.initial_value
+        return updated
+
 
 class House(Parametter):
     pass
@@ -1,5 +1,6 @@
 # coding: utf-8
 import random
+import numpy as np
 from collections import namedtuple
 from abmlib import Parametter
 
@@ -27,3 +28,10 @@ class AnnualSettlements(Parametter):
             return self.reset()
         else:
             return old
+
+    def update_many(self, values, model, agents):
+        if model.time.current.month == 1:
+            updated = np.empty(len(values), dtype=object)
+            updated[:] = [self.reset() for _ in range(len(values))]
+            return updated
+        return None
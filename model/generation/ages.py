@@ -1,4 +1,5 @@
 from random import randint
+import numpy as np
 
 __all__ = [
     "generate_groups",
@@ -30,6 +31,18 @@ def to_age_group(age, groups):
         return last[0]
 
 
+def to_age_groups(ages, groups):
+    """Vectorized version of `to_age_group`.
+
+    Args:
+        ages (np.ndarray): agents' ages.
+        groups (Dict[int, Tuple[int, int]]): generated groups.
+    """
+    last = groups[len(groups)]
+    interval = last[0] / len(groups)
+    return np.where(ages < last[0], ages // interval + 1, last[0])
+
+
 def random(age_group, groups, max_generated_age=100):
     """Generates a random age given an age group.
 
@@ -3,15 +3,13 @@ import numpy as np
 import geopandas as gpd
 
 import pymoo.core.problem as pymoo_problem
+from abmlib.cache import ArrayCache
+from abmlib.config import load_config
+from abmlib.utils import seeded
 from pymoo.util.display.multi import MultiObjectiveOutput
 from pymoo.util.display.column import Column
 
-from abmlib.measures import (
-    ChamferDistance,
-    ChamferDistanceMacro,
-    GridDensityDifference,
-    KernelDensityDifference,
-)
+from abmlib.measures import MeasureContext, MeasurePipeline, RegularGrid
 
 from agents.dwelling import Dwelling
 from agents.landowner import LandOwner, ImmigrationBulk
@@ -47,6 +45,43 @@ class MyOutput(MultiObjectiveOutput):
 
 
 class ProblemBase(pymoo_problem.ElementwiseProblem):
+    # size of the cells of the density measures' grid
+    GRID_DENSITY_SIZE = 100
+    # maximum distance between two matched buildings (exact matching)
+    MATCHING_RADIUS = 100.0
+    # parameters closer than this fraction of their range share their
+    # evaluation (evaluation store)
+    EVALUATION_RESOLUTION = 1e-6
+    # fraction of the new buildings placed by the simulations, with a coarser
+    # gradient ascent below 1 (multi-fidelity screening)
+    fidelity = 1.0
+    # measures of the screening simulations (fidelity below 1), by default
+    # the measures to fit
+    screening_measures = None
+
+    @classmethod
+    def create_measure_context(cls, model_config, measures):
+        """Validation side of the measures, to create once and share between
+        the evaluations (see `MeasureContext.share`)."""
+        config = load_config(model_config)
+        border = cls.parse_config__get_border(config)
+        # kdd is evaluated on the bounds of both datasets (no fixed kde_bounds)
+        return MeasureContext(
+            cls.parse_config__get_validation_dataset(config),
+            grid=RegularGrid.from_border(border, cls.GRID_DENSITY_SIZE),
+        ).prepare(
+            tree=any((m == "chamfer_macro" or "matching" in m for m in measures)),
+            density=any(("density" in m for m in measures)),
+        )
+
+    def load_model_config(self):
+        """Load the model configuration, with the shared cache directory if
+        any (distance fields, reprojected rasters)."""
+        config = load_config(self.config_path)
+        if self.cache_dir is not None:
+            config["cache"] = {"directory": self.cache_dir}
+        return config
+
     @staticmethod
     def parse_config__get_validation_dataset(config):
         dwelling_config = next(
@@ -65,42 +100,113 @@ class ProblemBase(pymoo_problem.ElementwiseProblem):
     def parse_config__get_border(config):
         return gpd.read_file(config["border"]["file"])
 
-    def apply_measures(self, model, time):
-        """Measure the distance between the simulation and the validation data."""
-        dwellings = None
-
-        if any(
-            (m in ["kdd", "chamfer_macro"] or "density" in m for m in self.measures)
-        ):
-            dwellings = model.grid.get_agents_as_GeoDataFrame(Dwelling)
-
-        measures = []
-        if "time" in self.measures:
-            measures.append(time)
-        if "kdd" in self.measures:
-            measures.append(
-                abs(KernelDensityDifference().apply(dwellings, self.validation).mean())
+    def evaluation_key(self, x, replicate=0):
+        """Key of an evaluation in the evaluation store: configuration,
+        quantized parameters, measures, seed (and fidelity if reduced,
+        replicate after the first one)."""
+        if getattr(self, "_config_digest", None) is None:
+            self._config_digest = ArrayCache.make_key(
+                type(self).__qualname__, load_config(self.config_path)
             )
-        if "chamfer_macro" in self.measures:
-            measures.append(ChamferDistanceMacro().apply(dwellings, self.validation))
-        if "chamfer_micro" in self.measures:
-            # do not use
-            measures.append(ChamferDistance().apply(dwellings, self.validation))
-        # "density_mean" in self.measures or "density_max" in self.measures:
-        if any(("density" in m for m in self.measures)):
-            density_res = GridDensityDifference().apply_grid(
-                dwellings,
-                self.validation,
-                self.grid_density_grid,
-            )
-            if "density_mean" in self.measures:
-                measures.append(density_res.mean())
-            if "density_max" in self.measures:
-                measures.append(density_res.max())
-        return np.concatenate(
-            [[m] if not isinstance(m, np.ndarray) else m for m in measures],
-            axis=0,
+        parts = (
+            self._config_digest,
+            self.quantize(x),
+            self.active_measures,
+            self.seed,
         )
+        if self.fidelity < 1:
+            parts += (self.fidelity,)
+        if replicate:
+            parts += (("replicate", replicate),)
+        return ArrayCache.make_key(*parts)
+
+    def quantize(self, x):
+        """Parameters as integer steps of `EVALUATION_RESOLUTION` of their
+        range."""
+        return np.round(
+            (np.asarray(x, dtype=float) - self.xl)
+            / ((self.xu - self.xl) * self.EVALUATION_RESOLUTION)
+        ).astype(np.int64)
+
+    def simulation_seed(self, x, replicate=0):
+        """Seed of the simulation of the parameters: the same seed,
+        parameters (quantized) and replicate give the same simulation."""
+        key = ArrayCache.make_key(self.seed, self.quantize(x), replicate)
+        return int(key[:16], 16)
+
+    def _evaluate(self, x, out, *args, replicate=0, **kwargs):
+        """Evaluate the parameters with a simulation seeded from them, or
+        reuse their stored evaluation (of the same replicate)."""
+        store = self.evaluation_store
+        key = None
+        if store is not None:
+            key = self.evaluation_key(x, replicate)
+            stored = store.get(key)
+            if stored is not None:
+                out.update(stored)
+                return
+        with seeded(self.simulation_seed(x, replicate)):
+            self._evaluate_parameters(x, out, *args, **kwargs)
+        if store is not None:
+            store.put(key, out)
+
+    def _evaluate_parameters(self, x, out, *args, **kwargs):
+        raise NotImplementedError
+
+    def set_measure_baseline(self, model):
+        """Record the starting dwellings (the same in every simulation), the
+        measures then only compute the contribution of the new ones."""
+        if self.context.baseline is None:
+            self.context.set_baseline(model.get_agents_as_GeoDataFrame(Dwelling))
+
+    @property
+    def active_measures(self):
+        """Measures of the simulations at the current fidelity."""
+        if self.fidelity < 1 and self.screening_measures:
+            return tuple(self.screening_measures)
+        return tuple(self.measures)
+
+    @property
+    def measure_pipeline(self):
+        """Active measures (except the time), evaluated on shared
+        intermediates."""
+        pipelines = getattr(self, "_measure_pipelines", None)
+        if pipelines is None:
+            pipelines = self._measure_pipelines = {}
+        measures = self.active_measures
+        if measures not in pipelines:
+            pipelines[measures] = MeasurePipeline(
+                [m for m in measures if m != "time"],
+                self.context,
+                matching_radius=self.MATCHING_RADIUS,
+            )
+        return pipelines[measures]
+
+    def apply_measures(self, model, time):
+        """Measure the distance between the simulation and the validation data,
+        in the order of the active measures."""
+        measures = self.active_measures
+        values = {"time": time}
+        if any((m != "time" for m in measures)):
+            dwellings = model.get_agents_as_GeoDataFrame(Dwelling)
+            values.update(self.measure_pipeline.evaluate(dwellings))
+        return np.array([values[m] for m in measures], dtype=float)
+
+    def failed_measures(self, value):
+        """Values of the active measures of a failed simulation."""
+        return np.array([value] * len(self.active_measures), dtype=float)
+
+    @property
+    def n_simulated_buildings(self):
+        """Number of new buildings at the current fidelity."""
+        return max(1, round(self.n_new_buildings * self.fidelity))
+
+    def apply_fidelity(self, model):
+        """Coarser gradient ascent of the new buildings below full fidelity
+        (once the influences are set)."""
+        if self.fidelity < 1:
+            for gradient in model.influences.values():
+                gradient.step_tolerance = gradient.STEP_TOLERANCE / self.fidelity
 
     @staticmethod
     def change_landowner_rule(building_area_range, n_new_buildings):
@@ -8,16 +8,20 @@ import random
 from pathlib import Path
 
 from pymoo.algorithms.moo.nsga2 import NSGA2
-from pymoo.core.problem import StarmapParallelization
-from pymoo.termination.ftol import MultiObjectiveSpaceTermination
-from pymoo.termination.robust import RobustTermination
-from pymoo.termination.max_gen import MaximumGenerationTermination
-from pymoo.termination.collection import TerminationCollection
+from pymoo.core.problem import LoopedElementwiseEvaluation, StarmapParallelization
 from pymoo.optimize import minimize
 
 sys.path.append("./model")
 
+from abmlib.cache import EvaluationStore
+from abmlib.measures import MeasureContext
+
 import learn.save_results as save_results
+import learn.steady_state as steady_state
+from learn.multi_fidelity import SuccessiveHalvingEvaluator
+from learn.replicates import ReplicateRacingEvaluator
+from learn.surrogate import SurrogateScreening
+from learn.termination import make_termination, resume_termination
 from learn.base import MyOutput
 from learn.sn7 import Problem as SN7Problem
 from learn.valenicina import Problem as ValenicinaProblem
@@ -37,49 +41,130 @@ def run_nsga_ii(
     pop_size,
     n_max_gen,
     seed=None,
+    cache_dir=None,
+    context=None,
+    pool=None,
+    n_process=1,
+    batch_size=None,
+    evaluation_store=None,
+    history_writer=None,
+    resume=False,
+    fidelities=(),
+    eta=2,
+    screening_measures=None,
+    surrogate=None,
+    replicates=(1, 1),
 ):
+    """Learn the parameters of a model.
+
+    With a `pool`, the evaluations are asynchronous (steady-state NSGA-II):
+    `batch_size` offspring are created at a time, as soon as workers are free,
+    instead of one generation of `pop_size` individuals. The utilisation of
+    the workers is returned as well (None otherwise).
+
+    With an `evaluation_store`, evaluations of the same parameters (with the
+    same configuration, measures and seed) are reused, across runs as well.
+
+    With a `history_writer` (see `save_results.HistoryWriter`), the history is
+    streamed to disk instead of kept in memory and the algorithm is
+    checkpointed, `resume` continues from the last checkpoint if any.
+
+    With `fidelities` (below 1), the offspring are screened by successive
+    halving: simulated at these fidelities (with the `screening_measures`)
+    and only the best `1 / eta` promoted each time, up to the full
+    simulation (see `SuccessiveHalvingEvaluator`).
+
+    With a `surrogate` (see `SurrogateScreening`), more offspring are created
+    and only the ones it predicts best or most uncertain are simulated.
+
+    With `replicates` (minimum, maximum) above 1, each individual is
+    simulated several times and replicates are raced (see
+    `ReplicateRacingEvaluator`): the maximum is only reached while the
+    confidence interval of an individual overlaps a competitor.
+    """
+    # Initialise the random seed
+    if seed is None:
+        seed = random.randint(0, 2**32 - 1)
+
     # Setup the optimisation problem
     problem = model_cls(
         elementwise_runner=runner,
         measures=measures,
         n_obj=len(measures),
         model_config=model_config,
+        cache_dir=cache_dir,
+        context=context,
+        evaluation_store=evaluation_store,
+        seed=seed,
     )
+    problem.screening_measures = screening_measures
 
-    # Initialise the random seed
-    if seed is None:
-        seed = random.randint(0, 2**32 - 1)
-
+    n_offsprings = (batch_size or n_process) if pool is not None else None
+    evaluator = None
+    if max(replicates) > 1:
+        evaluator = ReplicateRacingEvaluator(*replicates)
+    if fidelities:
+        evaluator = SuccessiveHalvingEvaluator(fidelities, eta, evaluator)
     # GA settings
     algorithm = NSGA2(
         pop_size=pop_size,
+        n_offsprings=n_offsprings,
+        evaluator=evaluator,
         # callback=callback,  # TODO check utility
     )
-
-    # https://pymoo.org/interface/termination.html?highlight=termination
-    objective_tolerance = 0.05
-    termination = TerminationCollection(
-        RobustTermination(
-            MultiObjectiveSpaceTermination(tol=objective_tolerance, n_skip=5),
-            period=30,
-        ),
-        MaximumGenerationTermination(n_max_gen=n_max_gen),
+    if surrogate is not None:
+        surrogate.install(algorithm)
+    termination = make_termination(n_max_gen, pop_size, n_offsprings)
+    output = MyOutput(
+        [(i,) for i in range(len(measures))],
+        [13] * len(measures),
     )
+    options = dict(output=output, verbose=True, seed=seed)
+    if history_writer is None:
+        options["save_history"] = True
+    else:
+        options["callback"] = history_writer
+        checkpoint = history_writer.output / "checkpoint.pkl"
+        if resume and checkpoint.exists():
+            algorithm = save_results.load_checkpoint(
+                checkpoint, problem, history_writer
+            )
+            history_writer.discard_after(algorithm.n_iter - 1)
+            resume_termination(algorithm, termination)
+            print("Resume at generation", algorithm.n_iter)
 
-    res = minimize(
-        problem,
-        algorithm,
-        termination,
-        output=MyOutput(
-            [(i,) for i in range(len(measures))],
-            [13] * len(measures),
-        ),
-        verbose=True,
-        save_history=True,
-        seed=seed,
-    )
+    if pool is not None:
+        res, utilisation = steady_state.minimize(
+            problem,
+            algorithm,
+            termination,
+            pool,
+            n_process,
+            **options,
+        )
+    else:
+        res = minimize(
+            problem,
+            algorithm,
+            termination,
+            copy_algorithm=False,
+            **options,
+        )
+        utilisation = None
 
-    return res, seed
+    if history_writer is not None:
+        history_writer.flush()
+    if fidelities:
+        print("Screening simulations:", res.algorithm.evaluator.n_screening)
+    if max(replicates) > 1:
+        racing = res.algorithm.evaluator
+        racing = getattr(racing, "evaluator", None) or racing
+        print("Replicated simulations:", racing.n_replicates)
+    surrogate = SurrogateScreening.of(res.algorithm)
+    if surrogate is not None:
+        print("Simulations saved by the surrogate:", surrogate.n_saved)
+
+    return res, seed, utilisation
 
 
 @click.command()
@@ -116,6 +201,81 @@ def run_nsga_ii(
 )
 @click.option("--model", help="spacenet7 or valenicina")
 @click.option("--config", help="Simulation config file")
+@click.option(
+    "--cache-dir",
+    default=None,
+    help="Directory of the cache shared by the simulations (distance fields, rasters)",
+)
+@click.option(
+    "--asynchronous/--synchronous",
+    default=False,
+    help="Keep all the processes busy: create offspring as processes free up (steady-state NSGA-II)",
+)
+@click.option(
+    "--batch-size",
+    default=None,
+    type=int,
+    help="Number of offspring created at a time when asynchronous (default: nprocess)",
+)
+@click.option(
+    "--reuse-cache",
+    is_flag=True,
+    default=False,
+    help="Store the evaluations in the cache directory (or the output directory) and reuse them",
+)
+@click.option(
+    "--fidelities",
+    default="",
+    help="Fidelities (fractions of the new buildings, e.g. 0.25,0.5) of the successive halving screening of the offspring, none by default",
+)
+@click.option(
+    "--eta",
+    default=2.0,
+    help="Successive halving: fraction 1/eta of the individuals promoted to the next fidelity",
+)
+@click.option(
+    "--screening-measures",
+    default=None,
+    help="Names of the measures of the screening simulations (default: --measures)",
+)
+@click.option(
+    "--surrogate",
+    is_flag=True,
+    default=False,
+    help="Pre-screen the offspring with a random forest surrogate of the measures",
+)
+@click.option(
+    "--surrogate-factor",
+    default=4,
+    help="Number of offspring created and screened by the surrogate per simulated offspring",
+)
+@click.option(
+    "--surrogate-uncertain",
+    default=0.25,
+    help="Fraction of the simulated offspring chosen for the uncertainty of the surrogate",
+)
+@click.option(
+    "--replicates",
+    default=1,
+    help="Number of simulations (replicates) of every individual",
+)
+@click.option(
+    "--max-replicates",
+    default=None,
+    type=int,
+    help="Maximum replicates of the individuals whose confidence interval overlaps a competitor (replicate racing, default: --replicates)",
+)
+@click.option(
+    "--checkpoint-every",
+    default=5,
+    help="Number of generations between two checkpoints of the learning",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    default=False,
+    help="Resume the learning of the given seed from its last checkpoint",
+)
 def learn(
     nprocess,
     nmaxgen,
@@ -125,14 +285,72 @@ def learn(
     measures,
     model,
     config,
+    cache_dir,
+    asynchronous,
+    batch_size,
+    reuse_cache,
+    checkpoint_every,
+    resume,
+    fidelities,
+    eta,
+    screening_measures,
+    surrogate,
+    surrogate_factor,
+    surrogate_uncertain,
+    replicates,
+    max_replicates,
 ):
+    if resume and seed is None:
+        raise click.UsageError("--resume requires the --seed of the learning")
+    if seed is None:
+        seed = random.randint(0, 2**32 - 1)
+    measures = tuple(measures.split(","))
+    fidelities = tuple(float(f) for f in fidelities.split(",") if f)
+    if fidelities and asynchronous:
+        raise click.UsageError("--fidelities screens synchronous generations only")
+    replicates = (replicates, max(max_replicates or replicates, replicates))
+    if max(replicates) > 1 and asynchronous:
+        raise click.UsageError("--replicates races synchronous generations only")
+    if surrogate and asynchronous:
+        raise click.UsageError("--surrogate screens synchronous generations only")
+    if screening_measures is not None:
+        screening_measures = tuple(screening_measures.split(","))
+    # validation side of the measures, sent once to each process
+    context = (
+        MODELS[model]
+        .create_measure_context(config, measures + (screening_measures or ()))
+        .share()
+    )
+
     # initialize the thread pool and create the runner
-    pool = multiprocessing.Pool(nprocess)
-    runner = StarmapParallelization(pool.starmap)
+    pool = multiprocessing.Pool(
+        nprocess,
+        initializer=MeasureContext.install,
+        initargs=(context.state,),
+    )
+    if asynchronous:
+        # the problem is sent with each individual, evaluated in the worker
+        runner = LoopedElementwiseEvaluation()
+    else:
+        runner = StarmapParallelization(pool.starmap)
+
+    evaluation_store = None
+    if reuse_cache:
+        evaluation_store = EvaluationStore(
+            Path(cache_dir or output) / "evaluations.sqlite"
+        )
+        print("Stored evaluations:", len(evaluation_store))
+
+    # history and checkpoints of the learning
+    history_writer = save_results.HistoryWriter(
+        Path(output) / str(seed),
+        MODELS[model],
+        measures,
+        checkpoint_every,
+    )
 
     print("Start learning...")
-    measures = tuple(measures.split(","))
-    res, seed = run_nsga_ii(
+    res, seed, utilisation = run_nsga_ii(
         runner,
         measures,
         MODELS[model],
@@ -140,12 +358,40 @@ def learn(
         psize,
         nmaxgen,
         seed,
+        cache_dir,
+        context,
+        pool if asynchronous else None,
+        nprocess,
+        batch_size,
+        evaluation_store,
+        history_writer,
+        resume,
+        fidelities,
+        eta,
+        screening_measures,
+        (
+            SurrogateScreening(
+                factor=surrogate_factor,
+                uncertain_fraction=surrogate_uncertain,
+                min_samples=2 * psize,
+                seed=seed,
+            )
+            if surrogate
+            else None
+        ),
+        replicates,
     )
 
-    pool.close()
+    # evaluations still running when the learning stopped are discarded
+    if asynchronous:
+        pool.terminate()
+    else:
+        pool.close()
 
     print("Seed:", seed)
     print("Threads:", res.exec_time)
+    if utilisation is not None:
+        print(utilisation)
 
     save_results.as_parquets(
         res,
@@ -155,6 +401,11 @@ def learn(
         MODELS[model],
         measures,
     )
+    surrogate = SurrogateScreening.of(res.algorithm)
+    if surrogate is not None:
+        save_results.save_dataframe(
+            surrogate.to_frame(), Path(output) / str(seed) / "surrogate.parquet"
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,114 @@
+"""Multi-fidelity screening of the individuals (successive halving).
+
+A full simulation places all the new buildings of the configuration. The
+individuals of each batch are first simulated at reduced fidelities (a
+fraction of the new buildings, coarser gradient ascent, optionally cheaper
+measures, see `ProblemBase.fidelity`) and only the most promising ones are
+promoted to the next fidelity, up to the full simulation.
+"""
+
+import math
+from typing import Optional, Sequence
+
+import numpy as np
+from pymoo.core.evaluator import Evaluator
+from pymoo.core.problem import ElementwiseEvaluationFunction
+from pymoo.util.nds.non_dominated_sorting import NonDominatedSorting
+
+__all__ = ["SuccessiveHalvingEvaluator", "screening_order"]
+
+
+def screening_order(F, G=None):
+    """Order of the individuals from the most to the least promising:
+    feasible first, then by non-dominated front and by the sum of the
+    normalised objectives."""
+    F = np.asarray(F, dtype=float)
+    violation = np.zeros(len(F))
+    if G is not None and np.size(G):
+        violation = (
+            np.maximum(np.asarray(G, dtype=float), 0).reshape(len(F), -1).sum(axis=1)
+        )
+    rank = np.full(len(F), len(F))
+    finite = np.isfinite(F).all(axis=1)
+    if finite.any():
+        rank[finite] = NonDominatedSorting().do(F[finite], return_rank=True)[1]
+    low, high = np.nanmin(F, axis=0), np.nanmax(F, axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score = np.nan_to_num(((F - low) / (high - low)).sum(axis=1), nan=np.inf)
+    return np.lexsort((score, rank, violation))
+
+
+class SuccessiveHalvingEvaluator(Evaluator):
+    """Evaluate the individuals with successive halving over the fidelities.
+
+    At each fidelity below 1 the remaining individuals are simulated and the
+    best `1 / eta` of them (see `screening_order`) are promoted to the next
+    fidelity. The promoted individuals are evaluated at full fidelity, the
+    others get the worst objectives of the full evaluations of the batch
+    (their screening constraints are kept) and are flagged as `rejected`. They
+    are also marked infeasible with an infinite constraint violation, so that
+    the survival always ranks them last and they never reach the result.
+
+    Args:
+        fidelities: increasing fidelities of the screening rungs, below 1.
+        eta: reduction factor between two rungs.
+        evaluator: evaluator of the promoted individuals (e.g. replicate
+            racing), a single simulation by default.
+    """
+
+    def __init__(
+        self,
+        fidelities: Sequence[float] = (0.25,),
+        eta: float = 2,
+        evaluator: Optional[Evaluator] = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.fidelities = sorted(f for f in fidelities if f < 1)
+        self.eta = eta
+        self.evaluator = evaluator
+        # number of simulations per fidelity
+        self.n_screening = {f: 0 for f in self.fidelities}
+
+    def _screen(self, problem, X, fidelity):
+        """Screening objectives and constraints at the given fidelity."""
+        problem.fidelity = fidelity
+        try:
+            outs = problem.elementwise_runner(
+                ElementwiseEvaluationFunction(problem, [], {}), X
+            )
+        finally:
+            problem.fidelity = 1.0
+        self.n_screening[fidelity] += len(X)
+        G = [out.get("G") for out in outs]
+        return np.array([out["F"] for out in outs]), (
+            None if G[0] is None else np.array(G)
+        )
+
+    def _eval(self, problem, pop, evaluate_values_of, **kwargs):
+        promoted = np.arange(len(pop))
+        G = None
+        for fidelity in self.fidelities:
+            n_promoted = math.ceil(len(promoted) / self.eta)
+            if n_promoted >= len(promoted):
+                continue
+            F_screen, G_screen = self._screen(problem, pop[promoted].get("X"), fidelity)
+            if G_screen is not None:
+                if G is None:
+                    G = np.zeros((len(pop), G_screen.shape[1]))
+                G[promoted] = G_screen
+            promoted = promoted[screening_order(F_screen, G_screen)[:n_promoted]]
+
+        if self.evaluator is not None:
+            self.evaluator._eval(problem, pop[promoted], evaluate_values_of, **kwargs)
+        else:
+            super()._eval(problem, pop[promoted], evaluate_values_of, **kwargs)
+        rejected = np.setdiff1d(np.arange(len(pop)), promoted)
+        if len(rejected):
+            worst = pop[promoted].get("F").max(axis=0)
+            pop[rejected].set("F", np.tile(worst, (len(rejected), 1)))
+            pop[rejected].set("rejected", True)
+            if G is not None:
+                pop[rejected].set("G", G[rejected])
+            pop[rejected].set("CV", np.full((len(rejected), 1), np.inf))
+            pop[rejected].apply(lambda ind: ind.evaluated.update(evaluate_values_of))
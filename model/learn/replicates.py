@@ -0,0 +1,101 @@
+"""Replicated evaluations of the stochastic simulations, with racing.
+
+A simulation is random (start points, shapes and orientations of the new
+buildings): each individual is simulated a few times in parallel and its
+objectives are the means of the replicates. Replicates are only added to the
+individuals whose confidence interval overlaps another individual or the
+current population (see `ReplicateRace`).
+"""
+import numpy as np
+from pymoo.core.evaluator import Evaluator
+
+from abmlib.learning.racing import ReplicateRace
+
+__all__ = ["ReplicateEvaluation", "ReplicateRacingEvaluator"]
+
+
+class ReplicateEvaluation:
+    """Elementwise evaluation of (x, replicate) pairs, a replicate is stored
+    separately in the evaluation store."""
+
+    def __init__(self, problem):
+        self.problem = problem
+
+    def __call__(self, task):
+        x, replicate = task
+        out = {}
+        self.problem._evaluate(x, out, replicate=replicate)
+        return out
+
+
+class ReplicateRacingEvaluator(Evaluator):
+    """Evaluate the individuals with replicate racing.
+
+    The objectives of an individual are the means of its replicates, their
+    confidence bounds (`F_low`, `F_high`) and the number of replicates
+    (`n_replicates`) are kept on the individual. Infeasible individuals are
+    not replicated.
+
+    Args:
+        min_replicates: replicates of every individual.
+        max_replicates: maximum replicates of an individual.
+        confidence: level of the confidence intervals.
+    """
+
+    def __init__(self, min_replicates=2, max_replicates=6, confidence=0.95, **kwargs):
+        super().__init__(**kwargs)
+        self.min_replicates = min_replicates
+        self.max_replicates = max_replicates
+        self.confidence = confidence
+        self.n_replicates = 0
+
+    def _competitors(self, algorithm):
+        """Confidence bounds of the feasible Pareto front of the current
+        population (the objectives when unknown)."""
+        pop = getattr(algorithm, "pop", None)
+        if pop is None or len(pop) == 0:
+            return None
+        front = pop[np.array([r == 0 for r in pop.get("rank")]) & pop.get("feas")]
+        if len(front) == 0:
+            return None
+        F = front.get("F")
+
+        def bound(values):
+            values = np.array(
+                [F[i] if b is None else b for i, b in enumerate(values)], dtype=float
+            )
+            return np.where(np.isfinite(values), values, F)
+
+        return bound(front.get("F_low")), bound(front.get("F_high"))
+
+    def _eval(self, problem, pop, evaluate_values_of, algorithm=None, **kwargs):
+        X = pop.get("X")
+        race = ReplicateRace(
+            len(pop),
+            self.min_replicates,
+            self.max_replicates,
+            self.confidence,
+            competitors=self._competitors(algorithm),
+        )
+        G = [None] * len(pop)
+        pending = race.pending()
+        while len(pending):
+            tasks = [(X[i], len(race.values[i])) for i in pending]
+            outs = problem.elementwise_runner(ReplicateEvaluation(problem), tasks)
+            self.n_replicates += len(tasks)
+            for i, out in zip(pending, outs):
+                race.add(i, out["F"])
+                G[i] = out.get("G")
+                if G[i] is not None and (np.asarray(G[i]) > 0).any():
+                    # constraints do not depend on the simulation
+                    race.stop(i)
+            pending = race.pending()
+
+        mean, low, high = race.bounds()
+        pop.set("F", mean)
+        if G[0] is not None:
+            pop.set("G", np.array(G, dtype=float))
+        pop.set("F_low", list(low))
+        pop.set("F_high", list(high))
+        pop.set("n_replicates", race.n_replicates)
+        pop.apply(lambda ind: ind.evaluated.update(evaluate_values_of))
@@ -1,10 +1,14 @@
+import os
 import dill
+import tempfile
+import time
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 import pyarrow as pa
 import pyarrow.parquet as pq
+from pymoo.core.callback import Callback
 
 
 def as_dump(res, filename: Path):
@@ -18,6 +22,127 @@ def as_dump(res, filename: Path):
         dill.dump(save, file)
 
 
+class HistoryWriter(Callback):
+    """Stream the history of the learning to Parquet and checkpoint the
+    algorithm, called after each generation.
+
+    Generations are buffered and written every `checkpoint_every` generations
+    as one file of the `history` (best F) and `population` (X and F of every
+    individual) datasets of the output directory, then the algorithm is
+    saved (see `load_checkpoint`): memory does not grow with the number of
+    generations and an interrupted learning resumes from the last checkpoint.
+    """
+
+    def __init__(self, output: Path, model_cls, measures, checkpoint_every=5):
+        super().__init__()
+        self.output = output
+        self.model_cls = model_cls
+        self.measures = list(measures)
+        self.checkpoint_every = checkpoint_every
+        self.history = []
+        self.population = []
+        self.first_gen = None
+        output.mkdir(parents=True, exist_ok=True)
+
+    def notify(self, algorithm):
+        n_gen, n_eval = algorithm.n_iter, algorithm.evaluator.n_eval
+        if self.first_gen is None:
+            self.first_gen = n_gen
+        self.history.append([n_gen, n_eval, *algorithm.opt[0].F])
+
+        X, F = algorithm.pop.get("X", "F")
+        population = pd.DataFrame(
+            np.apply_along_axis(self.model_cls.build_params, 1, X),
+            columns=self.model_cls.params_names(),
+        )
+        population[self.measures] = F
+        population.insert(0, "n_eval", n_eval)
+        population.insert(0, "n_gen", n_gen)
+        self.population.append(population)
+
+        if n_gen % self.checkpoint_every == 0:
+            self.checkpoint(algorithm)
+
+    def flush(self):
+        """Write the buffered generations."""
+        if not self.history:
+            return
+        name = f"gen-{self.first_gen:05d}-{self.history[-1][0]:05d}.parquet"
+        for dataset, data in [
+            (
+                "history",
+                pd.DataFrame(
+                    self.history, columns=["n_gen", "n_eval", *self.measures]
+                ),
+            ),
+            ("population", pd.concat(self.population, ignore_index=True)),
+        ]:
+            (self.output / dataset).mkdir(exist_ok=True)
+            save_dataframe(data, self.output / dataset / name)
+        self.history, self.population, self.first_gen = [], [], None
+
+    def checkpoint(self, algorithm):
+        """Write the buffered generations and save the algorithm."""
+        self.flush()
+        save_checkpoint(algorithm, self.output / "checkpoint.pkl")
+
+    def discard_after(self, n_gen):
+        """Remove the generations written after a checkpoint (resume)."""
+        for dataset in ["history", "population"]:
+            for path in (self.output / dataset).glob("gen-*.parquet"):
+                if int(path.stem.split("-")[2]) > n_gen:
+                    path.unlink()
+
+
+def save_checkpoint(algorithm, path: Path):
+    """Save the state of the algorithm (after the current generation),
+    without the problem, the callback and the history."""
+    problem, callback, history = (
+        algorithm.problem,
+        algorithm.callback,
+        algorithm.history,
+    )
+    algorithm.problem, algorithm.callback, algorithm.history = None, None, []
+    # called before the end of the generation
+    algorithm.n_iter += 1
+    try:
+        state = {
+            "algorithm": dill.dumps(algorithm),
+            "numpy_random_state": np.random.get_state(),
+            # the time between two runs does not count
+            "elapsed_time": time.time() - algorithm.start_time,
+        }
+    finally:
+        algorithm.n_iter -= 1
+        algorithm.problem, algorithm.callback, algorithm.history = (
+            problem,
+            callback,
+            history,
+        )
+    fd, tmp = tempfile.mkstemp(suffix=".pkl", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as file:
+            dill.dump(state, file)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def load_checkpoint(path: Path, problem, callback=None):
+    """Algorithm saved by `save_checkpoint`, ready to continue on `problem`
+    (its execution time continues from the saved one)."""
+    with open(path, "rb") as file:
+        state = dill.load(file)
+    algorithm = dill.loads(state["algorithm"])
+    np.random.set_state(state["numpy_random_state"])
+    algorithm.start_time = time.time() - state["elapsed_time"]
+    algorithm.problem = problem
+    if callback is not None:
+        algorithm.callback = callback
+    return algorithm
+
+
 def as_parquets(res, seed, psize, output_base: Path, model_cls, measures):
     output_base.mkdir(parents=True, exist_ok=True)
     output = output_base / str(seed)
@@ -47,11 +172,19 @@ def as_parquets(res, seed, psize, output_base: Path, model_cls, measures):
     )
     save_dataframe(F, output / "F.parquet")
 
-    history = pd.DataFrame(
-        data=[e.opt[0].F for e in res.history],
-        columns=measures,
-        index=[e.evaluator.n_eval for e in res.history],
-    )
+    if res.history:
+        history = pd.DataFrame(
+            data=[e.opt[0].F for e in res.history],
+            columns=measures,
+            index=[e.evaluator.n_eval for e in res.history],
+        )
+    else:
+        # streamed by HistoryWriter
+        history = (
+            pd.read_parquet(output / "history")
+            .sort_values("n_gen")
+            .set_index("n_eval")[list(measures)]
+        )
     save_dataframe(history, output / "history.parquet")
 
     n_eval = history.index.max()
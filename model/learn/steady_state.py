@@ -0,0 +1,166 @@
+"""Asynchronous (steady-state) evaluation of a pymoo algorithm.
+
+The synchronous runner waits for the slowest simulation of each generation.
+Here every worker receives a new individual as soon as it is free: offspring
+are asked from the current population whenever the queue of individuals to
+evaluate is empty, and the algorithm is told the evaluated individuals by
+batches, in the order they complete.
+"""
+import queue
+import time
+from typing import List, NamedTuple, Optional
+
+from pymoo.core.population import Population
+from pymoo.core.problem import ElementwiseEvaluationFunction
+
+__all__ = ["Utilisation", "evaluate_individual", "minimize"]
+
+
+class Utilisation(NamedTuple):
+    """Usage of the workers during an asynchronous optimisation."""
+
+    n_workers: int
+    wall_time: float
+    """Duration of the optimisation (s)."""
+    busy_time: float
+    """Time spent in the evaluations of all the workers (s)."""
+    n_eval: int
+    """Evaluations told to the algorithm."""
+    n_discarded: int
+    """Evaluations still running when the algorithm terminated."""
+
+    @property
+    def ratio(self) -> float:
+        if self.wall_time <= 0:
+            return 0.0
+        return self.busy_time / (self.n_workers * self.wall_time)
+
+    def __str__(self) -> str:
+        return (
+            f"Worker utilisation: {100 * self.ratio:.1f}% "
+            f"({self.busy_time:.0f} busy core-seconds over {self.n_workers} x "
+            f"{self.wall_time:.0f}s, {self.n_eval} evaluations, "
+            f"{self.n_discarded} discarded)"
+        )
+
+
+def evaluate_individual(problem, x):
+    """Evaluate one individual (in a worker), with the evaluation times."""
+    start = time.time()
+    out = ElementwiseEvaluationFunction(problem, [], {})(x)
+    return out, start, time.time()
+
+
+class _Precomputed:
+    """Elementwise runner returning evaluations done beforehand, used to give
+    the results of the workers to the evaluator of the algorithm."""
+
+    def __init__(self, outs: List[dict]):
+        self.outs = outs
+
+    def __call__(self, f, X):
+        return self.outs
+
+
+def minimize(
+    problem,
+    algorithm,
+    termination,
+    pool,
+    n_workers: int,
+    batch_size: Optional[int] = None,
+    **kwargs,
+):
+    """Same as `pymoo.optimize.minimize` with the evaluations dispatched
+    asynchronously to a process pool.
+
+    Args:
+        problem: elementwise problem, sent with each individual.
+        algorithm: ask and tell algorithm, its `n_offsprings` individuals are
+            asked at once. An algorithm already set up (e.g. loaded from a
+            checkpoint) continues where it stopped.
+        termination: termination of the algorithm.
+        pool: pool of `n_workers` processes (`multiprocessing.Pool`).
+        n_workers: number of evaluations to keep running.
+        batch_size: number of evaluated individuals told at once, by default
+            the number of offspring (the first population is told at once).
+        **kwargs: options of `algorithm.setup` (seed, verbose, output, ...).
+
+    Returns:
+        The result of the algorithm and the utilisation of the workers.
+    """
+    if algorithm.problem is None:
+        algorithm.setup(problem, termination=termination, **kwargs)
+    batch_size = batch_size or algorithm.n_offsprings
+    results = queue.SimpleQueue()
+    # individuals waiting for a worker, and being evaluated (by task id)
+    waiting: List = []
+    running = {}
+    evaluated: List = []
+    busy_time, n_tasks = 0.0, 0
+    start = time.time()
+
+    def submit(individual):
+        nonlocal n_tasks
+        task, n_tasks = n_tasks, n_tasks + 1
+        running[task] = individual
+        pool.apply_async(
+            evaluate_individual,
+            (problem, individual.X),
+            callback=lambda result: results.put((task, result, None)),
+            error_callback=lambda error: results.put((task, None, error)),
+        )
+
+    def tell(individuals):
+        pop = Population.create(*individuals)
+        runner = problem.elementwise_runner
+        problem.elementwise_runner = _Precomputed([i.get("out") for i in individuals])
+        try:
+            algorithm.evaluator.eval(problem, pop, algorithm=algorithm)
+        finally:
+            problem.elementwise_runner = runner
+        algorithm.tell(infills=pop)
+
+    # the initial population (unless the algorithm is resumed)
+    if not algorithm.is_initialized:
+        waiting.extend(algorithm.ask())
+    first_batch = len(waiting)
+
+    while algorithm.has_next():
+        # keep all the workers busy
+        while len(running) < n_workers:
+            if not waiting and algorithm.is_initialized:
+                offspring = algorithm.ask()
+                if offspring is None or len(offspring) == 0:
+                    break
+                waiting.extend(offspring)
+            if not waiting:
+                break
+            submit(waiting.pop(0))
+        if not running:
+            break
+
+        task, result, error = results.get()
+        individual = running.pop(task)
+        if error is not None:
+            raise error
+        out, started, finished = result
+        busy_time += finished - started
+        individual.set("out", out)
+        evaluated.append(individual)
+
+        size = first_batch if not algorithm.is_initialized else batch_size
+        if len(evaluated) >= size:
+            tell(evaluated)
+            evaluated = []
+
+    utilisation = Utilisation(
+        n_workers=n_workers,
+        wall_time=time.time() - start,
+        busy_time=busy_time,
+        n_eval=algorithm.evaluator.n_eval,
+        n_discarded=len(running),
+    )
+    res = algorithm.result()
+    res.algorithm = algorithm
+    return res, utilisation
@@ -0,0 +1,202 @@
+"""Surrogate-assisted pre-screening of the offspring.
+
+A random forest trained on the evaluated individuals predicts the objectives
+of a larger batch of offspring. Only the most promising of them (and a few of
+the most uncertain ones, to keep improving the surrogate) are simulated.
+"""
+import math
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from scipy.stats import spearmanr
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import r2_score
+from pymoo.operators.survival.rank_and_crowding.metrics import calc_crowding_distance
+from pymoo.util.nds.non_dominated_sorting import NonDominatedSorting
+
+__all__ = ["SurrogateScreening", "rank_and_crowding_order"]
+
+
+def rank_and_crowding_order(F):
+    """Order of NSGA-II survival: by non-dominated front, then by decreasing
+    crowding distance in the front."""
+    fronts = NonDominatedSorting().do(F)
+    rank = np.empty(len(F), dtype=int)
+    crowding = np.empty(len(F))
+    for i, front in enumerate(fronts):
+        rank[front] = i
+        crowding[front] = calc_crowding_distance(F[front])
+    return np.lexsort((-crowding, rank))
+
+
+class SurrogateMating:
+    """Mating creating `factor` times more offspring than asked, screened by
+    the surrogate."""
+
+    def __init__(self, mating, surrogate):
+        self.mating = mating
+        self.surrogate = surrogate
+
+    def do(self, problem, pop, n_offsprings, **kwargs):
+        self.surrogate.fit()
+        if self.surrogate.model is None:
+            return self.mating.do(problem, pop, n_offsprings, **kwargs)
+        candidates = self.mating.do(
+            problem, pop, self.surrogate.factor * n_offsprings, **kwargs
+        )
+        return self.surrogate.select(candidates, n_offsprings, pop)
+
+    def __getattr__(self, name):
+        # attributes of the mating (not during copies and unpickling)
+        if name == "mating":
+            raise AttributeError(name)
+        return getattr(self.mating, name)
+
+
+class SurrogateScreening:
+    """Random forest surrogate of the objectives, trained on all the
+    evaluated individuals (except failed simulations) before each mating.
+
+    The accuracy of the predictions (R2 and rank correlation per objective)
+    and the simulations saved are logged for each generation (`records`).
+
+    Args:
+        factor: number of candidate offspring per simulated offspring.
+        uncertain_fraction: fraction of the simulated offspring chosen among
+            the most uncertain predictions instead of the best ones.
+        min_samples: evaluated individuals needed to use the surrogate.
+        failure: objectives at or above this value are failed simulations.
+        n_estimators: number of trees of the forest.
+        seed: random seed of the forest.
+    """
+
+    def __init__(
+        self,
+        factor: int = 4,
+        uncertain_fraction: float = 0.25,
+        min_samples: int = 100,
+        failure: float = 1e8,
+        n_estimators: int = 100,
+        seed: Optional[int] = None,
+    ):
+        self.factor = factor
+        self.uncertain_fraction = uncertain_fraction
+        self.min_samples = min_samples
+        self.failure = failure
+        self.n_estimators = n_estimators
+        self.seed = seed
+        self.X: List[np.ndarray] = []
+        self.F: List[np.ndarray] = []
+        self.model: Optional[RandomForestRegressor] = None
+        self._scale = None
+        self._n_trained = 0
+        self.n_generation = 0
+        self.n_saved = 0
+        # one row per screened generation
+        self.records: List[dict] = []
+        self._pending: Optional[dict] = None
+
+    @staticmethod
+    def of(algorithm):
+        """Screening installed on an algorithm, or None."""
+        if isinstance(algorithm.mating, SurrogateMating):
+            return algorithm.mating.surrogate
+        return None
+
+    def install(self, algorithm):
+        """Screen the offspring of an algorithm (before its setup)."""
+        algorithm.mating = SurrogateMating(algorithm.mating, self)
+        algorithm.evaluator.callback = self.record
+        return algorithm
+
+    def record(self, pop):
+        """Add the evaluated individuals (evaluator callback) and log the
+        accuracy of their predictions."""
+        X, F, rejected = pop.get("X", "F", "rejected")
+        valid = np.isfinite(F).all(axis=1) & (F < self.failure).all(axis=1)
+        # objectives of the individuals rejected by a multi-fidelity screening
+        # are not simulated
+        valid &= np.array([r is not True for r in rejected])
+        self.X.extend(X[valid])
+        self.F.extend(F[valid])
+
+        record, self._pending = self._pending, None
+        if record is None:
+            return
+        predicted = pop.get("predicted_F")
+        screened = np.array([p is not None for p in predicted]) & valid
+        predicted = np.array([p for p in predicted[screened]])
+        actual = F[screened]
+        for i in range(F.shape[1]):
+            if len(actual) > 1 and np.ptp(actual[:, i]) > 0:
+                r2 = r2_score(actual[:, i], predicted[:, i])
+                correlation = spearmanr(actual[:, i], predicted[:, i])[0]
+            else:
+                r2, correlation = np.nan, np.nan
+            record[f"r2_{i}"] = r2
+            record[f"rank_correlation_{i}"] = correlation
+        self.records.append(record)
+        print(
+            f"Surrogate: {record['n_simulated']} simulated, {record['n_saved']} "
+            f"saved ({self.n_saved} in total), R2 "
+            + ", ".join(f"{record[f'r2_{i}']:.2f}" for i in range(F.shape[1]))
+            + ", rank correlation "
+            + ", ".join(
+                f"{record[f'rank_correlation_{i}']:.2f}" for i in range(F.shape[1])
+            )
+        )
+
+    def fit(self):
+        """Train the forest on the new evaluations, if enough."""
+        if len(self.X) < self.min_samples or len(self.X) == self._n_trained:
+            return
+        X, F = np.array(self.X), np.array(self.F)
+        mean, std = F.mean(axis=0), F.std(axis=0)
+        std[std == 0] = 1
+        self._scale = (mean, std)
+        self.model = RandomForestRegressor(
+            n_estimators=self.n_estimators, random_state=self.seed, n_jobs=-1
+        ).fit(X, (F - mean) / std)
+        self._n_trained = len(self.X)
+
+    def predict(self, X):
+        """Predicted objectives and their uncertainty (standard deviation
+        between the trees, in standard deviations of the objectives)."""
+        trees = np.stack(
+            [tree.predict(X).reshape(len(X), -1) for tree in self.model.estimators_]
+        )
+        mean, std = self._scale
+        return trees.mean(axis=0) * std + mean, trees.std(axis=0).mean(axis=1)
+
+    def select(self, candidates, n, pop=None):
+        """The `n` candidates to simulate: the best predictions (ranked with
+        the current population `pop`) and the most uncertain ones."""
+        self.n_generation += 1
+        if len(candidates) <= n:
+            return candidates
+        F, uncertainty = self.predict(candidates.get("X"))
+        if pop is None:
+            order = rank_and_crowding_order(F)
+        else:
+            order = rank_and_crowding_order(np.vstack([F, pop.get("F")]))
+            order = order[order < len(F)]
+        n_best = n - math.floor(self.uncertain_fraction * n)
+        selected = order[:n_best]
+        others = order[n_best:]
+        selected = np.concatenate(
+            [selected, others[np.argsort(-uncertainty[others])[: n - n_best]]]
+        )
+        offspring = candidates[selected]
+        offspring.set("predicted_F", list(F[selected]))
+        self.n_saved += len(candidates) - n
+        self._pending = {
+            "generation": self.n_generation,
+            "n_candidates": len(candidates),
+            "n_simulated": n,
+            "n_saved": len(candidates) - n,
+        }
+        return offspring
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.records)
@@ -0,0 +1,40 @@
+"""Termination of the learning, and its update when a learning is resumed."""
+import math
+
+from pymoo.termination.collection import TerminationCollection
+from pymoo.termination.ftol import MultiObjectiveSpaceTermination
+from pymoo.termination.max_gen import MaximumGenerationTermination
+from pymoo.termination.robust import RobustTermination
+
+__all__ = ["make_termination", "resume_termination"]
+
+
+def make_termination(n_max_gen, pop_size, n_offsprings=None):
+    """Termination of the learning, in generations of `pop_size` evaluations.
+
+    With fewer offspring per iteration (asynchronous learning) the periods
+    are scaled so that they cover the same number of evaluations.
+    """
+    k = math.ceil(pop_size / (n_offsprings or pop_size))
+    # https://pymoo.org/interface/termination.html?highlight=termination
+    objective_tolerance = 0.05
+    return TerminationCollection(
+        RobustTermination(
+            MultiObjectiveSpaceTermination(tol=objective_tolerance, n_skip=6 * k - 1),
+            period=30 * k,
+        ),
+        MaximumGenerationTermination(n_max_gen=n_max_gen * k),
+    )
+
+
+def resume_termination(algorithm, termination):
+    """Apply the maximum number of generations of `termination` (made by
+    `make_termination`) to a resumed algorithm, the convergence criterion
+    keeps its state."""
+    *criteria, _ = algorithm.termination.terminations
+    max_generation = termination.terminations[-1]
+    # a checkpoint is saved with the next generation as n_iter (see
+    # `save_checkpoint`), the progress counts the completed ones
+    max_generation.perc = (algorithm.n_iter - 1) / max_generation.n_max_gen
+    algorithm.termination.terminations = (*criteria, max_generation)
+    algorithm.termination.perc = max(c.perc for c in (*criteria, max_generation))
@@ -3,9 +3,10 @@ import numpy as np
 from math import pi
 from time import time
 
+from abmlib.cache import EvaluationStore
 from abmlib.config import load_config
 from abmlib.logger import NoLogger
-from abmlib.measures import GridDensity
+from abmlib.measures import MeasureContext
 from abmlib.influences.gradient import NoValidStartPoint
 
 from models.valenicina import Valenicina
@@ -14,22 +15,33 @@ from .base import ProblemBase
 
 
 class Problem(ProblemBase):
+    GRID_DENSITY_SIZE = 50
+
     def __init__(
         self,
         measures,
         n_obj: int,
         # model_cls,
         model_config: str,
+        cache_dir: str | None = None,
+        context: MeasureContext | None = None,
+        evaluation_store: EvaluationStore | None = None,
+        seed: int | None = None,
         **kwargs,
     ):
         self.measures = measures
         self.config_path = model_config
+        self.cache_dir = cache_dir
+        self.evaluation_store = evaluation_store
+        self.seed = seed
 
         config = load_config(self.config_path)
-        self.validation = self.parse_config__get_validation_dataset(config)
         self.n_new_buildings = self.parse_config__get_n_new_buildings(config)
-        border = self.parse_config__get_border(config)
-        self.grid_density_grid = GridDensity().build_grid(border, 50)
+        self.context = (
+            context
+            if context is not None
+            else self.create_measure_context(model_config, measures)
+        )
 
         # Params MINs
         XL = [0] * 14
@@ -100,28 +112,30 @@ class Problem(ProblemBase):
         """Run a simulation with the given parameters."""
         start = time()
 
-        model = Valenicina(load_config(self.config_path), NoLogger())
+        model = Valenicina(self.load_model_config(), NoLogger())
+        self.set_measure_baseline(model)
 
         params = self.build_params(X)
         model.change_influences(params)
+        self.apply_fidelity(model)
 
-        self.change_landowner_rule((25, 75), self.n_new_buildings)
+        self.change_landowner_rule((25, 75), self.n_simulated_buildings)
 
         try:
             model.step()
         except ImpossibleBuild:
             # When the gradient descent has not found anything
-            return np.array([1e8] * self.n_obj)
+            return self.failed_measures(1e8)
         except NoValidStartPoint:
-            return np.array([1e8] * self.n_obj)
+            return self.failed_measures(1e8)
 
         return self.apply_measures(model, time() - start)
 
-    def _evaluate(self, x, out, *args, **kwargs):
+    def _evaluate_parameters(self, x, out, *args, **kwargs):
         if x[11] < x[12]:
             out["F"] = self._run_simulation(x)
         else:
             # if constraints are not respected
-            out["F"] = np.stack([1e32] * self.n_obj)
+            out["F"] = self.failed_measures(1e32)
 
         out["G"] = np.stack([x[11] - x[12]])
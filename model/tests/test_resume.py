@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+# CMD: python -m unittest model.tests.test_resume
+
+import sys, os
+
+import unittest
+import tempfile
+from pathlib import Path
+
+testdir = os.path.dirname(__file__)
+srcdir = "../"
+sys.path.insert(0, os.path.abspath(os.path.join(testdir, srcdir)))
+
+from pymoo.algorithms.moo.nsga2 import NSGA2
+from pymoo.optimize import minimize
+from pymoo.problems import get_problem
+
+from learn.termination import make_termination, resume_termination
+
+try:
+    import learn.save_results as save_results
+except ImportError:  # pyarrow unavailable
+    save_results = None
+
+
+class Model:
+    @staticmethod
+    def build_params(x):
+        return list(x)
+
+    @staticmethod
+    def params_names():
+        return [f"x{i}" for i in range(30)]
+
+
+@unittest.skipIf(save_results is None, "save_results needs pyarrow")
+class TestResume(unittest.TestCase):
+    POP_SIZE = 10
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output = Path(self.directory.name)
+        self.problem = get_problem("zdt1")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_learning(self, n_max_gen, resume=False):
+        writer = save_results.HistoryWriter(
+            self.output, Model, ["f1", "f2"], checkpoint_every=1
+        )
+        algorithm = NSGA2(pop_size=self.POP_SIZE)
+        termination = make_termination(n_max_gen, self.POP_SIZE)
+        if resume:
+            algorithm = save_results.load_checkpoint(
+                self.output / "checkpoint.pkl", self.problem, writer
+            )
+            writer.discard_after(algorithm.n_iter - 1)
+            resume_termination(algorithm, termination)
+        res = minimize(
+            self.problem,
+            algorithm,
+            termination,
+            copy_algorithm=False,
+            seed=1,
+            callback=writer,
+        )
+        writer.flush()
+        return res
+
+    def test_resume_runs_the_last_generation(self):
+        res = self.run_learning(2)
+        self.assertEqual(res.algorithm.evaluator.n_eval, 2 * self.POP_SIZE)
+        res = self.run_learning(3, resume=True)
+        self.assertEqual(res.algorithm.evaluator.n_eval, 3 * self.POP_SIZE)
+
+    def test_resume_with_the_same_generations_stops(self):
+        self.run_learning(2)
+        res = self.run_learning(2, resume=True)
+        self.assertEqual(res.algorithm.evaluator.n_eval, 2 * self.POP_SIZE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -78,7 +78,7 @@ def sample_influences(row, model_name):
 
     model = init_model(config, params, enable_logs=False)
 
-    start = model.grid.get_agents_as_GeoDataFrame(Dwelling)
+    start = model.get_agents_as_GeoDataFrame(Dwelling)
     validation_buildings = validation.loc[~validation.intersects(start.union_all())]
 
     errors: int = 0
@@ -8,7 +8,7 @@ import pandas as pd
 import geopandas as gpd
 
 from tqdm.contrib.concurrent import process_map
-from scipy.spatial import cKDTree
+from shapely import get_coordinates
 
 sys.path.append(".")
 
@@ -16,6 +16,12 @@ from abmlib import Model, GeoAgent
 from abmlib.logger import Logger, NoLogger
 from abmlib.config import load_config
 from abmlib.influences.gradient import NoValidStartPoint
+from abmlib.measures import (
+    CentroidMatching,
+    MeasureContext,
+    MeasurePipeline,
+    greedy_matching,
+)
 
 sys.path.append("./model")
 
@@ -38,74 +44,19 @@ def sum_of_min_euclidean_distances(a: gpd.GeoDataFrame, b: gpd.GeoDataFrame) ->
     """Return the sum of minimum Euclidean distances between two GeoDataFrames
     based on centroids, ensuring that points in `b` are only used once (without replacement).
     """
-    # Extract centroids as NumPy arrays (x, y coordinates)
-    centroids_a = np.array(list(zip(a.geometry.centroid.x, a.geometry.centroid.y)))
-    centroids_b = np.array(list(zip(b.geometry.centroid.x, b.geometry.centroid.y)))
-
-    # Variable to keep track of the sum of minimum distances
-    result = 0.0
-
-    # While there are centroids in both a and b, we match them one by one
-    for point in centroids_a:
-        # Build KDTree for centroids_b (points left in `b`)
-        tree_b = cKDTree(centroids_b)
-
-        # Find the nearest neighbor for the current point in centroids_a
-        distance, index = tree_b.query(point, k=1)
-
-        # Add the nearest distance to the result
-        result += distance
-
-        # Remove the matched point in centroids_b (without replacement)
-        centroids_b = np.delete(centroids_b, index, axis=0)
-
-        # Stop if no more points are available in centroids_b
-        if centroids_b.shape[0] == 0:
-            break
-
-    return result
+    _, distances = greedy_matching(
+        get_coordinates(a.geometry.centroid),
+        get_coordinates(b.geometry.centroid),
+    )
+    # points of `a` left when `b` is exhausted are ignored
+    return float(distances[np.isfinite(distances)].sum())
 
 
 def sum_of_min_euclidean_distances2(a: gpd.GeoDataFrame, b: gpd.GeoDataFrame) -> float:
     """Return the sum of minimum Euclidean distances between two GeoDataFrames,
     ensuring that points in `b` are only used once (without replacement), optimized for large datasets.
     """
-    # Extract centroids as NumPy arrays (x, y coordinates)
-    centroids_a = np.array(list(zip(a.geometry.centroid.x, a.geometry.centroid.y)))
-    centroids_b = np.array(list(zip(b.geometry.centroid.x, b.geometry.centroid.y)))
-
-    # Build a KDTree for centroids_b for fast nearest-neighbour search
-    tree_b = cKDTree(centroids_b)
-
-    # Array to keep track of which points in b have been used
-    used = np.full(len(centroids_b), False)
-
-    # Variable to keep track of the sum of minimum distances
-    result = 0.0
-
-    # Iterate over all points in centroids_a
-    for point in centroids_a:
-        # Initialize a large distance
-        min_distance = float("inf")
-        min_index = None
-
-        # Find the nearest neighbours for the point in centroids_a
-        distances, indices = tree_b.query(point, k=len(centroids_b))
-
-        # Find the first unused nearest neighbor
-        for distance, index in zip(distances, indices):
-            if not used[index]:  # Find the first unused neighbour
-                min_distance = distance
-                min_index = index
-                break
-
-        # Add the minimum distance to the result
-        result += min_distance
-
-        # Mark the used point in centroids_b as used
-        used[min_index] = True
-
-    return result
+    return CentroidMatching().apply(a, b)
 
 
 def init_model(config: dict, params, enable_logs=False, model="spacenet7") -> Model:
@@ -121,8 +72,7 @@ def init_model(config: dict, params, enable_logs=False, model="spacenet7") -> Mo
 
 
 def save_model_layer(model: Model, agent_cls: Type[GeoAgent], output: Path):
-    gdf = model.grid.get_agents_as_GeoDataFrame(agent_cls)
-    gdf = gdf.drop(columns="parametters")
+    gdf = model.get_agents_as_GeoDataFrame(agent_cls)
     gdf.to_file(output)
 
 
@@ -134,7 +84,7 @@ def run_model(config, params, i=0):
     try:
         model = init_model(config, params)
         model.step()
-        return model.grid.get_agents_as_GeoDataFrame(Dwelling)
+        return model.get_agents_as_GeoDataFrame(Dwelling)
     except NoValidStartPoint:
         return None
     except ImpossibleBuild:
@@ -144,10 +94,10 @@ def run_model(config, params, i=0):
         return None
 
 
-def compute_diff(start, validation_buildings, max_distance, end):
+def compute_diff(start, pipeline, max_distance, end):
     if end is not None:
-        delta = end[~end.isin(start)].dropna()
-        distance = sum_of_min_euclidean_distances2(delta, validation_buildings)
+        delta = end.loc[~end.index.isin(start.index)]
+        distance = pipeline.evaluate(delta)["centroid_matching"]
         return distance / (max_distance * len(delta))
     else:
         return np.NaN
@@ -176,12 +126,16 @@ def make_simulations(
         params = list(row[problem_cls.params_names()])
         model = init_model(config, params, enable_logs=False)
 
-        start = model.grid.get_agents_as_GeoDataFrame(Dwelling)
+        start = model.get_agents_as_GeoDataFrame(Dwelling)
         validation_buildings = validation.loc[~validation.intersects(start.union_all())]
 
         max_distance = model.border.shape.boundary.hausdorff_distance(
             validation_buildings.geometry.centroid
         ).max()
+        # validation side of the error, computed once for all the simulations
+        pipeline = MeasurePipeline(
+            ["centroid_matching"], MeasureContext(validation_buildings)
+        )
 
         simulations = process_map(
             partial(run_model, config, params),
@@ -192,7 +146,7 @@ def make_simulations(
         )
 
         simulation_error = process_map(
-            partial(compute_diff, start, validation_buildings, max_distance),
+            partial(compute_diff, start, pipeline, max_distance),
             simulations,
             max_workers=n_proc,
             chunksize=1,
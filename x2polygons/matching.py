@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+This module matches two building footprint datasets (e.g. a test dataset such as OSM or a simulation, and a reference dataset) and compares the matched footprints.
+
+The footprints are matched with the two-way area overlap (TWAO) criterion: a test footprint and a reference footprint match when their overlapping area is large enough compared to the area of both footprints. The candidate pairs come from an STRtree query and all the metrics of :mod:`geometry` (and optionally the distances of :mod:`polygon_distance`) are computed on arrays of footprints at once.
+
+"""
+
+import numpy as np
+import pandas as pd
+import shapely
+import geopandas as gp
+
+from .polygon_distance import chamfer_distance_many, hausdorff_distance_many, polis_distance_many, turning_function_distance_many
+
+
+DISTANCES = {
+    'chamfer': chamfer_distance_many,
+    'hausdorff': hausdorff_distance_many,
+    'polis': polis_distance_many,
+    'turning_function': turning_function_distance_many,
+}
+
+
+def _geometries(footprints):
+    if(isinstance(footprints, (gp.GeoDataFrame, gp.GeoSeries))):
+        return np.asarray(footprints.geometry.values, dtype=object)
+    return np.asarray(footprints, dtype=object)
+
+
+def _exterior_perimeters(geometries):
+    '''
+    Perimeter of the exterior ring(s) of each polygon, see :func:`geometry.polygon_perimeter`.
+    '''
+    parts, index = shapely.get_parts(geometries, return_index=True)
+    return np.bincount(index, weights=shapely.length(shapely.get_exterior_ring(parts)), minlength=len(geometries))
+
+
+def candidate_pairs(test_footprints, ref_footprints):
+    '''
+    Identifies the pairs of intersecting test and reference footprints and their overlapping area.
+
+    Args:
+        - **test_footprints** (*GeoDataFrame*): Test footprints (e.g. OSM or simulated buildings)
+        - **ref_footprints** (*GeoDataFrame*): Reference footprints
+
+    Returns:
+        - **test** (*int []*): position of the test footprint of each pair
+        - **ref** (*int []*): position of the reference footprint of each pair
+        - **overlap** (*float []*): overlapping area of each pair
+    '''
+    test_geometries, ref_geometries = _geometries(test_footprints), _geometries(ref_footprints)
+    tree = shapely.STRtree(ref_geometries)
+    test, ref = tree.query(test_geometries, predicate='intersects')
+    overlap = shapely.area(shapely.intersection(test_geometries[test], ref_geometries[ref]))
+    return test, ref, overlap
+
+
+def twao_matching(test_footprints, ref_footprints, min_overlap=0.3):
+    '''
+    One-to-one matching of two footprint datasets with the two-way area overlap (TWAO) criterion.
+
+    A pair is a candidate when the overlapping area is at least *min_overlap* of the area of both footprints. Conflicts (a footprint in several candidate pairs) are resolved by decreasing overlapping area: pairs that have the largest overlap of both their footprints are kept first.
+
+    Args:
+        - **test_footprints** (*GeoDataFrame*): Test footprints
+        - **ref_footprints** (*GeoDataFrame*): Reference footprints
+        - **min_overlap** (*float*): Minimum ratio between the overlapping area and the area of each footprint (default: 0.3)
+
+    Returns:
+        - **test** (*int []*), **ref** (*int []*): positions of the matched footprints, sorted by test footprint
+        - **overlap** (*float []*): overlapping area of each matched pair
+    '''
+    test, ref, overlap = candidate_pairs(test_footprints, ref_footprints)
+    test_area = shapely.area(_geometries(test_footprints))
+    ref_area = shapely.area(_geometries(ref_footprints))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        keep = (overlap >= min_overlap * test_area[test]) & (overlap >= min_overlap * ref_area[ref]) & (overlap > 0)
+    test, ref, overlap = test[keep], ref[keep], overlap[keep]
+
+    matched = np.zeros(len(test), dtype=bool)
+    remaining = np.ones(len(test), dtype=bool)
+    while(remaining.any()):
+        # pairs with the largest overlap of both their footprints
+        best_test = np.full(len(test_area), -np.inf)
+        best_ref = np.full(len(ref_area), -np.inf)
+        np.maximum.at(best_test, test[remaining], overlap[remaining])
+        np.maximum.at(best_ref, ref[remaining], overlap[remaining])
+        mutual = remaining & (overlap == best_test[test]) & (overlap == best_ref[ref])
+        # ties: the first pair of each footprint
+        mutual[mutual] &= _first_occurrences(test[mutual]) & _first_occurrences(ref[mutual])
+        matched |= mutual
+        # the matched footprints are no longer available
+        used_test = np.isin(test, test[mutual])
+        used_ref = np.isin(ref, ref[mutual])
+        remaining &= ~(used_test | used_ref)
+
+    order = np.argsort(test[matched], kind='stable')
+    return test[matched][order], ref[matched][order], overlap[matched][order]
+
+
+def _first_occurrences(values):
+    first = np.zeros(len(values), dtype=bool)
+    first[np.unique(values, return_index=True)[1]] = True
+    return first
+
+
+def compare_footprints(test_footprints, ref_footprints, min_overlap=0.3, distances=(), **kwargs):
+    '''
+    Matches two footprint datasets (see :func:`twao_matching`) and compares the matched footprints. The output has one row per matched pair, followed by one row per unmatched test footprint (false positive) and one row per unmatched reference footprint (false negative).
+
+    Args:
+        - **test_footprints** (*GeoDataFrame*): Test footprints (e.g. OSM or simulated buildings)
+        - **ref_footprints** (*GeoDataFrame*): Reference footprints, in the same CRS
+        - **min_overlap** (*float*): see :func:`twao_matching`
+        - **distances** (*str []*): Distances between the matched footprints to add, among *'chamfer'*, *'hausdorff'*, *'polis'* and *'turning_function'*
+        - **kwargs**:
+            - symmetrise: passed to the Chamfer, Hausdorff and PoLis distances (see :mod:`polygon_distance`).
+
+    Returns:
+        - **comparison** (*DataFrame*): with the following columns
+            - **test**, **ref**: index of the footprints (*nan* when unmatched)
+            - **TP**, **FP**, **FN**: areas, see :func:`geometry.x2_areas`
+            - **overlap_percent**: see :func:`geometry.overlap_percent`
+            - **centroid_distance**: see :func:`geometry.centroid_distance`
+            - **perimeter_ratio**: see :func:`geometry.perimeter_ratio`
+            - one column per distance of *distances*
+    '''
+    unknown = [name for name in distances if name not in DISTANCES]
+    if(unknown):
+        raise ValueError(f"Unknown distances: {', '.join(unknown)}")
+    crs_test, crs_ref = getattr(test_footprints, 'crs', None), getattr(ref_footprints, 'crs', None)
+    if(crs_test is not None and crs_ref is not None and crs_test != crs_ref):
+        raise ValueError("Footprints are not in the same CRS")
+
+    test_geometries, ref_geometries = _geometries(test_footprints), _geometries(ref_footprints)
+    test, ref, overlap = twao_matching(test_footprints, ref_footprints, min_overlap)
+    matched_test, matched_ref = test_geometries[test], ref_geometries[ref]
+    test_area, ref_area = shapely.area(matched_test), shapely.area(matched_ref)
+
+    metrics = {}
+    metrics['TP'] = overlap
+    metrics['FP'] = test_area - overlap
+    metrics['FN'] = ref_area - overlap
+    metrics['overlap_percent'] = overlap / np.minimum(test_area, ref_area) * 100
+    metrics['centroid_distance'] = shapely.distance(shapely.centroid(matched_test), shapely.centroid(matched_ref))
+    metrics['perimeter_ratio'] = _exterior_perimeters(matched_test) / _exterior_perimeters(matched_ref)
+    for name in distances:
+        options = {'symmetrise': kwargs['symmetrise']} if 'symmetrise' in kwargs and name != 'turning_function' else {}
+        metrics[name] = DISTANCES[name](matched_test, matched_ref, **options)
+
+    test_index = pd.Index(getattr(test_footprints, 'index', range(len(test_geometries))))
+    ref_index = pd.Index(getattr(ref_footprints, 'index', range(len(ref_geometries))))
+    unmatched_test = np.setdiff1d(np.arange(len(test_geometries)), test)
+    unmatched_ref = np.setdiff1d(np.arange(len(ref_geometries)), ref)
+
+    matched = pd.DataFrame({'test': test_index[test], 'ref': ref_index[ref], **metrics})
+    false_positives = pd.DataFrame({'test': test_index[unmatched_test], 'FP': shapely.area(test_geometries[unmatched_test])})
+    false_negatives = pd.DataFrame({'ref': ref_index[unmatched_ref], 'FN': shapely.area(ref_geometries[unmatched_ref])})
+    parts = [part for part in [matched, false_positives, false_negatives] if len(part)]
+    if(not parts):
+        return matched
+    return pd.concat(parts, ignore_index=True)[matched.columns]
+
+
+def summarise_comparison(comparison):
+    '''
+    Summarises the output of :func:`compare_footprints`.
+
+    Args:
+        - **comparison** (*DataFrame*): Output of :func:`compare_footprints`
+
+    Returns:
+        - **summary** (*Series*): number of matched footprints (*matched*), of test (*n_test*) and reference (*n_ref*) footprints, object based *precision*, *recall* and *f1* score, and area based *area_precision*, *area_recall* and *area_f1* score (from the TP, FP & FN areas)
+    '''
+    is_matched = comparison['test'].notna() & comparison['ref'].notna()
+    matched = int(is_matched.sum())
+    n_test = int(comparison['test'].notna().sum())
+    n_ref = int(comparison['ref'].notna().sum())
+    tp, fp, fn = comparison['TP'].sum(), comparison['FP'].sum(), comparison['FN'].sum()
+
+    def ratio(a, b):
+        return a / b if b else np.nan
+
+    precision, recall = ratio(matched, n_test), ratio(matched, n_ref)
+    area_precision, area_recall = ratio(tp, tp + fp), ratio(tp, tp + fn)
+    return pd.Series({
+        'matched': matched,
+        'n_test': n_test,
+        'n_ref': n_ref,
+        'precision': precision,
+        'recall': recall,
+        'f1': ratio(2 * precision * recall, precision + recall),
+        'area_precision': area_precision,
+        'area_recall': area_recall,
+        'area_f1': ratio(2 * area_precision * area_recall, area_precision + area_recall),
+    })
@@ -14,9 +14,10 @@ Distance Functions:
 
 """
 
-import math
-import copy
-from shapely.geometry import Polygon, Point
+import numpy as np
+import shapely
+from scipy.spatial import cKDTree
+from shapely.geometry import Polygon
 import geopandas as gp
 
 # When packaging & developing:
@@ -30,6 +31,38 @@ from . import geometry as geom
 
 
 
+UPPER_BOUND = 1000.0 # Distances between vertices are capped to this value
+
+
+def _vertex_coordinates(polygon):
+    '''
+    Coordinates of the exterior nodes of a polygon, the first node is repeated at the end.
+    
+    Args:
+        - **polygon** (*polygon*): A polygon object
+
+    Returns:
+        - **coordinates** (*ndarray*): (n, 2) array of the nodes
+    '''
+    return np.asarray(polygon.exterior.coords, dtype=float)[:, :2]
+
+
+def _nearest_vertex_distances(vertices_a, vertices_b, upper_bound):
+    '''
+    Distance from each vertex of *vertices_a* to the closest vertex of *vertices_b*, capped to *upper_bound*.
+    '''
+    distances, _ = cKDTree(vertices_b).query(vertices_a, distance_upper_bound=upper_bound)
+    return np.minimum(distances, upper_bound)
+
+
+def _symmetrise(d_a_b, d_b_a, symmetrise):
+    if(symmetrise == 'min'):
+        return np.minimum(d_a_b, d_b_a)
+    elif(symmetrise == 'max'):
+        return np.maximum(d_a_b, d_b_a)
+    raise ValueError(f"Unknown symmetrise option: {symmetrise}")
+
+
 def chamfer_distance(polygon_a, polygon_b, **kwargs):
     '''
     Identifies the Chamfer distance between two input polygons. The distance is calculated from *polygon_a* to *polygon_b* (a->b).
@@ -39,33 +72,19 @@ def chamfer_distance(polygon_a, polygon_b, **kwargs):
         - **polygon_b** (*polygon*): Second polygon
         - **kwargs**:
             - symmetrise: How to symmetrise the distance measure as there would be two distances (i.e. a->b, b->a). Options are: *'min'*, *'max'*, *'average'*. The *average* (weighted average) option is calculated by considering the number of nodes of each polygon as described `here <https://ieeexplore.ieee.org/document/6849454>`_.
+            - upper_bound: Maximum distance between two vertices (default: 1000.0).
             
     Returns:
         - **distance** (*float*): Chamfer distance between the polygons
     '''
+    upper_bound = kwargs.get('upper_bound', UPPER_BOUND)
     
-    c_a_b = 0 # init the directed Chamfer Distance between polygon A and B
-    c_b_a = 0 # init the directed Chamfer Distance between polygon B and A
-    
-    vertices_a = geom.polygon_vertices(polygon_a)
-    vertices_b = geom.polygon_vertices(polygon_b)
+    vertices_a = _vertex_coordinates(polygon_a)
+    vertices_b = _vertex_coordinates(polygon_b)
     
-    for i in range(len(vertices_a)-1): # from each corner of the polygon 1
-        minimum_distance = 1000.0 # Minimum distance set as initial.
-        for j in range(len(vertices_b)): # to each corner of the polygon 2
-            distance = ((vertices_a[i][0] - vertices_b[j][0])**2+(vertices_a[i][1] - vertices_b[j][1])**2)**0.5 # The distance between corners is calculated
-            if minimum_distance > distance: # If the calculated distance is greater than the minimum distance
-                minimum_distance = distance # minimum distance is calculated distance
-        c_a_b += minimum_distance # Add minimum distance to total distance
-     
-    
-    for k in range(len(vertices_b)-1): # from each corner of the polygon 2
-        minimum_distance = 1000.0 # Minimum distance set as initial.
-        for l in range(len(vertices_a)): # to each corner of the polygon 2
-            distance = ((vertices_a[l][0] - vertices_b[k][0])**2+(vertices_a[l][1] - vertices_b[k][1])**2)**0.5 # The distance between corners is calculated
-            if minimum_distance > distance: # If the calculated distance is greater than the minimum distance
-                minimum_distance = distance # minimum distance is calculated distance
-        c_b_a += minimum_distance # Add minimum distance to total distance
+    # the closing vertex of each polygon is only used as a target
+    c_a_b = float(_nearest_vertex_distances(vertices_a[:-1], vertices_b, upper_bound).sum()) # directed Chamfer Distance between polygon A and B
+    c_b_a = float(_nearest_vertex_distances(vertices_b[:-1], vertices_a, upper_bound).sum()) # directed Chamfer Distance between polygon B and A
     
     # Default: c_a_b
     if('symmetrise' not in kwargs):
@@ -78,7 +97,6 @@ def chamfer_distance(polygon_a, polygon_b, **kwargs):
         return max(c_a_b, c_b_a)
     
 
-
     
 def hausdorff_distance(polygon_a, polygon_b, **kwargs):
     '''
@@ -89,36 +107,19 @@ def hausdorff_distance(polygon_a, polygon_b, **kwargs):
         - **polygon_b** (*polygon*): Second polygon
         - **kwargs**:
             - symmetrise: How to symmetrise the distance measure as there would be two distances (i.e. a->b, b->a). Options are: *'min'*, *'max'*, *'average'*. 
+            - upper_bound: Maximum distance between two vertices (default: 1000.0).
             
     Returns:
         - **distance** (*float*): Hausdorf distance between the polygons
     '''
+    upper_bound = kwargs.get('upper_bound', UPPER_BOUND)
     
-    distance_between_vertices = []
-    
-    vertices_a = geom.polygon_vertices(polygon_a)
-    vertices_b = geom.polygon_vertices(polygon_b)
-    
-    
-    for i in range(len(vertices_a)): # from each corner of the polygon 1
-        minimum_distance = 1000.0 # Minimum distance set as initial.
-        for j in range(len(vertices_b)): # to each corner of the polygon 2
-            distance = ((vertices_a[i][0] - vertices_b[j][0])**2+(vertices_a[i][1] - vertices_b[j][1])**2)**0.5 # The distance between corners is calculated
-            if minimum_distance > distance: # If the calculated distance is greater than the minimum distance
-                minimum_distance = distance # minimum distance is calculated distance
-        distance_between_vertices.append(minimum_distance) # the minimum distance is added to the list
-    h_a_b = max(distance_between_vertices) # The greatest value between the smallest distances becomes the Hausdorff distance
+    vertices_a = _vertex_coordinates(polygon_a)
+    vertices_b = _vertex_coordinates(polygon_b)
     
-    distance_between_vertices = []
-    
-    for k in range(len(vertices_b)): # from each corner of the polygon a
-        minimum_distance = 1000.0 # Minimum distance set as initial.
-        for l in range(len(vertices_a)): # to each corner of the polygon a
-            distance = ((vertices_a[l][0] - vertices_b[k][0])**2+(vertices_a[l][1] - vertices_b[k][1])**2)**0.5 # The distance between corners is calculated
-            if minimum_distance > distance: #  If the calculated distance is greater than the minimum distance
-                minimum_distance = distance # minimum distance is calculated distance
-        distance_between_vertices.append(minimum_distance) # the minimum distance is added to the list
-    h_b_a = max(distance_between_vertices) # The greatest value between the smallest distances becomes the Hausdorff distance
+    # The greatest value between the smallest distances becomes the Hausdorff distance
+    h_a_b = float(_nearest_vertex_distances(vertices_a, vertices_b, upper_bound).max())
+    h_b_a = float(_nearest_vertex_distances(vertices_b, vertices_a, upper_bound).max())
     
     # default options:
         # directed = False
@@ -132,6 +133,154 @@ def hausdorff_distance(polygon_a, polygon_b, **kwargs):
     elif(kwargs['symmetrise'] == 'average'):
         return (h_a_b + h_b_a)/2
 
+
+def _batch_vertices(polygons):
+    '''
+    Exterior nodes of a series of polygons.
+
+    Returns:
+        - **coordinates** (*ndarray*): (n, 2) array of all the nodes
+        - **counts** (*int []*): number of nodes of each polygon (closing node included)
+        - **offsets** (*int []*): index of the first node of each polygon
+    '''
+    rings = shapely.get_exterior_ring(np.asarray(polygons, dtype=object))
+    coordinates, index = shapely.get_coordinates(rings, return_index=True)
+    counts = np.bincount(index, minlength=len(rings))
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    return coordinates, counts, offsets
+
+
+def _batch_nearest_vertex_distances(batch_a, batch_b, upper_bound, chunk_size):
+    '''
+    Distance from each vertex of the polygons of *batch_a* to the closest vertex of the matching polygon of *batch_b*, capped to *upper_bound*.
+    
+    The pairs of vertices of all the polygons are compared at once, by chunks of about *chunk_size* pairs of vertices.
+    '''
+    coordinates_a, counts_a, _ = batch_a
+    coordinates_b, counts_b, offsets_b = batch_b
+    
+    polygon = np.repeat(np.arange(len(counts_a)), counts_a) # polygon of each vertex of A
+    targets = counts_b[polygon] # number of vertices of B to visit from each vertex of A
+    distances = np.full(len(coordinates_a), np.nan)
+    
+    ends = np.cumsum(targets)
+    start = 0
+    while start < len(coordinates_a):
+        # vertices of A in the chunk: at least one
+        stop = max(np.searchsorted(ends, ends[start] - targets[start] + chunk_size, side='right'), start + 1)
+        
+        vertices = np.arange(start, stop)
+        vertices = vertices[targets[vertices] > 0] # empty polygons in B
+        n_targets = targets[vertices]
+        if len(vertices):
+            # index of the vertex of A and of the vertex of B of each pair
+            i = np.repeat(vertices, n_targets)
+            first = np.concatenate([[0], np.cumsum(n_targets)[:-1]])
+            j = np.arange(len(i)) - np.repeat(first - offsets_b[polygon[vertices]], n_targets)
+            
+            dx = coordinates_a[i, 0] - coordinates_b[j, 0]
+            dy = coordinates_a[i, 1] - coordinates_b[j, 1]
+            distances[vertices] = np.minimum.reduceat(np.sqrt(dx * dx + dy * dy), first)
+        start = stop
+    
+    return np.minimum(distances, upper_bound), polygon
+
+
+def _check_aligned(polygons_a, polygons_b):
+    if(len(polygons_a) != len(polygons_b)):
+        raise ValueError(f"Series of polygons are not aligned: {len(polygons_a)} != {len(polygons_b)}")
+    if(isinstance(polygons_a, gp.GeoSeries) and isinstance(polygons_b, gp.GeoSeries) and not polygons_a.index.equals(polygons_b.index)):
+        raise ValueError("Series of polygons do not share the same index")
+
+
+def chamfer_distance_many(polygons_a, polygons_b, **kwargs):
+    '''
+    Identifies the Chamfer distances between two aligned series of polygons (e.g. matched building footprints). Same as calling :func:`chamfer_distance` on each pair.
+    
+    Args:
+        - **polygons_a** (*GeoSeries*): First polygons
+        - **polygons_b** (*GeoSeries*): Second polygons, the i-th polygon is compared with the i-th polygon of *polygons_a*
+        - **kwargs**:
+            - symmetrise: see :func:`chamfer_distance`.
+            - upper_bound: Maximum distance between two vertices (default: 1000.0).
+            - chunk_size: Maximum number of pairs of vertices compared at once (default: 1000000).
+            
+    Returns:
+        - **distances** (*ndarray*): Chamfer distance between each pair of polygons, *nan* for empty or missing polygons
+    '''
+    _check_aligned(polygons_a, polygons_b)
+    upper_bound = kwargs.get('upper_bound', UPPER_BOUND)
+    chunk_size = kwargs.get('chunk_size', 1000000)
+    n = len(polygons_a)
+    
+    batch_a = _batch_vertices(polygons_a)
+    batch_b = _batch_vertices(polygons_b)
+    
+    def directed(batch_from, batch_to):
+        distances, polygon = _batch_nearest_vertex_distances(batch_from, batch_to, upper_bound, chunk_size)
+        # the closing vertex of each polygon is only used as a target
+        closing = batch_from[2] + batch_from[1] - 1
+        keep = np.ones(len(distances), dtype=bool)
+        keep[closing[batch_from[1] > 0]] = False
+        return np.bincount(polygon[keep], weights=distances[keep], minlength=n)
+    
+    c_a_b = directed(batch_a, batch_b)
+    c_b_a = directed(batch_b, batch_a)
+    
+    empty = (batch_a[1] == 0) | (batch_b[1] == 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if('symmetrise' not in kwargs):
+            result = c_a_b
+        elif(kwargs['symmetrise'] == 'average'):
+            result = (c_a_b / (2 * (batch_a[1] - 1))) + (c_b_a / (2 * (batch_b[1] - 1)))
+        else:
+            result = _symmetrise(c_a_b, c_b_a, kwargs['symmetrise'])
+    result[empty] = np.nan
+    return result
+
+
+def hausdorff_distance_many(polygons_a, polygons_b, **kwargs):
+    '''
+    Identifies the Hausdorff distances between two aligned series of polygons (e.g. matched building footprints). Same as calling :func:`hausdorff_distance` on each pair.
+    
+    Args:
+        - **polygons_a** (*GeoSeries*): First polygons
+        - **polygons_b** (*GeoSeries*): Second polygons, the i-th polygon is compared with the i-th polygon of *polygons_a*
+        - **kwargs**:
+            - symmetrise: see :func:`hausdorff_distance`.
+            - upper_bound: Maximum distance between two vertices (default: 1000.0).
+            - chunk_size: Maximum number of pairs of vertices compared at once (default: 1000000).
+            
+    Returns:
+        - **distances** (*ndarray*): Hausdorff distance between each pair of polygons, *nan* for empty or missing polygons
+    '''
+    _check_aligned(polygons_a, polygons_b)
+    upper_bound = kwargs.get('upper_bound', UPPER_BOUND)
+    chunk_size = kwargs.get('chunk_size', 1000000)
+    n = len(polygons_a)
+    
+    batch_a = _batch_vertices(polygons_a)
+    batch_b = _batch_vertices(polygons_b)
+    
+    def directed(batch_from, batch_to):
+        distances, polygon = _batch_nearest_vertex_distances(batch_from, batch_to, upper_bound, chunk_size)
+        result = np.full(n, np.nan)
+        valid = ~np.isnan(distances)
+        np.fmax.at(result, polygon[valid], distances[valid])
+        return result
+    
+    h_a_b = directed(batch_a, batch_b)
+    h_b_a = directed(batch_b, batch_a)
+    
+    if('symmetrise' not in kwargs):
+        result = h_a_b
+    elif(kwargs['symmetrise'] == 'average'):
+        result = (h_a_b + h_b_a)/2
+    else:
+        result = _symmetrise(h_a_b, h_b_a, kwargs['symmetrise'])
+    result[(batch_a[1] == 0) | (batch_b[1] == 0)] = np.nan
+    return result
+
 def polis_distance(polygon_a, polygon_b, **kwargs):
     '''
     Identifies the PoLis distance between two input polygons. The distance is calculated from *polygon_a* to *polygon_b* (a->b).
@@ -145,45 +294,10 @@ def polis_distance(polygon_a, polygon_b, **kwargs):
     Returns:
         - **distance** (*float*): PoLis distance between the polygons
     '''
-    geoSeriesA = gp.GeoSeries(polygon_a)
-    geoSeriesB = gp.GeoSeries(polygon_b)
-    # We can hold a VISITED polygon list - we can skip those to improve the run-time
-
-    # Convert the polygon into a geoseries onject
-    #print(geoseries_B)
-
-    # vertices of A  -> to -> polygon B
-    # For all the vertices of A:
-    num_vertices_a = len(polygon_a.exterior.coords) - 1 # obtain the number of vertices - first & last vertices coincide
-    distance_to_edges_a_b = 0
-
-    for i in range(num_vertices_a):
-        # Convert each vertice to a GeoSeries point object:
-        tmp_vertex = gp.GeoSeries(Point(polygon_a.exterior.coords[i]))
-
-        # Calculate the distance between the point and the polygon B
-        dist = geoSeriesB.boundary.distance(tmp_vertex) # distance function does not work properly - if a vertex is inside the other polygon, it will return zero regardless its position
-        distance_to_edges_a_b += dist[0]
-    
-    polis_a_b = distance_to_edges_a_b / num_vertices_a
-
-    # vertices of B  -> to -> polygon A
-    # For all the vertices of A:
-    num_vertices_b = len(polygon_b.exterior.coords) - 1  # obtain the number of vertices
-    distance_to_edges_b_a = 0
-
-    for j in range(num_vertices_b):
-        # Convert each vertice to a GeoSeries point object:
-        tmp_vertex = gp.GeoSeries(Point(polygon_b.exterior.coords[j]))
-
-        # Calculate the distance between the point and the polygon A
-        dist = geoSeriesA.boundary.distance(tmp_vertex) # distance function does not work properly - if a vertex is inside the other polygon, it will return zero regardless its position
-        distance_to_edges_b_a += dist[0]
-    
-    polis_b_a = distance_to_edges_b_a / num_vertices_b
-    
-    vertices_a = geom.polygon_vertices(polygon_a)
-    vertices_b = geom.polygon_vertices(polygon_b)
+    # Distances between the vertices (the first & last vertices coincide) and the boundary of the other polygon
+    # NB: a vertex inside the other polygon is at the distance of its boundary, not zero
+    polis_a_b = shapely.distance(shapely.points(_vertex_coordinates(polygon_a)[:-1]), polygon_b.boundary).mean()
+    polis_b_a = shapely.distance(shapely.points(_vertex_coordinates(polygon_b)[:-1]), polygon_a.boundary).mean()
 
     # Calculate PoLiS
     # Default: polis_a_b (directed)
@@ -197,6 +311,118 @@ def polis_distance(polygon_a, polygon_b, **kwargs):
         return min(polis_a_b, polis_b_a)
 
 
+def polis_distance_many(polygons_a, polygons_b, **kwargs):
+    '''
+    Identifies the PoLis distances between two aligned series of polygons (e.g. matched building footprints). Same as calling :func:`polis_distance` on each pair.
+    
+    Args:
+        - **polygons_a** (*GeoSeries*): First polygons
+        - **polygons_b** (*GeoSeries*): Second polygons, the i-th polygon is compared with the i-th polygon of *polygons_a*
+        - **kwargs**:
+            - symmetrise: see :func:`polis_distance`.
+            
+    Returns:
+        - **distances** (*ndarray*): PoLis distance between each pair of polygons, *nan* for empty or missing polygons
+    '''
+    _check_aligned(polygons_a, polygons_b)
+    n = len(polygons_a)
+    boundaries_a = shapely.boundary(np.asarray(polygons_a, dtype=object))
+    boundaries_b = shapely.boundary(np.asarray(polygons_b, dtype=object))
+    
+    def directed(polygons_from, boundaries_to):
+        coordinates, counts, offsets = _batch_vertices(polygons_from)
+        polygon = np.repeat(np.arange(n), counts)
+        # the closing vertex of each polygon is the first one
+        keep = np.ones(len(coordinates), dtype=bool)
+        keep[(offsets + counts - 1)[counts > 0]] = False
+        polygon = polygon[keep]
+        distances = shapely.distance(shapely.points(coordinates[keep]), boundaries_to[polygon])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.bincount(polygon, weights=distances, minlength=n) / (counts - 1)
+    
+    polis_a_b = directed(polygons_a, boundaries_b)
+    polis_b_a = directed(polygons_b, boundaries_a)
+    
+    if('symmetrise' not in kwargs):
+        result = polis_a_b
+    elif(kwargs['symmetrise'] == 'average'):
+        result = (polis_a_b / 2) + (polis_b_a / 2)
+    else:
+        result = _symmetrise(polis_a_b, polis_b_a, kwargs['symmetrise'])
+    result[shapely.is_empty(boundaries_a) | shapely.is_empty(boundaries_b) | shapely.is_missing(boundaries_a) | shapely.is_missing(boundaries_b)] = np.nan
+    return result
+
+
+def _sequential_sum(values, axis=-1):
+    '''
+    Sum of the values in order (same rounding as a Python loop).
+    '''
+    if values.shape[axis] == 0:
+        return np.zeros(np.delete(values.shape, axis))
+    return np.take(np.cumsum(values, axis=axis), -1, axis=axis)
+
+
+def _turn_arrays(rings):
+    '''
+    Turn angles (degrees) and normalised lengths of closed rings of nodes, see :func:`turning_function`.
+    
+    The *i*-th turn is made on the node *i+1* (the first node for the last turn) and followed by the *i*-th length. Colinear nodes do not make a turn, their length is added to the previous turn.
+    
+    Args:
+        - **rings** (*ndarray*): (k, n+1, 2) array of the nodes of k rings, the first node is repeated at the end
+    
+    Returns:
+        - **angles** (*ndarray*): (k, n) turn angles, 0 for colinear nodes
+        - **lengths** (*ndarray*): (k, n) normalised lengths, 0 for colinear nodes
+        - **sides** (*ndarray*): (k, n) side of each turn, 1 for Left, -1 for Right and 0 for colinear nodes
+    '''
+    vx = np.diff(rings, axis=1)                                    # segment before the node
+    vy = np.concatenate([vx[:, 1:], vx[:, :1]], axis=1)            # segment after the node
+    norms_x = np.sqrt(vx[..., 0]**2 + vx[..., 1]**2)
+    norms_y = np.concatenate([norms_x[:, 1:], norms_x[:, :1]], axis=1)
+    
+    # Side of the next node - rounded: we may see error in floating point arithmetic
+    sides = np.sign(np.round(vx[..., 0]*vy[..., 1] - vx[..., 1]*vy[..., 0], 3))
+    with np.errstate(divide='ignore', invalid='ignore'): # repeated nodes are colinear
+        cos_alpha = (vx[..., 0]*vy[..., 0] + vx[..., 1]*vy[..., 1]) / (norms_x * norms_y)
+        angles = np.where(sides != 0, sides * np.degrees(np.arccos(np.round(cos_alpha, 3))), 0)
+    lengths = norms_y / _sequential_sum(norms_y, axis=1)[:, None]
+    
+    # COLINEARITY: the length goes to the previous turn (cyclic)
+    turns = sides != 0
+    if not turns.any(axis=1).all():
+        raise ValueError("Degenerate polygon: all the nodes are colinear")
+    rows, n = turns.shape
+    owner = np.maximum.accumulate(np.where(turns, np.arange(n), -1), axis=1)
+    owner = np.where(owner >= 0, owner, owner[:, -1:])
+    merged = np.zeros_like(lengths)
+    np.add.at(merged, (np.repeat(np.arange(rows), n), owner.ravel()), lengths.ravel())
+    return angles, merged, sides
+
+
+def _turning_function_arrays(rings, ccw=False):
+    '''
+    Turn angles and lengths of closed rings of nodes with the same number of nodes, digitised counter clockwise when *ccw* is set.
+    
+    Args:
+        - **rings** (*ndarray*): (k, n+1, 2) array of the nodes of k rings, see :func:`_turn_arrays`
+        - **ccw** (*bool*): Enforce a ccw turn
+    
+    Returns:
+        - **turns** (*list*): for each ring, the turn angles, the normalised lengths and the sides (*ndarray*) of the nodes making a turn, and the digitisation direction (*CCW* or *CW*)
+    '''
+    angles, lengths, sides = _turn_arrays(rings)
+    cw = np.round(_sequential_sum(angles, axis=1)) == -360
+    if(ccw and cw.any()): # follow the nodes in the reverse order
+        angles[cw], lengths[cw], sides[cw] = _turn_arrays(rings[cw, ::-1])
+    
+    turns = sides != 0
+    return [
+        (angles[i, turns[i]], lengths[i, turns[i]], sides[i, turns[i]], 'CW' if cw[i] and not ccw else 'CCW')
+        for i in range(len(rings))
+    ]
+
+
 def turning_function(polygon, **kwargs):
     '''
     Identifies the turning function of an input polygon. 
@@ -208,178 +434,19 @@ def turning_function(polygon, **kwargs):
         - **dictionary** with the following attributes
             - **angles** (*float []*): turn angles 
             - **lengths** (*float []*): normalised lengths
-            - **direction** (*char []*): each turn direction - values of the list are Left (*l*), Right (*R*) or Colinear (*-*)
+            - **direction** (*char []*): each turn direction - values of the list are Left (*L*) or Right (*R*), colinear nodes (*-*) are merged with the previous turn
             - **digitisation_direction** (*str*): Counter ClockWise (*CCW*) or ClockWise (*CW*)
         - **kwargs**:
             - **ccw**: Enforce a ccw turn (*True* or *False* (default))
             - **plot**: Plot the turn function of the polygon (*True* or *False* (default))
     '''   
-   
-    tmp_points = geom.polygon_vertices(polygon)
-    points = []
-    # save it as a point
-    for i in range(len(tmp_points)):
-        points.append(geom.point(tmp_points[i][0], tmp_points[i][1] ))
-    
-    v_init = geom.line_vector(points[0], points[1])
+    angles, lengths, sides, digitisation_direction = _turning_function_arrays(_vertex_coordinates(polygon)[None], ccw='ccw' in kwargs)[0]
     
-    # For all the remaining vectors 
-    # 1. Identify the change in direction - Counter-Clock Wise (CCW, Left) or Clock Wise (CW, Right)
-    # 2. Find the angle between the vectors
-    # 3. Total is + by CCW changes, - by CW changes
-    
-    total_length = 0
     turn = {}
-    turn['angles'] = []
-    turn['lengths'] = []
-    turn['direction'] = []
-    turn['digitisation_direction'] = 'CCW' # Assume CCW: +360 
-        
-    for i in range(len(points)-2):
-        vx = geom.line_vector(points[i], points[i+1])
-        vy = geom.line_vector(points[i+1], points[i+2])
-        
-        # Start adding the length of segments from the 2. segment
-        # Then we will add the first segment's length
-        if(vx.point_on_where(points[i+2]) == 'LEFT'):
-            turn["angles"].append(vx.angle_to_vector(vy))
-            turn["direction"].append('L') 
-        elif(vx.point_on_where(points[i+2]) == 'RIGHT'):
-            turn["angles"].append(-vx.angle_to_vector(vy))
-            turn["direction"].append('R') 
-        else: # COLINEARITY - do not make a turn !!!
-            turn["angles"].append(0)            
-            turn["direction"].append('-') 
-            
-        turn["lengths"].append(vy.length())
-        
-    # Add the angle between the last and first segments
-    if(vy.point_on_where(v_init.p2) == 'LEFT'):
-        turn["angles"].append(vy.angle_to_vector(v_init))
-        turn["direction"].append('L') 
-    elif (vy.point_on_where(v_init.p2) == 'RIGHT'):
-        turn["angles"].append(-vy.angle_to_vector(v_init))
-        turn["direction"].append('R') 
-    else: # COLINEAR
-        turn["angles"].append(0)            
-        turn["direction"].append('-') 
-    
-    turn["lengths"].append(v_init.length())
-        
-    # Normalise the lengths
-    total_length = sum(turn["lengths"])
-    for i in range(len(turn["lengths"])):
-        turn["lengths"][i] = turn["lengths"][i] / total_length
-    
-    # Post-Process the COLINEARITY
-    indices_to_delete = []
-    for i in range(len(turn["lengths"])-1, 0, -1):
-        if(turn["direction"][i] == '-'):
-            turn["lengths"][i-1] += turn["lengths"][i]
-            indices_to_delete.append(i)
-    
-    # Handle the first change
-    found = 0
-    if(turn["direction"][0] == '-'):
-        indices_to_delete.append(0)
-        while(not found):
-            for i in range(len(turn["lengths"])-1, 0, -1):
-                if(turn["direction"][i] != '-'):
-                    found = 1
-                    break
-    if(found):
-        turn["lengths"][i] += turn["lengths"][0]
-                    
-    # Reorganise the turn function 
-    # !!!! UPDATE - correct typo
-    indices_to_delete = sorted(indices_to_delete, reverse=True)
-    
-    if(len(indices_to_delete) > 0):
-        for i in (indices_to_delete):
-            del turn["direction"][i]
-            del turn["lengths"][i]
-            del turn["angles"][i]
-   
-    
-    # Output a turn function by moving towards the reverse order
-    #!!!!!!!!!!!!!!!    CCW = TRUE !!!!!!!!!!!!!!!
-    
-    if( round(sum(turn["angles"])) == -360):
-        turn['digitisation_direction'] = 'CW' 
-        if ('ccw' in kwargs):
-            turn['digitisation_direction'] = 'CCW' 
-            v_init = geom.line_vector(points[-1], points[-2])
-            
-            turn['angles'] = []
-            turn['lengths'] = []
-            turn['direction'] = []
-    
-                    
-            total_length = 0
-               
-            for i in range(len(points)-2):
-                vx = geom.line_vector(points[-i-1], points[-i-2])
-                vy = geom.line_vector(points[-i-2], points[-i-3])
-                
-                # Determine the turn
-                if(vx.point_on_where(points[-i-3]) == 'LEFT'):
-                    turn["angles"].append(vx.angle_to_vector(vy))
-                    turn["direction"].append('L') 
-                elif(vx.point_on_where(points[-i-3]) == 'RIGHT'):
-                    turn["angles"].append(-vx.angle_to_vector(vy))
-                    turn["direction"].append('R') 
-                else: # COLINEARITY - do not make a turn !!!
-                    turn["angles"].append(0)     
-                    turn["direction"].append('-') 
-                
-                turn["lengths"].append(vy.length())
-            
-            # Add the angle between the last and first segments
-            if(vy.point_on_where(v_init.p2) == 'LEFT'):
-                turn["angles"].append(vy.angle_to_vector(v_init))
-                turn["direction"].append('L') 
-            elif (vy.point_on_where(v_init.p2) == 'RIGHT'):
-                turn["angles"].append(-vy.angle_to_vector(v_init))
-                turn["direction"].append('R') 
-            else: # COLINEAR
-                turn["angles"].append(0)            
-                turn["direction"].append('-') 
-                
-            turn["lengths"].append(v_init.length())
-                    
-            # Normalise the lengths
-            total_length = sum(turn["lengths"])
-            for i in range(len(turn["lengths"])):
-                turn["lengths"][i] = turn["lengths"][i] / total_length
-
-
-            # Post-Process the COLINEARITY
-            indices_to_delete = []
-            for i in range(len(turn["lengths"])-1, 0, -1):
-                if(turn["direction"][i] == '-'):
-                    turn["lengths"][i-1] += turn["lengths"][i]
-                    indices_to_delete.append(i)
-            
-            # Handle the first change
-            found = 0
-            if(turn["direction"][0] == '-'):
-                indices_to_delete.append(0)
-                while(not found):
-                    for i in range(len(turn["lengths"])-1, 0, -1):
-                        if(turn["direction"][i] != '-'):
-                            found = 1
-                            break
-            if(found):
-                turn["lengths"][i] += turn["lengths"][0]
-                    
-
-            sorted_indecies_to_delete = sorted(indices_to_delete, reverse=True)
-            
-            if(len(indices_to_delete) > 0):
-                for i in (indices_to_delete):
-                    del turn["direction"][i]
-                    del turn["lengths"][i]
-                    del turn["angles"][i]
+    turn['angles'] = angles.tolist()
+    turn['lengths'] = lengths.tolist()
+    turn['direction'] = ['L' if side > 0 else 'R' for side in sides]
+    turn['digitisation_direction'] = digitisation_direction
     
     if ('plot' in kwargs):
         plt.plot_turning_function(turn)
@@ -387,135 +454,140 @@ def turning_function(polygon, **kwargs):
     return turn
 
 
-def coincide_turning_functions(a_turn, b_turn):
-    # Notes:
-    # Number of edges may differ between two polygons
-    #1. Align the turn angles so that the distance is minimum
-    # - We may start from different nodes, the node numbers may be different etc.
-    # pop & append
-    distances = []
-    min_distance = 10**10
-    # SHIFT Polygon A: ----------------------------------------- 
-    piece_wise_lengths = {} 
-    piece_wise_lengths["b"] = [0]*(len(b_turn["lengths"])+1)
-    for i in range(1, len(b_turn["lengths"])+1):
-        piece_wise_lengths["b"][i] = piece_wise_lengths["b"][i-1] + b_turn["lengths"][i-1]
-    
-    for shift in range(len(a_turn["lengths"])):     
-        piece_wise_lengths["a"] = [0]*(len(a_turn["lengths"])+1)
-        for i in range(1, len(a_turn["lengths"])+1):
-            piece_wise_lengths["a"][i] = piece_wise_lengths["a"][i-1] + a_turn["lengths"][i-1]
-        
+def _rotations(values, shifts):
+    '''
+    Cyclic shifts of the rows of *values*: for each row *p*, one row per shift *s* of *shifts*, starting at *values[p, s]*.
+    '''
+    n = values.shape[1]
+    return values[:, (shifts[:, None] + np.arange(n)) % n]
+
+
+def _piece_wise(lengths):
+    '''
+    Cumulative lengths along the last axis, starting at 0.
+    '''
+    return np.concatenate([np.zeros(lengths.shape[:-1] + (1,)), np.cumsum(lengths, axis=-1)], axis=-1)
+
+
+def _combined_piece_wise(piece_wise_a, piece_wise_b):
+    '''
+    Sorted change points of two piece wise functions, without the first and last ones (i.e. 0 & 1) and rounded - we may see error in floating point arithmetic.
+    '''
+    combined = np.sort(np.concatenate([piece_wise_a, piece_wise_b], axis=-1), axis=-1)
+    return np.round(combined[..., 1:-1], 3)
+
+
+def _step_indices(piece_wise, breakpoints):
+    '''
+    Index of the step of each piece wise function (row of *piece_wise*) that contains each breakpoint (row of *breakpoints*): *j* such that piece_wise[j] < breakpoint <= piece_wise[j+1]. A breakpoint outside of the steps keeps the index of the previous one (1 for the first one).
     
-        combined_piece_wise_lengths = [] + piece_wise_lengths["a"] + piece_wise_lengths["b"]
-        combined_piece_wise_lengths.sort()
-        # remove the first and last elements - i.e. 0 & 1
-        combined_piece_wise_lengths.pop(0)
-        combined_piece_wise_lengths.pop(len(combined_piece_wise_lengths)-1)
-        
-        # Round the combined_piece_wise_lengths - strange why we see still not rounded values
-        for i in range(len(combined_piece_wise_lengths)):
-            combined_piece_wise_lengths[i] = round(combined_piece_wise_lengths[i], 3)
-        
-        distance = 0
-        index_a = 1
-        index_b = 1
-        
-        for i in range(1, len(combined_piece_wise_lengths)):
-            for j in range(1, len(piece_wise_lengths["a"])):
-                if(piece_wise_lengths["a"][j-1] < combined_piece_wise_lengths[i] <= piece_wise_lengths["a"][j] ):
-                    # use j-1
-                    index_a = j-1
-                    break
-            
-            for k in range(1, len(piece_wise_lengths["b"])):
-                if(piece_wise_lengths["b"][k-1] < combined_piece_wise_lengths[i] <= piece_wise_lengths["b"][k] ):
-                    # use j-1
-                    index_b = k-1
-                    break
-            
-            distance += abs(a_turn["angles"][index_a] - b_turn["angles"][index_b])
-            
-        if(distance < min_distance): # save a snapshot
-            min_distance_snapshot = {}
-            min_distance = distance
-            min_distance_snapshot["a"] = copy.deepcopy(a_turn)
-            min_distance_snapshot["b"] = copy.deepcopy(b_turn)
-            min_distance_snapshot["distance"] = min_distance
-            min_distance_snapshot["piece_wise_a"] = copy.deepcopy(piece_wise_lengths["a"])
-            min_distance_snapshot["piece_wise_b"] = copy.deepcopy(piece_wise_lengths["b"])
-            min_distance_snapshot["combined_piece_wise"] = []+combined_piece_wise_lengths
-        
-        distances.append(distance)
-        
-        # SHIFT Polygon A: 
-        angle = a_turn["angles"].pop(0)
-        length = a_turn["lengths"].pop(0)
-        a_turn["angles"].append(angle)
-        a_turn["lengths"].append(length)
-    
-    # SHIFT Polygon B: -----------------------------------------  
-    
-    piece_wise_lengths = {} 
-    piece_wise_lengths["a"] = [0]*(len(a_turn["lengths"])+1)
-    for i in range(1, len(a_turn["lengths"])+1):
-        piece_wise_lengths["a"][i] = piece_wise_lengths["a"][i-1] + a_turn["lengths"][i-1]
-        
-        
-    for shift in range(len(b_turn["lengths"])):     
-        piece_wise_lengths["b"] = [0]*(len(b_turn["lengths"])+1)
-        for i in range(1, len(b_turn["lengths"])+1):
-            piece_wise_lengths["b"][i] = piece_wise_lengths["b"][i-1] + b_turn["lengths"][i-1]
-        
+    All the rows are searched at once: the breakpoints are sorted with the steps.
+    '''
+    rows, n_steps = piece_wise.shape
+    n_breaks = breakpoints.shape[1]
+    row = np.repeat(np.arange(rows), n_steps + n_breaks)
+    values = np.concatenate([piece_wise, breakpoints], axis=1).ravel()
+    is_step = np.zeros((rows, n_steps + n_breaks), dtype=int)
+    is_step[:, :n_steps] = 1
+    is_step = is_step.ravel()
+    # breakpoints before equal steps: count the steps strictly lower
+    order = np.lexsort((is_step, values, row))
+    lower = np.empty(len(values), dtype=int)
+    lower[order] = np.cumsum(is_step[order]) - is_step[order]
+    lower = lower.reshape(rows, -1)[:, n_steps:] - (np.arange(rows) * n_steps)[:, None]
+    
+    found = (lower >= 1) & (lower < n_steps)
+    last_found = np.maximum.accumulate(np.where(found, np.arange(n_breaks), -1), axis=1)
+    indices = np.take_along_axis(lower - 1, np.maximum(last_found, 0), axis=1)
+    return np.where(last_found >= 0, indices, 1)
+
+
+def _coincide(a_angles, a_lengths, b_angles, b_lengths):
+    '''
+    Cyclic shifts of pairs of turning functions (one pair per row) minimising their distance, see :func:`coincide_turning_functions`.
     
-        combined_piece_wise_lengths = [] + piece_wise_lengths["a"] + piece_wise_lengths["b"]
-        combined_piece_wise_lengths.sort()
-        # remove the first and last elements - i.e. 0 & 1
-        combined_piece_wise_lengths.pop(0)
-        combined_piece_wise_lengths.pop(len(combined_piece_wise_lengths)-1)
-        
-        # Round the combined_piece_wise_lengths - strange why we see still not rounded values
-        for i in range(len(combined_piece_wise_lengths)):
-            combined_piece_wise_lengths[i] = round(combined_piece_wise_lengths[i], 3)
-        
-        distance = 0
-        index_a = 1
-        index_b = 1
-        
-        for i in range(1, len(combined_piece_wise_lengths)):
-            for j in range(1, len(piece_wise_lengths["a"])):
-                if(piece_wise_lengths["a"][j-1] < combined_piece_wise_lengths[i] <= piece_wise_lengths["a"][j] ):
-                    # use j-1
-                    index_a = j-1
-                    break
-            
-            for k in range(1, len(piece_wise_lengths["b"])):
-                if(piece_wise_lengths["b"][k-1] < combined_piece_wise_lengths[i] <= piece_wise_lengths["b"][k] ):
-                    # use j-1
-                    index_b = k-1
-                    break
-            
-            distance += abs(a_turn["angles"][index_a] - b_turn["angles"][index_b])
-            
-        if(distance < min_distance): # save a snapshot
-            min_distance_snapshot = {}
-            min_distance = distance
-            min_distance_snapshot["a"] = copy.deepcopy(a_turn)
-            min_distance_snapshot["b"] = copy.deepcopy(b_turn)
-            min_distance_snapshot["distance"] = min_distance
-            min_distance_snapshot["piece_wise_a"] = copy.deepcopy(piece_wise_lengths["a"])
-            min_distance_snapshot["piece_wise_b"] = copy.deepcopy(piece_wise_lengths["b"])
-            min_distance_snapshot["combined_piece_wise"] = []+combined_piece_wise_lengths
+    Every shift of A (B fixed) then every shift of B (A fixed) is evaluated at once.
+    
+    Returns:
+        - **shift_a** (*int []*), **shift_b** (*int []*): shifts of the best alignment of each pair
+        - **distance** (*float []*): distance of the best alignment of each pair
+    '''
+    pairs, n_a = a_angles.shape
+    n_b = b_angles.shape[1]
+    shifts_a = np.concatenate([np.arange(n_a), np.zeros(n_b, dtype=int)])
+    shifts_b = np.concatenate([np.zeros(n_a, dtype=int), np.arange(n_b)])
+    
+    piece_wise_a = _piece_wise(_rotations(a_lengths, shifts_a)).reshape(-1, n_a + 1)
+    piece_wise_b = _piece_wise(_rotations(b_lengths, shifts_b)).reshape(-1, n_b + 1)
+    combined = _combined_piece_wise(piece_wise_a, piece_wise_b)[:, 1:]
+    
+    index_a = _step_indices(piece_wise_a, combined)
+    index_b = _step_indices(piece_wise_b, combined)
+    angles_a = np.take_along_axis(_rotations(a_angles, shifts_a).reshape(-1, n_a), index_a, axis=1)
+    angles_b = np.take_along_axis(_rotations(b_angles, shifts_b).reshape(-1, n_b), index_b, axis=1)
+    distances = _sequential_sum(np.abs(angles_a - angles_b), axis=1).reshape(pairs, -1)
+    
+    best = np.argmin(distances, axis=1)
+    return shifts_a[best], shifts_b[best], distances[np.arange(pairs), best]
 
-            
-        distances.append(distance)
-        
-        # SHIFT Polygon B: 
-        angle = b_turn["angles"].pop(0)
-        length = b_turn["lengths"].pop(0)
-        b_turn["angles"].append(angle)
-        b_turn["lengths"].append(length)
-        
+
+def _aligned_distance(a_angles, a_lengths, b_angles, b_lengths):
+    '''
+    Distance between pairs of aligned turning functions (one pair per row), see :func:`calculate_distance_min_distance_snaphot`.
+    '''
+    piece_wise_a, piece_wise_b = _piece_wise(a_lengths), _piece_wise(b_lengths)
+    combined = _combined_piece_wise(piece_wise_a, piece_wise_b)
+    # the possibly repeating change points are ignored
+    repeated = combined[:, 1:] == combined[:, :-1]
+    combined = combined[:, 1:]
+    
+    index_a = _step_indices(piece_wise_a, combined)
+    index_b = _step_indices(piece_wise_b, combined)
+    d_angles = np.take_along_axis(a_angles, index_a, axis=1) - np.take_along_axis(b_angles, index_b, axis=1)
+    d_lengths = np.take_along_axis(a_lengths, index_a, axis=1) - np.take_along_axis(b_lengths, index_b, axis=1)
+    return _sequential_sum(np.where(repeated, 0, np.sqrt(d_angles**2 + d_lengths**2)), axis=1)
+
+
+def _shift(values, shifts):
+    '''
+    Cyclic shift of each row of *values*, row *p* starts at *values[p, shifts[p]]*.
+    '''
+    n = values.shape[1]
+    return np.take_along_axis(values, (shifts[:, None] + np.arange(n)) % n, axis=1)
+
+
+def coincide_turning_functions(a_turn, b_turn):
+    '''
+    Aligns two turning functions: finds the cyclic shift of their turns (shift of A or shift of B) minimising the sum of the angle differences over the combined piece wise lengths.
+    
+    Args:
+        - **a_turn** (*dict*): First turning function, as provided by :func:`turning_function` (normalised)
+        - **b_turn** (*dict*): Second turning function
+    
+    Returns:
+        - **dict**: The best alignment with the following attributes
+            - **a** (*dict*): aligned turn function of polygon a
+            - **b** (*dict*): aligned turn function of polygon b
+            - **distance** (*float*): sum of the angle differences
+            - **piece_wise_a** (*float []*): piece wise lengths of polygon a
+            - **piece_wise_b** (*float []*): piece wise lengths of polygon b
+            - **combined_piece_wise** (*float []*): combined piece wise lengths of two polygons
+    '''
+    a_angles, a_lengths = np.asarray([a_turn["angles"]], dtype=float), np.asarray([a_turn["lengths"]], dtype=float)
+    b_angles, b_lengths = np.asarray([b_turn["angles"]], dtype=float), np.asarray([b_turn["lengths"]], dtype=float)
+    shift_a, shift_b, distance = (value[0] for value in _coincide(a_angles, a_lengths, b_angles, b_lengths))
+    
+    min_distance_snapshot = {}
+    for key, turn, shift in [("a", a_turn, shift_a), ("b", b_turn, shift_b)]:
+        min_distance_snapshot[key] = {**turn}
+        for attribute in ["angles", "lengths", "direction"]:
+            if attribute in turn:
+                min_distance_snapshot[key][attribute] = list(turn[attribute][shift:]) + list(turn[attribute][:shift])
+    min_distance_snapshot["distance"] = distance
+    min_distance_snapshot["piece_wise_a"] = _piece_wise(np.asarray(min_distance_snapshot["a"]["lengths"])).tolist()
+    min_distance_snapshot["piece_wise_b"] = _piece_wise(np.asarray(min_distance_snapshot["b"]["lengths"])).tolist()
+    min_distance_snapshot["combined_piece_wise"] = _combined_piece_wise(
+        np.asarray(min_distance_snapshot["piece_wise_a"]), np.asarray(min_distance_snapshot["piece_wise_b"])).tolist()
     return min_distance_snapshot
 
 def convert_normalised_angles_back(angles):
@@ -527,43 +599,29 @@ def convert_normalised_angles_back(angles):
     
 
 def calculate_distance_min_distance_snaphot(min_distance_snapshot):
-     # Calculate the total distance of the min_distance_snapshot
-    index_a = 1
-    index_b = 1
-    total_distance = 0
+    # Calculate the total distance of the min_distance_snapshot
+    a, b = min_distance_snapshot["a"], min_distance_snapshot["b"]
+    min_distance_snapshot["total_distance"] = _aligned_distance(
+        np.asarray([a["angles"]], dtype=float), np.asarray([a["lengths"]], dtype=float),
+        np.asarray([b["angles"]], dtype=float), np.asarray([b["lengths"]], dtype=float))[0]
     # remove the possibly repeating change points
     min_distance_snapshot["combined_piece_wise"] = sorted(set(min_distance_snapshot["combined_piece_wise"]))
-    for i in range(1, (len(min_distance_snapshot["combined_piece_wise"]))):
-        for j in range(index_a, len(min_distance_snapshot["piece_wise_a"])):
-            if(min_distance_snapshot["piece_wise_a"][j-1] < min_distance_snapshot["combined_piece_wise"][i] <= min_distance_snapshot["piece_wise_a"][j] ):
-                # use j-1
-                index_a = j-1
-                break
-            
-        for k in range(index_b, len(min_distance_snapshot["piece_wise_b"])):
-            if(min_distance_snapshot["piece_wise_b"][k-1] < min_distance_snapshot["combined_piece_wise"][i] <= min_distance_snapshot["piece_wise_b"][k] ):
-                # use j-1
-                index_b = k-1
-                break
-        
-        total_distance += math.sqrt(abs(min_distance_snapshot["a"]["angles"][index_a] - min_distance_snapshot["b"]["angles"][index_b])**2 + abs(min_distance_snapshot["a"]["lengths"][index_a] - min_distance_snapshot["b"]["lengths"][index_b])**2)
- 
-    
-    min_distance_snapshot["total_distance"] = total_distance
     
     return min_distance_snapshot
     
     
+def _normalise_turn_arrays(angles, lengths):
+    '''
+    Normalised angles (over the total angle, must be 360 - NOT always due to floating point arithmetic) and lengths, rounded - we may see error in floating point arithmetic.
+    '''
+    return np.round(angles / _sequential_sum(angles), 3), np.round(lengths, 3)
+
+
 def normalise_turn_function(a_turn):
     # Normalise the angles
-    # Round the float - we may see error in floating point arithmetic
-    total_angle = sum(a_turn["angles"]) # must be 360 - NOT always due to floating point arithmetic
-    for i in range(len(a_turn["angles"])):
-        a_turn["angles"][i] = round((a_turn["angles"][i] / total_angle), 3)
-    
-    # Round the lengths
-    for i in range(len(a_turn["lengths"])):
-        a_turn["lengths"][i] = round(a_turn["lengths"][i], 3)
+    angles, lengths = _normalise_turn_arrays(np.asarray(a_turn["angles"], dtype=float), np.asarray(a_turn["lengths"], dtype=float))
+    a_turn["angles"] = angles.tolist()
+    a_turn["lengths"] = lengths.tolist()
     
     return a_turn
 
@@ -574,86 +632,86 @@ def switch_to_cw(list_to_convert):
     
     return converted
 
+
+def _normalised_turns(rings):
+    '''
+    Normalised turn angles and lengths of closed rings of nodes with the same number of nodes, digitised counter clockwise.
+    '''
+    return [_normalise_turn_arrays(angles, lengths) for angles, lengths, _, _ in _turning_function_arrays(rings, ccw=True)]
+
+
+def _turning_arrays_distance(a_angles, a_lengths, b_angles, b_lengths):
+    '''
+    Distances between pairs of normalised turning functions (one pair per row, digitised CCW), see :func:`turning_function_distance`.
+    '''
+    def aligned_distance(a_angles, a_lengths, b_angles, b_lengths):
+        shift_a, shift_b, _ = _coincide(a_angles, a_lengths, b_angles, b_lengths)
+        return _aligned_distance(_shift(a_angles, shift_a), _shift(a_lengths, shift_a), _shift(b_angles, shift_b), _shift(b_lengths, shift_b))
+    
+    # Had the turn function obtained in the other direction:
+    # SHIFT Lengths to Next (+1), switch the sign of the angles & reverse the order (from the one before last)
+    def to_cw(angles, lengths):
+        return np.roll(-angles[:, ::-1], -1, axis=1), np.roll(np.roll(lengths, 1, axis=1)[:, ::-1], -1, axis=1)
+    
+    # Assumed CCW=TRUE - but a SUBTLY different turn function occurs had CCW=TRUE been ignored
+    distance_ccw = aligned_distance(a_angles, a_lengths, b_angles, b_lengths)
+    distance_cw = aligned_distance(*to_cw(a_angles, a_lengths), *to_cw(b_angles, b_lengths))
+    return np.where(distance_ccw < distance_cw, distance_ccw, distance_cw)
+
+
 def turning_function_distance(polygon_a, polygon_b):
     '''
-    Calculates the distance between two turn functions. 
+    Calculates the distance between the turn functions of two polygons. 
     
     Args:
-        - **a_turn** (*dict*): First polygon's turn function as provided by the *turning_function(polygon_a)*.
-        - **b_turn** (*dict*): Second polygon's turn function as provided by the *turning_function(polygon_b)*.
+        - **polygon_a** (*polygon*): First polygon
+        - **polygon_b** (*polygon*): Second polygon
     
     Returns:
-        - **dict**: A dictionary containing the following attributes:
-            - **a** (*dict*): aligned turn function of polygon a
-            - **b** (*dict*): aligned turn function of polygon b
-            - **distance** (*float*): turn function distance between the polygons
-            - **piece_wise_a** (*float []*): piece wise lengths of polygon a
-            - **piece_wise_b** (*float []*): piece wise lengths of polygon b
-            - **combined_piece_wise** (*float []*): combined piece wise lengths of two polygons
-    Notes:
-        - Alignment step is carried out to make sure that the start point of the polygons do not make a difference.
+        - **distance** (*float*): turn function distance between the polygons
         
-        
-
+    Notes:
+        - Alignment step is carried out to make sure that the start point of the polygons do not make a difference: every cyclic shift of the turns is tried, for the polygons digitised counter clockwise and clockwise.
     '''   
-    a_turn = turning_function(polygon_a, ccw=True)
-    b_turn = turning_function(polygon_b, ccw=True)
+    a_turn = _normalised_turns(_vertex_coordinates(polygon_a)[None])[0]
+    b_turn = _normalised_turns(_vertex_coordinates(polygon_b)[None])[0]
+    return float(_turning_arrays_distance(*(values[None, :] for values in a_turn + b_turn))[0])
 
-    
-    a_turn = normalise_turn_function(a_turn)
-    b_turn = normalise_turn_function(b_turn)
-    
 
-    # Assumed CCW=TRUE - but a SUBTLY different turn function occurs had CCW=TRUE been ignored
-    #Assumption: Both turn functions are created with CCW=True
-    min_distance_snapshot_ccw = coincide_turning_functions(a_turn, b_turn)
-    
-        
-    # SHIFT Lengths to Next (+1) & switch the sign of the angles
-    # Shift the lengths
-    tmp = a_turn["lengths"][0]
-    a_turn["lengths"][0] = a_turn["lengths"][-1]
-    for i in range(1, len(a_turn["lengths"])):
-        tmp_current = a_turn["lengths"][i]
-        a_turn["lengths"][i] = tmp
-        tmp = tmp_current
-
-    tmp =b_turn["lengths"][0]
-    b_turn["lengths"][0] = b_turn["lengths"][-1]
-    for i in range(1, len(b_turn["lengths"])):
-        tmp_current = b_turn["lengths"][i]
-        b_turn["lengths"][i] = tmp
-        tmp = tmp_current
-
-    # Switch the sign of the angles
-    for i in range(len(a_turn["angles"])):
-        a_turn["angles"][i] = a_turn["angles"][i] * -1
-    
-    for i in range(len(b_turn["angles"])):
-        b_turn["angles"][i] = b_turn["angles"][i] * -1
-    
-    # Complete the reverse operation - start from one before last, move upwards
-    # From CCW -> to -> CW
-    a_turn["angles"] = switch_to_cw(a_turn["angles"])
-    a_turn["lengths"] = switch_to_cw(a_turn["lengths"])
-    
-    b_turn["angles"] = switch_to_cw(b_turn["angles"])
-    b_turn["lengths"] = switch_to_cw(b_turn["lengths"])
-    
-    
-   
-    
-    # Had the turn function obtained in the other direction
-    min_distance_snapshot_cw = coincide_turning_functions(a_turn, b_turn)
-    
-    m1 = calculate_distance_min_distance_snaphot(min_distance_snapshot_ccw)
-    m2 = calculate_distance_min_distance_snaphot(min_distance_snapshot_cw)
-    if(m1["total_distance"] < m2["total_distance"]):
-        return m1["total_distance"]
-    else:
-        return m2["total_distance"]
+def turning_function_distance_many(polygons_a, polygons_b):
+    '''
+    Identifies the turn function distances between two aligned series of polygons (e.g. matched building footprints). Same as calling :func:`turning_function_distance` on each pair.
     
-
-
-
+    The turn functions are computed once per polygon, then the pairs with the same numbers of turns are aligned at once.
     
+    Args:
+        - **polygons_a** (*GeoSeries*): First polygons
+        - **polygons_b** (*GeoSeries*): Second polygons, the i-th polygon is compared with the i-th polygon of *polygons_a*
+            
+    Returns:
+        - **distances** (*ndarray*): turn function distance between each pair of polygons, *nan* for empty or missing polygons
+    '''
+    _check_aligned(polygons_a, polygons_b)
+    
+    def turns(polygons):
+        # the rings with the same number of nodes at once
+        coordinates, counts, offsets = _batch_vertices(polygons)
+        result = [None] * len(counts)
+        for count in np.unique(counts[counts > 0]):
+            index = np.flatnonzero(counts == count)
+            rings = coordinates[offsets[index][:, None] + np.arange(count)]
+            for i, turn in zip(index, _normalised_turns(rings)):
+                result[i] = turn
+        return result
+    
+    # group the pairs by numbers of turns
+    groups = {}
+    for i, (a_turn, b_turn) in enumerate(zip(turns(polygons_a), turns(polygons_b))):
+        if(a_turn is not None and b_turn is not None):
+            groups.setdefault((len(a_turn[0]), len(b_turn[0])), []).append((i, a_turn + b_turn))
+    
+    result = np.full(len(polygons_a), np.nan)
+    for pairs in groups.values():
+        index = [i for i, _ in pairs]
+        result[index] = _turning_arrays_distance(*(np.stack(values) for values in zip(*(turns for _, turns in pairs))))
+    return result
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+# CMD: python -m unittest test.test_matching
+
+import sys, os 
+
+
+import unittest
+
+
+testdir = os.path.dirname(__file__)
+srcdir = '../../'
+sys.path.insert(0, os.path.abspath(os.path.join(testdir, srcdir)))
+
+from x2polygons.matching import *
+from x2polygons.geometry import *
+
+import numpy as np
+import geopandas as gp
+class TestMatching(unittest.TestCase):
+   
+    
+    
+    # setUp() will run BEFORE each test
+    # Here we can define the common test cases
+    def setUp(self):
+        print("setUp")
+        
+        # Reference: three squares far from each other
+        self.ref = gp.GeoDataFrame(geometry=[
+            Polygon([(0, 0), (5, 0), (5, 5), (0, 5), (0, 0)]),
+            Polygon([(20, 0), (25, 0), (25, 5), (20, 5), (20, 0)]),
+            Polygon([(40, 0), (45, 0), (45, 5), (40, 5), (40, 0)]),
+        ], index=[10, 11, 12])
+        # Test: 1. the same square, 2. two shifted squares competing for the same reference, 3. a small square overlapping less than 30% of the reference
+        self.test = gp.GeoDataFrame(geometry=[
+            Polygon([(0, 0), (5, 0), (5, 5), (0, 5), (0, 0)]),
+            Polygon([(21, 0), (26, 0), (26, 5), (21, 5), (21, 0)]),
+            Polygon([(22, 0), (27, 0), (27, 5), (22, 5), (22, 0)]),
+            Polygon([(40, 0), (41, 0), (41, 1), (40, 1), (40, 0)]),
+        ], index=[0, 1, 2, 3])
+        
+    
+    def test_twao_matching(self):
+        print("test TWAO matching")
+        
+        test, ref, overlap = twao_matching(self.test, self.ref)
+        self.assertEqual(test.tolist(), [0, 1])
+        self.assertEqual(ref.tolist(), [0, 1])
+        self.assertEqual(overlap.tolist(), [25, 20])
+        
+        # the small square overlaps all its area
+        test, ref, overlap = twao_matching(self.test, self.ref, min_overlap=0.01)
+        self.assertEqual(test.tolist(), [0, 1, 3])
+        self.assertEqual(ref.tolist(), [0, 1, 2])
+    
+    
+    def test_compare_footprints(self):
+        print("test comparison of the footprints")
+        
+        comparison = compare_footprints(self.test, self.ref, distances=['hausdorff'])
+        self.assertEqual(len(comparison), 2 + 2 + 1)
+        
+        for _, row in comparison.iloc[:2].iterrows():
+            polygon_test, polygon_ref = self.test.geometry[row['test']], self.ref.geometry[row['ref']]
+            areas = x2_areas(polygon_test, polygon_ref)
+            self.assertAlmostEqual(row['TP'], areas['TP'])
+            self.assertAlmostEqual(row['FP'], areas['FP'])
+            self.assertAlmostEqual(row['FN'], areas['FN'])
+            self.assertAlmostEqual(row['overlap_percent'], overlap_percent(polygon_test, polygon_ref))
+            self.assertAlmostEqual(row['centroid_distance'], centroid_distance(polygon_test, polygon_ref))
+            self.assertAlmostEqual(row['perimeter_ratio'], perimeter_ratio(polygon_test, polygon_ref))
+        self.assertEqual(comparison['hausdorff'].iloc[1], 1)
+        
+        # unmatched footprints
+        self.assertEqual(sorted(comparison['test'].iloc[2:4]), [2, 3])
+        self.assertEqual(comparison['ref'].iloc[4], 12)
+        self.assertEqual(comparison['FN'].iloc[4], 25)
+        
+        summary = summarise_comparison(comparison)
+        self.assertEqual(summary['matched'], 2)
+        self.assertAlmostEqual(summary['precision'], 2 / 4)
+        self.assertAlmostEqual(summary['recall'], 2 / 3)
+        
+        
+        
+if __name__ == '__main__':
+    unittest.main()
@@ -33,6 +33,9 @@ from x2polygons.geometry import *
    # and AFTER EVERYTHING
 
 import math
+import numpy as np
+import geopandas as gp
+from shapely.affinity import translate
 class TestPolygonDistance(unittest.TestCase):
    
     
@@ -90,7 +93,29 @@ class TestPolygonDistance(unittest.TestCase):
         # self.assertEqual(hausdorff_distance(self.p1, self.p1_more_vertex_different_start), 0)
         
         self.assertEqual(hausdorff_distance(self.p1, self.p2, symmetrise="min"), 0)
-    
+
+
+    def test_batch_distances(self):
+        print("test batch Chamfer & Hausdorff distances")
+
+        polygons_a = gp.GeoSeries([self.p1, self.p2, self.p3, self.p5, self.p6])
+        polygons_b = gp.GeoSeries([self.p1_more_vertex_cw, self.p1, self.p4, self.p5_different_start, self.p6_shifted])
+
+        for symmetrise in [None, 'min', 'max', 'average']:
+            kwargs = {} if symmetrise is None else {'symmetrise': symmetrise}
+            chamfer = chamfer_distance_many(polygons_a, polygons_b, chunk_size=7, **kwargs)
+            hausdorff = hausdorff_distance_many(polygons_a, polygons_b, **kwargs)
+            for i in range(len(polygons_a)):
+                self.assertAlmostEqual(chamfer[i], chamfer_distance(polygons_a[i], polygons_b[i], **kwargs))
+                self.assertAlmostEqual(hausdorff[i], hausdorff_distance(polygons_a[i], polygons_b[i], **kwargs))
+
+        # far away polygons: distances between vertices are capped
+        far = gp.GeoSeries([translate(self.p1, 5000, 0)])
+        self.assertEqual(hausdorff_distance_many(gp.GeoSeries([self.p1]), far)[0], 1000.0)
+        self.assertEqual(chamfer_distance_many(gp.GeoSeries([self.p1]), far)[0], 4000.0)
+
+        self.assertTrue(np.isnan(chamfer_distance_many(gp.GeoSeries([self.p1]), gp.GeoSeries([Polygon()]))[0]))
+
 
     def test_Polis(self):
         print("test Polis distance")
@@ -100,6 +125,15 @@ class TestPolygonDistance(unittest.TestCase):
         
         self.assertEqual(polis_distance(self.p1_extension_1m, self.p1, symmetrise='min'), 0)
         
+        polygons_a = gp.GeoSeries([self.p1, self.p1, self.p2, self.p5, self.p6, self.p1])
+        polygons_b = gp.GeoSeries([self.p1_more_vertex_cw, self.p1_extension_1m_N_vertices, self.p1, self.p5_different_start, self.p6_shifted, Polygon()])
+        for symmetrise in [None, 'min', 'max', 'average']:
+            kwargs = {} if symmetrise is None else {'symmetrise': symmetrise}
+            distances = polis_distance_many(polygons_a, polygons_b, **kwargs)
+            for i in range(len(polygons_a) - 1):
+                self.assertAlmostEqual(distances[i], polis_distance(polygons_a[i], polygons_b[i], **kwargs))
+            self.assertTrue(np.isnan(distances[-1]))
+        
         # self.assertEqual(polis_distance(self.p1, self.p2), 0)
         # self.assertEqual(polis_distance(self.p2, self.p1), 20/8) #2.5
         # self.assertEqual(polis_distance(self.p2, self.p1, symmetrize = "average"), 2.5 / 2)
@@ -147,6 +181,19 @@ class TestPolygonDistance(unittest.TestCase):
         self.assertEqual(turning_function_distance(self.p5, self.p5_different_start), 0)
         
         self.assertEqual(turning_function_distance(self.p6, self.p6_shifted), 0)
+    
+    
+    def test_batch_turning_function_distance(self):
+        print("test batch turn function distance")
+        
+        polygons_a = gp.GeoSeries([self.p1, self.p1, self.p2, self.p5, self.p6, self.p3, self.p1])
+        polygons_b = gp.GeoSeries([self.p1_cw, self.p1_more_vertex_different_start, self.p4, self.p5_different_start, self.p6_shifted, self.p1, Polygon()])
+        
+        distances = turning_function_distance_many(polygons_a, polygons_b)
+        for i in range(len(polygons_a) - 1):
+            self.assertAlmostEqual(distances[i], turning_function_distance(polygons_a[i], polygons_b[i]))
+        self.assertEqual(distances[4], 0)
+        self.assertTrue(np.isnan(distances[-1]))
         
         
         
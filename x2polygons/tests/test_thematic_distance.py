@@ -45,5 +45,26 @@ class TestThematicDistance(unittest.TestCase):
         
         self.assertEqual(levenshtein_distance(self.s1, self.s4), 13)
         
+        self.assertEqual(levenshtein_distance("", self.s4), len(self.s4))
+        self.assertEqual(levenshtein_distance("kitten", "sitting"), 3)
+        
+    def test_Levenshtein_cutoff(self):
+        print("test Levenshtein distance with a cutoff")
+        
+        self.assertEqual(levenshtein_distance(self.s1, self.s3, max_distance=6), 6)
+        self.assertEqual(levenshtein_distance(self.s1, self.s3, max_distance=5), 6)
+        self.assertEqual(levenshtein_distance(self.s1, self.s4, max_distance=2), 3)
+        self.assertEqual(levenshtein_distance(self.s1, "", max_distance=2), 3)
+        
+    def test_pairwise(self):
+        print("test pairwise Levenshtein distances")
+        
+        distances = pairwise([self.s1, self.s1, self.s1, None, self.s1], [self.s2, self.s3, self.s4, self.s1, self.s2])
+        self.assertEqual(distances[:3].tolist(), [1, 6, 13])
+        self.assertTrue(math.isnan(distances[3]))
+        self.assertEqual(distances[4], 1)
+        
+        self.assertEqual(pairwise([self.s1], [self.s4], max_distance=5).tolist(), [6])
+        
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,45 +1,104 @@
 """
-This module contains the functionality to find the distance between thematic (textual) attributes. 
-    
+This module contains the functionality to find the distance between thematic (textual) attributes.
+
 Distance Functions:
-    - ``Levenshtein Distance`` `[code] <https://stackabuse.com/levenshtein-distance-and-text-similarity-in-python/>`_.
+    - ``Levenshtein Distance`` `[bit-parallel algorithm] <https://doi.org/10.1145/316542.316550>`_.
 
 
 """
 import numpy as np
+import pandas as pd
+
+
+def _match_masks(seq):
+    '''
+    Bit masks of the positions of each character of *seq* (bit *i* is set for the *i*-th character).
+    '''
+    masks = {}
+    for i, char in enumerate(seq):
+        masks[char] = masks.get(char, 0) | (1 << i)
+    return masks
+
+
+def _levenshtein(seq1, seq2, max_distance=None, masks=None):
+    '''
+    Bit-parallel (Myers / Hyyrö) Levenshtein distance: one column of the distance matrix is encoded in the vertical positive (*pv*) and negative (*mv*) differences bit vectors and updated with a few integer operations per character of *seq2*.
+    '''
+    m, n = len(seq1), len(seq2)
+    if(max_distance is not None and abs(m - n) > max_distance):
+        return max_distance + 1
+    if(m == 0):
+        return n
+
+    masks = masks if masks is not None else _match_masks(seq1)
+    full = (1 << m) - 1
+    last = 1 << (m - 1)
+    pv, mv = full, 0
+    distance = m
+    for j, char in enumerate(seq2):
+        eq = masks.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if(ph & last):
+            distance += 1
+        elif(mh & last):
+            distance -= 1
+        # each remaining character changes the distance by 1 at most
+        if(max_distance is not None and distance - (n - j - 1) > max_distance):
+            return max_distance + 1
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+
+    if(max_distance is not None and distance > max_distance):
+        return max_distance + 1
+    return distance
+
 
-def levenshtein_distance(seq1, seq2):
+def levenshtein_distance(seq1, seq2, max_distance=None):
     '''
-    Calculates the Levenshtein distance between two input strings (e.g. the names of matching buildings).  
-    
+    Calculates the Levenshtein distance between two input strings (e.g. the names of matching buildings).
+
     Args:
         - **seq1** (*str*): First polygon's thematic attribute value.
         - **seq2** (*str*): Second polygon's thematic attribute value.
-    
+        - **max_distance** (*int*): Optional cutoff, the computation stops as soon as the distance is known to exceed it.
+
+    Returns:
+        - **int**: The Levenshtein distance between seq1 and seq2 (*max_distance + 1* when it exceeds *max_distance*)
+    '''
+    return _levenshtein(seq1, seq2, max_distance)
+
+
+def pairwise(seq_a, seq_b, max_distance=None):
+    '''
+    Calculates the Levenshtein distances between two aligned columns of thematic attributes (e.g. the names of matched buildings). Same as calling :func:`levenshtein_distance` on each pair, each distinct pair of values is computed once.
+
+    Args:
+        - **seq_a** (*str []*): First polygons' thematic attribute values (e.g. a column of a GeoDataFrame).
+        - **seq_b** (*str []*): Second polygons' thematic attribute values, the i-th value is compared with the i-th value of *seq_a*.
+        - **max_distance** (*int*): see :func:`levenshtein_distance`.
+
     Returns:
-        - **int**: The Levenshtein distance between seq1 and seq2 
-    '''   
-    size_x = len(seq1) + 1
-    size_y = len(seq2) + 1
-    matrix = np.zeros ((size_x, size_y))
-    for x in range(size_x):
-        matrix [x, 0] = x
-    for y in range(size_y):
-        matrix [0, y] = y
-
-    for x in range(1, size_x):
-        for y in range(1, size_y):
-            if seq1[x-1] == seq2[y-1]:
-                matrix [x,y] = min(
-                    matrix[x-1, y] + 1,
-                    matrix[x-1, y-1],
-                    matrix[x, y-1] + 1
-                )
-            else:
-                matrix [x,y] = min(
-                    matrix[x-1,y] + 1,
-                    matrix[x-1,y-1] + 1,
-                    matrix[x,y-1] + 1
-                )
-    
-    return (matrix[size_x - 1, size_y - 1])
\ No newline at end of file
+        - **ndarray**: The Levenshtein distance between each pair of values, *nan* when a value is missing. Values that are not strings are compared as strings.
+    '''
+    seq_a, seq_b = list(seq_a), list(seq_b)
+    if(len(seq_a) != len(seq_b)):
+        raise ValueError(f"Columns are not aligned: {len(seq_a)} != {len(seq_b)}")
+
+    distances = np.full(len(seq_a), np.nan)
+    computed = {}
+    masks = {}
+    for i, (value_a, value_b) in enumerate(zip(seq_a, seq_b)):
+        if(pd.isna(value_a) or pd.isna(value_b)):
+            continue
+        value_a, value_b = str(value_a), str(value_b)
+        if((value_a, value_b) not in computed):
+            if(value_a not in masks):
+                masks[value_a] = _match_masks(value_a)
+            computed[value_a, value_b] = _levenshtein(value_a, value_b, max_distance, masks[value_a])
+        distances[i] = computed[value_a, value_b]
+    return distances